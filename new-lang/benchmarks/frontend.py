@@ -0,0 +1,131 @@
+#frontend.py
+#contains the front-end benchmark, which measures the throughput of the lexer
+#and parser on synthetic programs and the memory their output takes, and
+#can gate a replacement lexer or parser against a stored baseline. Run it
+#from the new-lang directory with "python benchmarks/frontend.py"
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grin
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_THRESHOLD = 0.10
+ALLOCATION_LINES = 10000
+
+def synthetic_lines(count: int, strings: float = 0.2, floats: float = 0.2, labels: float = 0.1,
+                    long_identifiers: float = 0.1, seed: int = 0) -> Iterator[str]:
+    """Generates count lines of a valid program. Each fraction is the share
+       of lines with a string literal, with a float literal, with a label,
+       and naming an identifier 40 characters long"""
+    chooser = random.Random(seed)
+    for number in range(count):
+        name = f'V{number % 97}'
+        if chooser.random() < long_identifiers:
+            name = f'{name}{"X" * 40}'[:40]
+        roll = chooser.random()
+        if roll < strings:
+            line = f'LET {name} "text on line {number} with some words in it"'
+        elif roll < strings + floats:
+            line = f'ADD {name} {chooser.random() * 1000:.6f}'
+        else:
+            line = chooser.choice([f'LET {name} {number}', f'PRINT {name}', f'INNUM {name}',
+                                   f'GOTO 1 IF {name} < {number}', 'GOSUB -1', 'RETURN'])
+        if chooser.random() < labels:
+            line = f'L{number}: {line}'
+        yield line
+
+def lex(lines: Iterator[str]) -> tuple[int, int]:
+    """Lexes every line, returning the numbers of lines and tokens"""
+    count = tokens = 0
+    for count, line in enumerate(lines, 1):
+        for _ in grin.lexing.to_tokens(line, count):
+            tokens += 1
+    return count, tokens
+
+def parse(lines: Iterator[str]) -> tuple[int, int]:
+    """Parses every line, returning the numbers of lines and tokens"""
+    count = tokens = 0
+    for count, line in enumerate(grin.parsing.parse(lines), 1):
+        tokens += len(line)
+    return count, tokens
+
+def allocations(lines: list[str]) -> dict:
+    """Parses lines while keeping their tokens, returning the peak memory
+       and the memory blocks the tokens hold per line, under tracemalloc"""
+    tracemalloc.start()
+    try:
+        parsed = list(grin.parsing.parse(lines))
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    blocks = sum(statistic.count for statistic in snapshot.statistics('filename'))
+    return {'peak_kib': peak / 1024, 'blocks_per_line': blocks / len(parsed)}
+
+def measure(size: int, mix: dict) -> dict:
+    """Measures lexing and parsing size synthetic lines of the given mix"""
+    result = {}
+    for stage, run in (('lex', lex), ('parse', parse)):
+        start = time.perf_counter()
+        count, tokens = run(synthetic_lines(size, **mix))
+        seconds = time.perf_counter() - start
+        result[stage] = {'lines_per_second': count / seconds, 'tokens_per_second': tokens / seconds}
+    result.update(allocations(list(synthetic_lines(min(size, ALLOCATION_LINES), **mix))))
+    return result
+
+def main() -> int:
+    """Parses the command line, prints one row per program size and returns
+       1 if throughput fell below the baseline by more than the threshold"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type = int, nargs = '+', default = DEFAULT_SIZES,
+                        help = 'numbers of lines, up to 10000000')
+    parser.add_argument('--strings', type = float, default = 0.2, help = 'share of lines with strings')
+    parser.add_argument('--floats', type = float, default = 0.2, help = 'share of lines with floats')
+    parser.add_argument('--labels', type = float, default = 0.1, help = 'share of labeled lines')
+    parser.add_argument('--long-identifiers', type = float, default = 0.1,
+                        help = 'share of lines with long identifiers')
+    parser.add_argument('--baseline', default = None, help = 'JSON results to compare against')
+    parser.add_argument('--threshold', type = float, default = DEFAULT_THRESHOLD,
+                        help = 'fraction by which throughput may fall below the baseline')
+    parser.add_argument('--save', default = None, help = 'write the results as JSON to this file')
+    args = parser.parse_args()
+    mix = {'strings': args.strings, 'floats': args.floats, 'labels': args.labels,
+           'long_identifiers': args.long_identifiers}
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    regressed = []
+    print(f'{"LINES":>9} {"LEX LINES/S":>12} {"LEX TOKENS/S":>13} {"PARSE LINES/S":>14} '
+          f'{"PARSE TOKENS/S":>15} {"PEAK KiB":>9} {"BLOCKS/LINE":>12}')
+    for size in args.sizes:
+        result = results[str(size)] = measure(size, mix)
+        print(f'{size:>9} {result["lex"]["lines_per_second"]:>12,.0f} '
+              f'{result["lex"]["tokens_per_second"]:>13,.0f} '
+              f'{result["parse"]["lines_per_second"]:>14,.0f} '
+              f'{result["parse"]["tokens_per_second"]:>15,.0f} '
+              f'{result["peak_kib"]:>9,.0f} {result["blocks_per_line"]:>12.1f}', flush = True)
+        for stage in ('lex', 'parse'):
+            before = baseline.get(str(size), {}).get(stage)
+            if before and result[stage]['lines_per_second'] < before['lines_per_second'] * (1 - args.threshold):
+                regressed.append(f'{stage} at {size} lines')
+
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump({'mix': mix, **results}, file, indent = 2)
+    if regressed:
+        print(f'throughput fell by more than {args.threshold:.0%}: {", ".join(regressed)}', file = sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#ngrams.py
+#contains the n-gram benchmark, which measures how often each sequence of
+#adjacent statement opcodes runs in the benchmark workloads and prints the
+#fusions grin.fusion.FUSIONS should hold. Run it from the new-lang
+#directory with "python benchmarks/ngrams.py"
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grin
+import grin.fusion
+import workloads
+
+DEFAULT_SCALE = 0.05
+
+def main() -> int:
+    """Parses the command line, measures the histogram of the chosen
+       workloads and prints its most frequent sequences and the fusions
+       chosen from it"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type = float, default = DEFAULT_SCALE,
+                        help = 'multiplies the size of generated workloads')
+    parser.add_argument('--only', nargs = '+', default = None, help = 'names of the workloads to run')
+    parser.add_argument('--top', type = int, default = 20, help = 'number of sequences to list')
+    parser.add_argument('--limit', type = int, default = grin.fusion.MAX_FUSIONS,
+                        help = 'most fusions to choose')
+    parser.add_argument('--minimum', type = float, default = grin.fusion.MIN_SHARE,
+                        help = 'least share of statements a chosen fusion begins')
+    args = parser.parse_args()
+
+    names = args.only if args.only is not None else list(workloads.WORKLOADS)
+    runs = []
+    for name in names:
+        lines, entries = workloads.WORKLOADS[name](args.scale)
+        runs.append((grin.Program(lines), entries))
+    shares = grin.fusion.histogram(runs)
+
+    print(f'{"SHARE":>7}  SEQUENCE')
+    for sequence in sorted(shares, key = lambda sequence: -shares[sequence])[:args.top]:
+        print(f'{shares[sequence]:>7.2%}  {" ; ".join(sequence)}')
+    print()
+    print('FUSIONS = (')
+    for sequence in grin.fusion.choose(shares, args.limit, args.minimum):
+        print(f'    {sequence!r},')
+    print(')')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
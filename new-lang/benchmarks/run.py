@@ -0,0 +1,101 @@
+#run.py
+#contains the benchmark runner, which times every workload, reports the
+#median and percentiles of its timings and its peak memory, and compares the
+#medians against the stored baseline.json beside it. Run it from the new-lang
+#directory with "python benchmarks/run.py", and refresh the baseline with
+#"python benchmarks/run.py --save benchmarks/baseline.json"
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grin
+import workloads
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def run_workload(lines: list[str], entries: list[str]) -> None:
+    """Parses, links and executes one workload, checking that it halts"""
+    outcome = grin.run_lines(lines, entries)
+    if outcome['status'] != 'halted':
+        raise RuntimeError(f'workload finished as {outcome["status"]}: {outcome["output"][-1:]}')
+
+def parse_workload(lines: list[str], entries: list[str]) -> None:
+    """Parses and links one workload without executing it"""
+    grin.Program(lines)
+
+def measure(run, lines: list[str], entries: list[str], repeat: int) -> dict:
+    """Times repeat runs of a workload, then measures its peak memory in
+       one more run under tracemalloc, which would distort the timings"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(lines, entries)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        run(lines, entries)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    percentiles = statistics.quantiles(timings, n = 100, method = 'inclusive') if repeat > 1 else timings * 99
+    return {'median': statistics.median(timings), 'p90': percentiles[89], 'p99': percentiles[98],
+            'min': min(timings), 'repeat': repeat, 'peak_kib': peak / 1024}
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns the names of the workloads whose median is slower than the
+       baseline's by more than the threshold fraction"""
+    return [name for name, result in results.items()
+            if name in baseline and result['median'] > baseline[name]['median'] * (1 + threshold)]
+
+def main() -> int:
+    """Parses the command line, runs the chosen workloads and prints a
+       table of results. Returns 1 if any workload regressed"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type = int, default = 5, help = 'timed runs of each workload')
+    parser.add_argument('--scale', type = float, default = 1.0, help = 'multiplies the size of generated workloads')
+    parser.add_argument('--only', nargs = '+', default = None, help = 'names of the workloads to run')
+    parser.add_argument('--baseline', default = DEFAULT_BASELINE,
+                        help = 'JSON results to compare against (default: benchmarks/baseline.json), '
+                               'or an empty string to compare against none')
+    parser.add_argument('--threshold', type = float, default = DEFAULT_THRESHOLD,
+                        help = 'fraction by which a median may exceed the baseline')
+    parser.add_argument('--save', default = None, help = 'write the results as JSON to this file')
+    args = parser.parse_args()
+
+    chosen = {name: (run_workload, workload) for name, workload in workloads.WORKLOADS.items()}
+    chosen.update({name: (parse_workload, workload) for name, workload in workloads.PARSE_ONLY.items()})
+    if args.only is not None:
+        chosen = {name: chosen[name] for name in args.only}
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results = {}
+    print(f'{"WORKLOAD":<22} {"MEDIAN (ms)":>12} {"P90 (ms)":>10} {"P99 (ms)":>10} {"PEAK (KiB)":>11}  BASELINE')
+    for name, (run, workload) in chosen.items():
+        lines, entries = workload(args.scale)
+        result = results[name] = measure(run, lines, entries, args.repeat)
+        change = ''
+        if name in baseline:
+            change = f'{result["median"] / baseline[name]["median"] - 1:+.1%}'
+        print(f'{name:<22} {result["median"] * 1000:>12.2f} {result["p90"] * 1000:>10.2f} '
+              f'{result["p99"] * 1000:>10.2f} {result["peak_kib"]:>11.0f}  {change}', flush = True)
+
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent = 2)
+    regressed = compare(results, baseline, args.threshold)
+    if regressed:
+        print(f'regressed by more than {args.threshold:.0%}: {", ".join(regressed)}', file = sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
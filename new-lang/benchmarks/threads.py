@@ -0,0 +1,53 @@
+#threads.py
+#contains a benchmark that runs many grin programs at once on a thread pool,
+#each in its own Context, and reports how throughput scales with threads.
+#Run it from the new-lang directory with "python benchmarks/threads.py"
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grin
+
+PROGRAM = ['INNUM N', 'LET T 0', 'GOTO "LOOP"',
+           'LOOP: ADD T N', 'SUB N 1', 'GOTO "LOOP" IF N > 0', 'PRINT T']
+
+def run_once(program: grin.Program, n: int) -> str:
+    """Runs the program once in a fresh Context and returns its output"""
+    output = io.StringIO()
+    grin.Context(program, io.StringIO(f'{n}\n'), output).run()
+    return output.getvalue()
+
+def measure(program: grin.Program, threads: int, runs: int, n: int) -> float:
+    """Returns the seconds taken to finish all runs on the given threads"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = threads) as executor:
+        outputs = list(executor.map(lambda _: run_once(program, n), range(runs)))
+    seconds = time.perf_counter() - start
+    expected = f'{n * (n + 1) // 2}\n'
+    if any(output != expected for output in outputs):
+        raise RuntimeError('a run produced the wrong output')
+    return seconds
+
+def main() -> None:
+    """Parses the command line and prints one row per thread count"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type = int, default = 64, help = 'programs run per measurement')
+    parser.add_argument('--iterations', type = int, default = 5000, help = 'loop iterations per run')
+    parser.add_argument('--threads', type = int, nargs = '+', default = [1, 2, 4, 8])
+    args = parser.parse_args()
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'Python {sys.version.split()[0]}, GIL {"enabled" if gil else "disabled"}')
+    program = grin.Program(PROGRAM)
+    baseline = None
+    for threads in args.threads:
+        seconds = measure(program, threads, args.runs, args.iterations)
+        baseline = baseline or seconds
+        print(f'{threads:3} threads: {args.runs / seconds:9.1f} runs/s  '
+              f'speedup {baseline / seconds:5.2f}x')
+
+if __name__ == '__main__':
+    main()
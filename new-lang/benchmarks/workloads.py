@@ -0,0 +1,91 @@
+#workloads.py
+#contains the benchmark workloads, each of which builds the lines of a grin
+#program and its input entries for a given scale
+import os
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+
+def counted_loop(scale: float) -> tuple[list[str], list[str]]:
+    """A tight loop that counts and accumulates"""
+    n = int(200000 * scale)
+    return ['LET I 0', 'LET S 0', 'GOTO "LOOP"', 'LOOP: ADD I 1', 'ADD S I',
+            f'GOTO "LOOP" IF I < {n}', 'PRINT S'], []
+
+def gosub_chain(scale: float) -> tuple[list[str], list[str]]:
+    """Repeated calls through a deep chain of GOSUBs"""
+    depth = 200
+    n = int(500 * scale)
+    lines = ['LET I 0', 'GOTO "LOOP"', 'LOOP: GOSUB "F0"', 'ADD I 1',
+             f'GOTO "LOOP" IF I < {n}', 'PRINT X', 'END']
+    for level in range(depth):
+        lines.extend([f'F{level}: GOSUB "F{level + 1}"', 'RETURN'])
+    lines.extend([f'F{depth}: ADD X 1', 'RETURN'])
+    return lines, []
+
+def label_dispatch(scale: float) -> tuple[list[str], list[str]]:
+    """A loop that dispatches to one of many labeled handlers"""
+    handlers = 64
+    n = int(5000 * scale)
+    lines = ['LET I 0', 'GOTO "LOOP"', 'LOOP: LET Q I', f'DIV Q {handlers}', f'MULT Q {handlers}',
+             'LET M I', 'SUB M Q']
+    lines.extend(f'GOSUB "H{handler}" IF M = {handler}' for handler in range(handlers))
+    lines.extend(['ADD I 1', f'GOTO "LOOP" IF I < {n}', 'PRINT T', 'END'])
+    for handler in range(handlers):
+        lines.extend([f'H{handler}: ADD T {handler}', 'RETURN'])
+    return lines, []
+
+def string_concatenation(scale: float) -> tuple[list[str], list[str]]:
+    """A loop that grows a string"""
+    n = int(50000 * scale)
+    return ['LET S ""', 'LET I 0', 'GOTO "LOOP"', 'LOOP: ADD S "abc"', 'ADD I 1',
+            f'GOTO "LOOP" IF I < {n}', 'PRINT I'], []
+
+def print_volume(scale: float) -> tuple[list[str], list[str]]:
+    """A loop that prints on every iteration"""
+    n = int(100000 * scale)
+    return ['LET I 0', 'GOTO "LOOP"', 'LOOP: PRINT I', 'ADD I 1', f'GOTO "LOOP" IF I < {n}'], []
+
+def input_heavy(scale: float) -> tuple[list[str], list[str]]:
+    """A loop that reads and sums an entry on every iteration"""
+    n = int(100000 * scale)
+    return (['LET I 0', 'GOTO "LOOP"', 'LOOP: INNUM A', 'ADD S A', 'ADD I 1',
+             f'GOTO "LOOP" IF I < {n}', 'PRINT S'], [str(i % 997) for i in range(n)])
+
+def parse_only(scale: float) -> tuple[list[str], list[str]]:
+    """A long straight-line program of mixed statements, which is parsed
+       and linked but not executed"""
+    pattern = ['LET A{0} {0}', 'ADD A{0} 2.5', 'L{0}: PRINT "line {0}"', 'GOTO "L{0}" IF A{0} < 0',
+               'INSTR B{0}', 'GOSUB 2', 'MULT C 3', 'RETURN']
+    n = int(1000000 * scale)
+    return [pattern[i % len(pattern)].format(i) for i in range(n)], []
+
+def hand_written(name: str):
+    """Returns a workload that reads a program from the programs directory
+       and, if there is one, its input from the .in file of the same name.
+       Hand-written programs do not scale"""
+    def workload(scale: float) -> tuple[list[str], list[str]]:
+        path = os.path.join(PROGRAMS, name)
+        with open(path + '.grin') as file:
+            lines = file.read().splitlines()
+        entries = []
+        if os.path.exists(path + '.in'):
+            with open(path + '.in') as file:
+                entries = file.read().splitlines()
+        return lines, entries
+    workload.__doc__ = f'The hand-written program {name}.grin'
+    return workload
+
+WORKLOADS = {
+    'counted_loop': counted_loop,
+    'gosub_chain': gosub_chain,
+    'label_dispatch': label_dispatch,
+    'string_concatenation': string_concatenation,
+    'print_volume': print_volume,
+    'input_heavy': input_heavy,
+    'primes': hand_written('primes'),
+    'fibonacci': hand_written('fibonacci')
+}
+
+PARSE_ONLY = {
+    'parse_only': parse_only
+}
@@ -22,3 +22,24 @@ from grin.state import *
 from grin.helper import *
 from grin.go import *
 
+from grin.program import *
+from grin.machine import *
+from grin.scheduler import *
+from grin.aio import *
+from grin.batch import *
+from grin.daemon import *
+from grin.forkserver import *
+from grin.image import *
+from grin.vector import *
+from grin.cache import *
+from grin.context import *
+from grin.profile import *
+from grin.sampling import *
+from grin.trace import *
+from grin.metrics import *
+from grin.gen import *
+from grin.differential import *
+from grin.cfg import *
+from grin.optimize import *
+from grin.fusion import *
+from grin.loops import *
@@ -0,0 +1,169 @@
+#__main__.py
+#contains the command line tools run by "python -m grin"
+import argparse
+import asyncio
+import grin
+import json
+import sys
+
+def batch(args: argparse.Namespace) -> int:
+    """Runs the programs of a directory or manifest and writes a report"""
+    jobs = grin.find_jobs(args.path)
+    if args.fork and args.cache is not None:
+        print('--cache cannot be combined with --fork', file = sys.stderr)
+        return 2
+    if args.fork:
+        outcomes = grin.run_batch_forked(jobs, args.workers, args.timeout)
+    else:
+        outcomes = grin.run_batch(jobs, args.workers, args.chunksize, args.timeout, args.cache)
+    report = grin.batch.report(outcomes)
+    if args.report is None:
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    else:
+        with open(args.report, 'w') as file:
+            json.dump(report, file, indent = 2)
+    print(f'{report["jobs"]} jobs: {report["statuses"]}', file = sys.stderr)
+    return 0 if all(outcome['exit'] == grin.batch.EXIT_HALTED for outcome in outcomes) else 1
+
+def daemon(args: argparse.Namespace) -> int:
+    """Runs the interpreter daemon until interrupted"""
+    try:
+        daemon = grin.Daemon(args.cache_size, args.timeout)
+        asyncio.run(daemon.serve(args.socket or grin.daemon.default_socket_path()))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def client(args: argparse.Namespace) -> int:
+    """Runs the program on standard input on the daemon"""
+    return grin.client(args.socket or grin.daemon.default_socket_path())
+
+def gen(args: argparse.Namespace) -> int:
+    """Writes a generated program, and the input it reads if asked to. On
+       standard output the program ends with the '.' line that project3.py
+       and the client read up to; a .grin file is written without it"""
+    lines = grin.generate(args.lines, args.labels, args.loop_depth, args.iterations, args.gosub_depth,
+                          args.fan_out, args.variables, args.floats, args.strings, args.computed,
+                          args.inputs, args.seed)
+    if args.output is None:
+        sys.stdout.write(''.join(line + '\n' for line in lines) + '.\n')
+    else:
+        with open(args.output, 'w') as file:
+            file.write(''.join(line + '\n' for line in lines))
+    if args.input is not None:
+        with open(args.input, 'w') as file:
+            file.write(''.join(entry + '\n' for entry in grin.generate_input(lines, args.seed)))
+    return 0
+
+def diff(args: argparse.Namespace) -> int:
+    """Compares the engines against grin.State on random programs"""
+    engines = grin.differential.available_engines()
+    if args.engines is not None:
+        unknown = set(args.engines.split(',')) - set(engines)
+        if unknown:
+            print(f'unknown engines: {", ".join(sorted(unknown))}', file = sys.stderr)
+            return 2
+        engines = {name: engines[name] for name in args.engines.split(',')}
+    report = grin.check(args.cases, args.seed, engines)
+    print(f'{report["compared"]} cases compared, {report["skipped"]} skipped '
+          f'({", ".join(engines)})', file = sys.stderr)
+    if report['divergence'] is None:
+        return 0
+    print(report['divergence'].describe())
+    return 1
+
+def cfg(args: argparse.Namespace) -> int:
+    """Writes the control-flow graph of a program in the DOT language"""
+    try:
+        program = grin.Program(grin.batch.read_lines(args.program))
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        print(grin.parse_error_message(e), file = sys.stderr)
+        return 1
+    sys.stdout.write(grin.ControlFlowGraph(program).to_dot())
+    return 0
+
+def main(argv: list[str] = None) -> int:
+    """Parses the command line and runs the chosen tool"""
+    parser = argparse.ArgumentParser(prog = 'python -m grin')
+    tools = parser.add_subparsers(dest = 'tool', required = True)
+
+    batch_parser = tools.add_parser('batch', help = 'run many programs across worker processes')
+    batch_parser.add_argument('path', help = 'directory of .grin programs, or a manifest file')
+    batch_parser.add_argument('-j', '--workers', type = int, default = None,
+                              help = 'number of worker processes (0 runs in this process)')
+    batch_parser.add_argument('--chunksize', type = int, default = 1,
+                              help = 'jobs handed to a worker at a time')
+    batch_parser.add_argument('--timeout', type = float, default = None,
+                              help = 'seconds each program may run')
+    batch_parser.add_argument('-o', '--report', default = None,
+                              help = 'write the JSON report here instead of standard output')
+    batch_parser.add_argument('--fork', action = 'store_true',
+                              help = 'link each program once and fork workers that share it')
+    batch_parser.add_argument('--cache', default = None,
+                              help = 'directory of outcomes reused when a program and input repeat')
+    batch_parser.set_defaults(run = batch)
+
+    daemon_parser = tools.add_parser('daemon', help = 'serve run requests on a Unix domain socket')
+    daemon_parser.add_argument('--socket', default = None,
+                               help = 'path of the socket (default: $GRIN_SOCKET)')
+    daemon_parser.add_argument('--cache-size', type = int, default = grin.daemon.DEFAULT_CACHE_SIZE,
+                               help = 'number of linked programs kept warm')
+    daemon_parser.add_argument('--timeout', type = float, default = grin.daemon.DEFAULT_TIMEOUT,
+                               help = 'seconds each run may take')
+    daemon_parser.set_defaults(run = daemon)
+
+    client_parser = tools.add_parser('client', help = 'run the program on standard input on the daemon')
+    client_parser.add_argument('--socket', default = None,
+                               help = 'path of the socket (default: $GRIN_SOCKET)')
+    client_parser.set_defaults(run = client)
+
+    gen_parser = tools.add_parser('gen', help = 'write a synthetic program for scale and stress testing')
+    gen_parser.add_argument('-n', '--lines', type = int, default = 100,
+                            help = 'about how many lines the program has')
+    gen_parser.add_argument('--labels', type = float, default = 0.1,
+                            help = 'share of statements given a label of their own')
+    gen_parser.add_argument('--loop-depth', type = int, default = 2,
+                            help = 'deepest nesting of GOTO-IF loops')
+    gen_parser.add_argument('--iterations', type = int, default = 3,
+                            help = 'times each loop runs')
+    gen_parser.add_argument('--gosub-depth', type = int, default = 2,
+                            help = 'levels of subroutines calling subroutines')
+    gen_parser.add_argument('--fan-out', type = int, default = 2,
+                            help = 'subroutines each subroutine calls')
+    gen_parser.add_argument('--variables', type = int, default = 8,
+                            help = 'number of variables')
+    gen_parser.add_argument('--floats', type = float, default = 0.3,
+                            help = 'share of numeric literals that are floats')
+    gen_parser.add_argument('--strings', type = float, default = 0.25,
+                            help = 'share of variables that hold strings')
+    gen_parser.add_argument('--computed', type = float, default = 0.1,
+                            help = 'share of jumps whose target is held in an identifier')
+    gen_parser.add_argument('--inputs', type = float, default = 0.0,
+                            help = 'share of statements that read input')
+    gen_parser.add_argument('--seed', type = int, default = grin.gen.DEFAULT_SEED,
+                            help = 'seed of the random choices')
+    gen_parser.add_argument('-o', '--output', default = None,
+                            help = 'write the program here instead of standard output')
+    gen_parser.add_argument('--input', default = None,
+                            help = 'also write the input the program reads to this file')
+    gen_parser.set_defaults(run = gen)
+
+    diff_parser = tools.add_parser('diff', help = 'compare every engine against grin.State on random programs')
+    diff_parser.add_argument('-n', '--cases', type = int, default = grin.differential.DEFAULT_CASES,
+                             help = 'number of random programs to run')
+    diff_parser.add_argument('--seed', type = int, default = grin.differential.DEFAULT_SEED,
+                             help = 'seed of the first program')
+    diff_parser.add_argument('--engines', default = None,
+                             help = 'comma-separated engines to compare (default: all available)')
+    diff_parser.set_defaults(run = diff)
+
+    cfg_parser = tools.add_parser('cfg', help = 'write the control-flow graph of a program as DOT')
+    cfg_parser.add_argument('program', help = 'path of a .grin program')
+    cfg_parser.set_defaults(run = cfg)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
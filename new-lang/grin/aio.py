@@ -0,0 +1,80 @@
+#aio.py
+#contains an asyncio runtime for grin programs, in which input statements
+#await an async source and PRINT statements await an async sink
+import asyncio
+import grin
+from typing import Awaitable, Callable
+
+async def run_async(program: grin.Program, read: Callable[[], Awaitable[str]],
+                    write: Callable[[str], Awaitable[None]], quantum: int = 1000) -> grin.Status:
+    """Executes a program, awaiting read() for each INNUM or INSTR entry
+       and write() for each printed line, including a GrinError message.
+       Control goes back to the event loop at least every quantum
+       statements. Returns HALTED or ERROR"""
+    machine = grin.Machine(program)
+    turn = 0
+    while True:
+        status = machine.run(quantum - (machine.count() - turn))
+        if status == grin.Status.OUTPUT:
+            await write(machine.output())
+        elif status == grin.Status.INPUT:
+            machine.provide(await read())
+        elif status != grin.Status.PAUSED:
+            if status == grin.Status.ERROR:
+                await write(machine.error())
+            return status
+        # Programs that print or read in a loop never pause, so statements
+        # are counted across every return, not only on Status.PAUSED
+        if machine.count() - turn >= quantum:
+            await asyncio.sleep(0)
+            turn = machine.count()
+
+async def read_program(reader: asyncio.StreamReader) -> list[str]:
+    """Reads lines of a program until the line holding only '.', as
+       project3.read_input() does. Raises EOFError if the stream ends first"""
+    lines = []
+    while True:
+        line = await read_line(reader)
+        if line.strip() == '.':
+            return lines
+        lines.append(line)
+
+async def read_line(reader: asyncio.StreamReader) -> str:
+    """Reads one line without its line ending. Raises EOFError at the end
+       of the stream, as input() does"""
+    line = await reader.readline()
+    if not line:
+        raise EOFError('stream ended')
+    return line.decode().rstrip('\r\n')
+
+async def handle_session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serves one interactive session: reads a program terminated by '.',
+       then runs it, reading its entries from and printing to the same
+       connection"""
+    async def write(text: str) -> None:
+        writer.write(text.encode() + b'\n')
+        await writer.drain()
+
+    try:
+        lines = await read_program(reader)
+        try:
+            program = grin.Program(lines)
+        except (grin.GrinParseError, grin.GrinLexError) as e:
+            await write(grin.parse_error_message(e))
+        else:
+            await run_async(program, lambda: read_line(reader), write)
+    except (EOFError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve_unix(path: str) -> asyncio.AbstractServer:
+    """Starts a server on a Unix domain socket that runs one interactive
+       session per connection, all on the running event loop"""
+    return await asyncio.start_unix_server(handle_session, path)
+
+__all__ = [run_async.__name__, handle_session.__name__, serve_unix.__name__]
@@ -0,0 +1,182 @@
+#batch.py
+#contains the batch runner, which executes many grin programs across a pool
+#of worker processes and collects their outputs into a report
+import functools
+import grin
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+EXIT_HALTED = 0
+EXIT_ERROR = 1
+EXIT_NO_INPUT = 2
+EXIT_TIMEOUT = 3
+EXIT_CRASHED = 4
+
+_EXIT_CODES = {
+    'halted': EXIT_HALTED,
+    'error': EXIT_ERROR,
+    'no input': EXIT_NO_INPUT,
+    'timeout': EXIT_TIMEOUT,
+    'crashed': EXIT_CRASHED
+}
+
+TIMEOUT_CHECK_INTERVAL = 10000
+
+class Job:
+    def __init__(self, program: str, entries: str = None) -> None:
+        """Initiates the Job object from the path of a .grin program and the
+           path of a file holding one input entry per line, if any"""
+        self._program = program
+        self._entries = entries
+
+    def program(self) -> str:
+        """Returns the path of the program"""
+        return self._program
+
+    def entries(self) -> str | None:
+        """Returns the path of the input file, or None"""
+        return self._entries
+
+def read_lines(path: str) -> list[str]:
+    """Returns the lines of a text file without their line endings"""
+    with open(path) as file:
+        return file.read().splitlines()
+
+def find_jobs(path: str) -> list[Job]:
+    """Returns the jobs described by a directory or a manifest file. In a
+       directory, every .grin file is a job, and NAME.in holds the input of
+       NAME.grin if it exists. Each line of a manifest names a program and,
+       optionally, an input file, relative to the manifest's directory;
+       blank lines and lines starting with '#' are skipped"""
+    jobs = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.grin'):
+                entries = os.path.join(path, name[:-len('.grin')] + '.in')
+                jobs.append(Job(os.path.join(path, name), entries if os.path.exists(entries) else None))
+    else:
+        base = os.path.dirname(path)
+        for line in read_lines(path):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            entries = os.path.join(base, fields[1]) if len(fields) > 1 else None
+            jobs.append(Job(os.path.join(base, fields[0]), entries))
+    return jobs
+
+def execute(program: grin.Program, entries: Iterable[str], timeout: float = None) -> dict:
+    """Executes a program with fresh state, reading its input from entries.
+       Returns a dictionary holding its status, exit code, printed lines and
+       the number of statements executed"""
+    return complete(grin.Machine(program), entries, [], timeout)
+
+def complete(machine: grin.Machine, entries: Iterable[str], output: list[str],
+             timeout: float = None) -> dict:
+    """Runs a machine until it finishes, reading its input from entries and
+       adding its printed lines to output. Returns the dictionary that
+       execute() describes"""
+    entries = iter(entries)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = machine.run(None if deadline is None else TIMEOUT_CHECK_INTERVAL)
+        if status == grin.Status.OUTPUT:
+            output.append(machine.output())
+        elif status == grin.Status.INPUT:
+            entry = next(entries, None)
+            if entry is None:
+                return result('no input', output, machine.count())
+            machine.provide(entry)
+        elif status == grin.Status.ERROR:
+            output.append(machine.error())
+            return result('error', output, machine.count())
+        elif status == grin.Status.HALTED:
+            return result('halted', output, machine.count())
+        # Programs that print or read in a loop never pause, so the deadline
+        # is checked after every return, not only on Status.PAUSED
+        if deadline is not None and time.monotonic() >= deadline:
+            return result('timeout', output, machine.count())
+
+def result(status: str, output: list[str], statements: int) -> dict:
+    """Builds the dictionary describing the outcome of one run"""
+    return {'status': status, 'exit': _EXIT_CODES[status], 'output': output,
+            'statements': statements}
+
+def run_lines(lines: list[str], entries: Iterable[str], timeout: float = None) -> dict:
+    """Parses and executes a program given as lines of text"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        return result('error', [grin.parse_error_message(e)], 0)
+    return execute(program, entries, timeout)
+
+def run_job(job: Job, timeout: float = None, cache: str = None) -> dict:
+    """Runs one job, returning the dictionary describing its outcome along
+       with the job's paths and the time it took. If cache names a
+       directory, a job whose program and input were run before takes its
+       outcome from there instead of executing"""
+    start = time.perf_counter()
+    try:
+        entries = [] if job.entries() is None else read_lines(job.entries())
+        if cache is None:
+            outcome = run_lines(read_lines(job.program()), entries, timeout)
+        else:
+            outcome = grin.run_cached(grin.open_cache(cache), read_lines(job.program()),
+                                      entries, timeout)
+    except Exception as e:
+        outcome = result('crashed', [f'{type(e).__name__}: {e}'], 0)
+    outcome['program'] = job.program()
+    outcome['input'] = job.entries()
+    outcome['seconds'] = time.perf_counter() - start
+    return outcome
+
+def run_batch(jobs: list[Job], workers: int = None, chunksize: int = 1,
+              timeout: float = None, cache: str = None) -> list[dict]:
+    """Runs every job across a pool of worker processes, returning their
+       outcomes in the order of the jobs. A workers value of 0 runs the
+       jobs one after another in this process instead. The timeout is in
+       seconds per job, and cache names the directory of a ResultCache"""
+    run = functools.partial(run_job, timeout = timeout, cache = cache)
+    if workers == 0:
+        return [run(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        return list(executor.map(run, jobs, chunksize = chunksize))
+
+_installed = None
+
+def _install(program: grin.Program) -> None:
+    """Gives a pool worker its copy of the program once, when it starts"""
+    global _installed
+    _installed = program
+
+def _execute_installed(entries: list[str], timeout: float = None) -> dict:
+    """Executes the worker's program against one input set"""
+    return execute(_installed, entries, timeout)
+
+def run_many(program: grin.Program | list[str], inputs: Iterable[list[str]], workers: int = 0,
+             chunksize: int = 64, timeout: float = None) -> list[dict]:
+    """Executes one program against each of many input sets, with fresh
+       variables for each, returning the outcomes in the order of inputs.
+       The program is parsed and linked once. With the default of 0 workers
+       everything runs in this process; otherwise the input sets are spread
+       across that many worker processes (None meaning one per core), each
+       of which receives the linked program once"""
+    if not isinstance(program, grin.Program):
+        program = grin.Program(program)
+    if workers == 0:
+        return [execute(program, entries, timeout) for entries in inputs]
+    with ProcessPoolExecutor(max_workers = workers, initializer = _install,
+                             initargs = (program,)) as executor:
+        run = functools.partial(_execute_installed, timeout = timeout)
+        return list(executor.map(run, inputs, chunksize = chunksize))
+
+def report(outcomes: list[dict]) -> dict:
+    """Summarizes the outcomes of a batch"""
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome['status']] = counts.get(outcome['status'], 0) + 1
+    return {'jobs': len(outcomes), 'statuses': counts, 'results': outcomes}
+
+__all__ = [Job.__name__, find_jobs.__name__, execute.__name__, run_lines.__name__,
+           run_job.__name__, run_batch.__name__, run_many.__name__]
@@ -0,0 +1,198 @@
+#cache.py
+#contains ResultCache, which remembers the outcome of running a program
+#against an input so that exact repeats can skip execution
+import collections
+import grin
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Iterable
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_MAX_OUTPUT = 1 << 20
+CACHEABLE_STATUSES = frozenset(['halted'])
+EVICTION_SLACK = 8
+
+_version = None
+
+def interpreter_version() -> str:
+    """Returns a fingerprint of the Python version and the source of the
+       grin package, so that changing either invalidates cached outcomes"""
+    global _version
+    if _version is None:
+        digest = hashlib.sha256(sys.version.encode())
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                with open(os.path.join(directory, name), 'rb') as file:
+                    digest.update(name.encode() + b'\0' + file.read())
+        _version = digest.hexdigest()
+    return _version
+
+def run_key(lines: list[str], entries: list[str]) -> str:
+    """Returns the cache key of running the given program lines against
+       the given input entries"""
+    digest = hashlib.sha256(interpreter_version().encode())
+    digest.update(hashlib.sha256(json.dumps(list(lines)).encode()).digest())
+    digest.update(hashlib.sha256(json.dumps(list(entries)).encode()).digest())
+    return digest.hexdigest()
+
+class ResultCache:
+    def __init__(self, directory: str = None, capacity: int = DEFAULT_CAPACITY,
+                 max_output: int = DEFAULT_MAX_OUTPUT) -> None:
+        """Initiates the ResultCache object, which keeps at most capacity
+           outcomes in memory and, if a directory is given, at most capacity
+           outcomes on disk there, evicting the least recently used. The disk
+           store may grow by a fraction 1 / EVICTION_SLACK past capacity
+           before it is trimmed. Outcomes whose output exceeds max_output
+           characters are not kept"""
+        self._directory = directory
+        self._capacity = capacity
+        self._max_output = max_output
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stored = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+            self.check_version()
+            self._stored = len(self.stored())
+
+    def check_version(self) -> None:
+        """Empties the disk store if it was written by another version of
+           the interpreter"""
+        stamp = os.path.join(self._directory, 'VERSION')
+        try:
+            with open(stamp) as file:
+                current = file.read() == interpreter_version()
+        except FileNotFoundError:
+            current = False
+        if not current:
+            for path in self.stored():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with open(stamp, 'w') as file:
+                file.write(interpreter_version())
+
+    def path(self, key: str) -> str:
+        """Returns the path of an outcome in the disk store"""
+        return os.path.join(self._directory, key + '.json')
+
+    def get(self, key: str) -> dict | None:
+        """Returns the cached outcome for a key, or None"""
+        with self._lock:
+            return self.lookup(key)
+
+    def lookup(self, key: str) -> dict | None:
+        """Looks up a key while holding the lock"""
+        outcome = self._memory.get(key)
+        if outcome is not None:
+            self._memory.move_to_end(key)
+        elif self._directory is not None:
+            try:
+                with open(self.path(key)) as file:
+                    outcome = json.load(file)
+                os.utime(self.path(key))
+            except (OSError, ValueError):
+                outcome = None
+            if outcome is not None:
+                self.remember(key, outcome)
+        if outcome is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return dict(outcome, output = list(outcome['output']))
+
+    def put(self, key: str, outcome: dict) -> bool:
+        """Caches an outcome if its program halted normally and its output
+           is within the size limit. Returns whether it was cached"""
+        if outcome['status'] not in CACHEABLE_STATUSES:
+            return False
+        if sum(len(line) + 1 for line in outcome['output']) > self._max_output:
+            return False
+        outcome = {'status': outcome['status'], 'exit': outcome['exit'],
+                   'output': list(outcome['output']), 'statements': outcome['statements']}
+        with self._lock:
+            self.remember(key, outcome)
+            if self._directory is not None:
+                if not os.path.exists(self.path(key)):
+                    self._stored += 1
+                handle, temporary = tempfile.mkstemp(dir = self._directory, suffix = '.tmp')
+                with os.fdopen(handle, 'w') as file:
+                    json.dump(outcome, file)
+                os.replace(temporary, self.path(key))
+                if self._stored > self._capacity + self._capacity // EVICTION_SLACK:
+                    self.evict()
+        return True
+
+    def remember(self, key: str, outcome: dict) -> None:
+        """Keeps an outcome in memory, evicting the least recently used"""
+        self._memory[key] = outcome
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._capacity:
+            self._memory.popitem(last = False)
+
+    def stored(self) -> list[str]:
+        """Returns the paths of the outcomes in the disk store"""
+        return [os.path.join(self._directory, name) for name in os.listdir(self._directory)
+                if name.endswith('.json')]
+
+    def evict(self) -> None:
+        """Removes the least recently used outcomes from the disk store
+           until it holds at most capacity. Other processes sharing the
+           directory may remove files at the same time"""
+        used = []
+        for path in self.stored():
+            try:
+                used.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                pass
+        used.sort()
+        for _, path in used[:max(0, len(used) - self._capacity)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._stored = min(len(used), self._capacity)
+
+    def hits(self) -> int:
+        """Returns the number of lookups that found an outcome"""
+        return self._hits
+
+    def misses(self) -> int:
+        """Returns the number of lookups that found nothing"""
+        return self._misses
+
+_opened = {}
+_opened_lock = threading.Lock()
+
+def open_cache(directory: str) -> ResultCache:
+    """Returns this process's cache backed by the given directory, creating
+       it on first use"""
+    with _opened_lock:
+        if directory not in _opened:
+            _opened[directory] = ResultCache(directory)
+        return _opened[directory]
+
+def run_cached(cache: ResultCache, lines: list[str], entries: Iterable[str],
+               timeout: float = None) -> dict:
+    """Returns the outcome of running a program against its input from the
+       cache, executing it and caching the outcome only on a miss. Outcomes
+       taken from the cache are marked with 'cached'"""
+    entries = list(entries)
+    key = run_key(lines, entries)
+    outcome = cache.get(key)
+    if outcome is not None:
+        outcome['cached'] = True
+        return outcome
+    outcome = grin.run_lines(lines, entries, timeout)
+    cache.put(key, outcome)
+    return outcome
+
+__all__ = [ResultCache.__name__, open_cache.__name__, run_cached.__name__]
@@ -0,0 +1,416 @@
+#cfg.py
+#contains the control-flow graph of a linked grin program, which splits it
+#into basic blocks joined by the jumps between them, and the dominators,
+#loops and DOT rendering built from it
+import grin
+from enum import Enum
+from typing import NamedTuple
+
+class EdgeKind(Enum):
+    """Describes how control passes from one block to another"""
+    FALL = 1
+    JUMP = 2
+    BRANCH = 3
+    CALL = 4
+    DYNAMIC = 5
+    DYNAMIC_CALL = 6
+    SKIP = 7
+    LEAVE = 8
+
+class Edge(NamedTuple):
+    """A way control can pass from the block source to the block target"""
+    source: int
+    target: int
+    kind: EdgeKind
+
+class Block(NamedTuple):
+    """The statements from index start up to, but not including, index end,
+       which always execute one after another"""
+    index: int
+    start: int
+    end: int
+
+class Loop(NamedTuple):
+    """A natural loop: the header, which dominates every block of the loop,
+       and the blocks from which the back edges to it can be reached
+       without passing through it"""
+    header: int
+    blocks: frozenset[int]
+
+UNKNOWN = None
+
+def operand_text(operand: grin.Operand) -> str:
+    """Returns an operand as it is written in a program"""
+    if operand.is_identifier or type(operand.value) != str:
+        return str(operand.value)
+    return f'"{operand.value}"'
+
+def statement_text(statement: grin.Statement, program: grin.Program) -> str:
+    """Returns a linked statement of a program as it is written, without
+       its label. A target naming a label is shown as a string and any other
+       as an identifier, since either is looked up the same way. A jump
+       through an identifier whose destination was linked before the program
+       runs is followed by the line it lands on"""
+    kind = statement.kind
+    words = [kind.name]
+    if statement.variable is not None:
+        words.append(statement.variable)
+    if statement.value is not None:
+        words.append(operand_text(statement.value))
+    if statement.target is not None:
+        target = statement.target
+        labels = program.labels()
+        if type(target) == int:
+            words.append(str(target))
+        elif statement.destination is None or labels.get(target) == statement.destination:
+            words.append(operand_text(grin.Operand(statement.destination is None, target)))
+        else:
+            words.extend([target, landing_text(statement.destination, program)])
+    if statement.condition is not None:
+        condition = statement.condition
+        words.extend(['IF', operand_text(condition.left), _OPERATORS[condition.operator],
+                      operand_text(condition.right)])
+    return ' '.join(words)
+
+def landing_text(destination: int, program: grin.Program) -> str:
+    """Returns where a linked destination lands, as shown after a jump
+       through an identifier"""
+    statements = program.statements()
+    if destination == grin.program.OUT_OF_BOUNDS:
+        return '(= out of bounds)'
+    elif destination == len(statements):
+        return '(= end)'
+    return f'(= line {statements[destination].line})'
+
+_OPERATORS = {
+    grin.GrinTokenKind.LESS_THAN: '<',
+    grin.GrinTokenKind.LESS_THAN_OR_EQUAL: '<=',
+    grin.GrinTokenKind.GREATER_THAN: '>',
+    grin.GrinTokenKind.GREATER_THAN_OR_EQUAL: '>=',
+    grin.GrinTokenKind.EQUAL: '=',
+    grin.GrinTokenKind.NOT_EQUAL: '<>'
+}
+
+_LEAVES = {grin.GrinTokenKind.RETURN, grin.GrinTokenKind.END}
+_JUMPS = {grin.GrinTokenKind.GOTO, grin.GrinTokenKind.GOSUB}
+_MATH = {grin.GrinTokenKind.ADD, grin.GrinTokenKind.SUB, grin.GrinTokenKind.MULT,
+         grin.GrinTokenKind.DIV}
+_CALLS = {EdgeKind.CALL, EdgeKind.DYNAMIC_CALL}
+_DASHED = {EdgeKind.DYNAMIC, EdgeKind.DYNAMIC_CALL, EdgeKind.SKIP}
+
+class ControlFlowGraph:
+    def __init__(self, program: grin.Program) -> None:
+        """Initiates the ControlFlowGraph object of a linked program. Block 0
+           is an empty entry block and the last block an empty exit block,
+           which every RETURN, END and GOTO that leaves a frame reaches, as
+           does running past the last statement"""
+        self._program = program
+        self._statements = program.statements()
+        self._labels = program.labels()
+        self._writes = self.constant_writes()
+        self._prefix = self.raw_prefix()
+        self._targets = {}
+        self._unknown = set()
+        for index, statement in enumerate(self._statements):
+            if statement.kind in _JUMPS and statement.destination is None:
+                self._targets[index] = self.dynamic_targets(statement)
+        self._blocks, self._block_of = self.split()
+        self._edges = self.connect()
+        self._successors = {block.index: [] for block in self._blocks}
+        self._predecessors = {block.index: [] for block in self._blocks}
+        for edge in self._edges:
+            self._successors[edge.source].append(edge)
+            self._predecessors[edge.target].append(edge)
+        self._idoms = self.immediate_dominators()
+
+    def constant_writes(self) -> dict[str, set | None]:
+        """Returns, for each variable, the set of literal values LET gives
+           it, or UNKNOWN if anything else writes it. A variable read before
+           it is written may also hold 0"""
+        writes = {}
+        for statement in self._statements:
+            if statement.kind == grin.GrinTokenKind.LET and not statement.value.is_identifier:
+                values = writes.setdefault(statement.variable, set())
+                if values is not UNKNOWN:
+                    values.add(statement.value.value)
+            elif statement.variable is not None:
+                writes[statement.variable] = UNKNOWN
+        for statement in self._statements:
+            operands = [statement.value]
+            if statement.condition is not None:
+                operands += [statement.condition.left, statement.condition.right]
+            if statement.kind in _MATH:
+                # ADD, SUB, MULT and DIV read their variable, giving it 0
+                operands.append(grin.Operand(True, statement.variable))
+            for operand in operands:
+                if operand is not None and operand.is_identifier:
+                    values = writes.setdefault(operand.value, set())
+                    if values is not UNKNOWN:
+                        values.add(0)
+        return writes
+
+    def raw_prefix(self) -> int:
+        """Returns the number of statements at the start of the program that
+           the main program may reach before taking its first jump, and in
+           which it steps over labeled statements"""
+        for index, statement in enumerate(self._statements):
+            if statement.label is not None:
+                continue
+            if statement.kind in _LEAVES or \
+               (statement.kind == grin.GrinTokenKind.GOTO and statement.condition is None):
+                return index + 1
+        return len(self._statements)
+
+    def dynamic_targets(self, statement: grin.Statement) -> set[int | None] | None:
+        """Returns the indexes a jump whose target names an identifier can
+           land on, with None standing for a target that does not resolve,
+           or UNKNOWN if the identifier may hold anything. An index equal to
+           the number of statements leaves the frame, and OUT_OF_BOUNDS fails"""
+        values = self._writes.get(statement.target, set())
+        if values is UNKNOWN:
+            return UNKNOWN
+        size = len(self._statements)
+        targets = {None}
+        for value in values:
+            if type(value) == int:
+                destination = statement.line + value - 1
+                targets.add(grin.program.OUT_OF_BOUNDS if destination > size or destination < 0
+                            else destination)
+            elif value in self._labels:
+                targets.add(self._labels[value])
+        return targets
+
+    def split(self) -> tuple[list[Block], list[int]]:
+        """Splits the statements into blocks, starting one at each label,
+           each jump target, each statement after a jump, RETURN or END, and
+           each statement after a labeled one the main program may step over"""
+        size = len(self._statements)
+        leaders = {0, size}
+        for index, statement in enumerate(self._statements):
+            if statement.label is not None:
+                leaders.add(index)
+                if index < self._prefix:
+                    leaders.add(index + 1)
+            if statement.kind in _JUMPS or statement.kind in _LEAVES:
+                leaders.add(index + 1)
+            if statement.destination is not None and statement.destination >= 0:
+                leaders.add(statement.destination)
+        for targets in self._targets.values():
+            if targets is not UNKNOWN:
+                leaders.update(target for target in targets if target is not None and target >= 0)
+        starts = sorted(leader for leader in leaders if leader <= size)
+        blocks = [Block(0, 0, 0)]
+        block_of = [0] * (size + 1)
+        for start, end in zip(starts, starts[1:]):
+            for index in range(start, end):
+                block_of[index] = len(blocks)
+            blocks.append(Block(len(blocks), start, end))
+        blocks.append(Block(len(blocks), size, size))
+        block_of[size] = len(blocks) - 1
+        return blocks, block_of
+
+    def landing(self, destination: int) -> int:
+        """Returns the block a jump to a statement index lands in"""
+        if destination == grin.program.OUT_OF_BOUNDS:
+            return self.exit()
+        return self._block_of[destination]
+
+    def connect(self) -> list[Edge]:
+        """Returns the edges between the blocks"""
+        edges = []
+        def falls(source: int, index: int) -> None:
+            # Falling off the end leaves the frame. Falling into a labeled
+            # statement the main program may step over also skips past it,
+            # and past any labeled ones following
+            kind = EdgeKind.LEAVE if index == len(self._statements) else EdgeKind.FALL
+            edges.append(Edge(source, self._block_of[index], kind))
+            while index < self._prefix and self._statements[index].label is not None:
+                index += 1
+                edges.append(Edge(source, self._block_of[index], EdgeKind.SKIP))
+        falls(0, 0)
+        for block in self._blocks[1:-1]:
+            last = self._statements[block.end - 1]
+            source = block.index
+            if last.kind in _LEAVES:
+                edges.append(Edge(source, self.exit(), EdgeKind.LEAVE))
+                continue
+            if last.kind not in _JUMPS:
+                falls(source, block.end)
+                continue
+            gosub = last.kind == grin.GrinTokenKind.GOSUB
+            if last.destination is not None:
+                kind = EdgeKind.CALL if gosub else \
+                       EdgeKind.JUMP if last.condition is None else EdgeKind.BRANCH
+                edges.append(Edge(source, self.landing(last.destination), kind))
+            else:
+                targets = self._targets[block.end - 1]
+                if targets is UNKNOWN:
+                    self._unknown.add(source)
+                    targets = {None} | set(self._labels.values())
+                kind = EdgeKind.DYNAMIC_CALL if gosub else EdgeKind.DYNAMIC
+                for target in sorted(targets, key = lambda target: -1 if target is None else target):
+                    if target is not None:
+                        edges.append(Edge(source, self.landing(target), kind))
+                    elif not gosub:
+                        # A GOTO whose target does not resolve leaves the frame
+                        edges.append(Edge(source, self.exit(), EdgeKind.LEAVE))
+            if gosub or last.condition is not None:
+                # A GOSUB returns, or moves on when its target does not
+                # resolve, and an untaken condition falls through
+                falls(source, block.end)
+        return list(dict.fromkeys(edges))
+
+    def reverse_postorder(self) -> list[int]:
+        """Returns the blocks reachable from the entry, each before the
+           blocks it reaches other than along back edges"""
+        order = []
+        seen = {0}
+        stack = [(0, iter(self._successors[0]))]
+        while stack:
+            block, edges = stack[-1]
+            edge = next(edges, None)
+            if edge is None:
+                stack.pop()
+                order.append(block)
+            elif edge.target not in seen:
+                seen.add(edge.target)
+                stack.append((edge.target, iter(self._successors[edge.target])))
+        order.reverse()
+        return order
+
+    def immediate_dominators(self) -> dict[int, int]:
+        """Returns the immediate dominator of every block reachable from the
+           entry, using the iterative algorithm of Cooper, Harvey and
+           Kennedy. The entry is its own immediate dominator"""
+        order = self.reverse_postorder()
+        position = {block: place for place, block in enumerate(order)}
+        idoms = {0: 0}
+        def intersect(first: int, second: int) -> int:
+            while first != second:
+                while position[first] > position[second]:
+                    first = idoms[first]
+                while position[second] > position[first]:
+                    second = idoms[second]
+            return first
+        changed = True
+        while changed:
+            changed = False
+            for block in order[1:]:
+                new = None
+                for edge in self._predecessors[block]:
+                    if edge.source in idoms:
+                        new = edge.source if new is None else intersect(edge.source, new)
+                if idoms.get(block) != new:
+                    idoms[block] = new
+                    changed = True
+        return idoms
+
+    def program(self) -> grin.Program:
+        """Returns the program the graph was built from"""
+        return self._program
+
+    def blocks(self) -> list[Block]:
+        """Returns the blocks, in the order of the statements they hold"""
+        return self._blocks
+
+    def block_of(self, index: int) -> Block:
+        """Returns the block holding the statement at the given index"""
+        return self._blocks[self._block_of[index]]
+
+    def entry(self) -> int:
+        """Returns the index of the empty entry block"""
+        return 0
+
+    def exit(self) -> int:
+        """Returns the index of the empty exit block"""
+        return len(self._blocks) - 1
+
+    def edges(self) -> list[Edge]:
+        """Returns every edge"""
+        return self._edges
+
+    def successors(self, block: int) -> list[Edge]:
+        """Returns the edges leaving a block"""
+        return self._successors[block]
+
+    def predecessors(self, block: int) -> list[Edge]:
+        """Returns the edges entering a block"""
+        return self._predecessors[block]
+
+    def unknown_targets(self) -> set[int]:
+        """Returns the blocks ending in a jump through an identifier that may
+           hold any value, and so may land on any statement, not only on the
+           labeled ones its DYNAMIC edges lead to"""
+        return self._unknown
+
+    def offset_jumps(self) -> set[int]:
+        """Returns the indexes of the jumps through an identifier that may
+           hold an integer. The Machine finds their destination by counting
+           lines from the jump, so statements cannot be removed from a
+           program that has any"""
+        offsets = set()
+        for index in self._targets:
+            values = self._writes.get(self._statements[index].target, set())
+            if values is UNKNOWN or any(type(value) == int for value in values):
+                offsets.add(index)
+        return offsets
+
+    def reachable(self) -> set[int]:
+        """Returns the blocks reachable from the entry"""
+        return set(self._idoms)
+
+    def idom(self, block: int) -> int | None:
+        """Returns the immediate dominator of a block, or None if the block
+           cannot be reached"""
+        return self._idoms.get(block)
+
+    def dominates(self, first: int, second: int) -> bool:
+        """Returns whether every path from the entry to second passes
+           through first"""
+        if second not in self._idoms:
+            return False
+        while second != first:
+            if second == 0:
+                return False
+            second = self._idoms[second]
+        return True
+
+    def loops(self) -> list[Loop]:
+        """Returns the natural loops, one for each block that is the target
+           of a back edge, in the order of their headers. A GOSUB back to a
+           block dominating it is recursion rather than a loop, and cycles
+           entered at more than one block have no header and are not loops"""
+        bodies = {}
+        for edge in self._edges:
+            if edge.kind not in _CALLS and self.dominates(edge.target, edge.source):
+                body = bodies.setdefault(edge.target, {edge.target})
+                stack = [edge.source]
+                while stack:
+                    block = stack.pop()
+                    if block not in body:
+                        body.add(block)
+                        stack.extend(incoming.source for incoming in self._predecessors[block])
+        return [Loop(header, frozenset(body)) for header, body in sorted(bodies.items())]
+
+    def to_dot(self) -> str:
+        """Returns the graph in the DOT language of Graphviz, with each block
+           listing its statements"""
+        lines = ['digraph grin {', '    node [shape = box, fontname = "monospace"];',
+                 '    b0 [label = "entry", shape = oval];',
+                 f'    b{self.exit()} [label = "exit", shape = oval];']
+        for block in self._blocks[1:-1]:
+            rows = []
+            for statement in self._statements[block.start:block.end]:
+                label = '' if statement.label is None else f'{statement.label}: '
+                rows.append(f'{statement.line}  {label}{statement_text(statement, self._program)}')
+            text = ''.join(row.replace('\\', '\\\\').replace('"', '\\"') + '\\l' for row in rows)
+            style = ', color = red' if block.index in self._unknown else ''
+            lines.append(f'    b{block.index} [label = "{text}"{style}];')
+        for edge in self._edges:
+            style = ', style = dashed' if edge.kind in _DASHED else ''
+            lines.append(f'    b{edge.source} -> b{edge.target} [label = "{edge.kind.name.lower()}"{style}];')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+__all__ = [ControlFlowGraph.__name__, Block.__name__, Edge.__name__, EdgeKind.__name__,
+           Loop.__name__]
@@ -0,0 +1,53 @@
+#context.py
+#contains Context, which executes a grin program with its own input and
+#output streams, so that many programs can run at once in one process
+import grin
+from typing import TextIO
+
+class Context:
+    def __init__(self, program: grin.Program, stdin: TextIO, stdout: TextIO,
+                 machine: type = None) -> None:
+        """Initiates the Context object, which owns a Machine, and with it
+           the program's variables and GOSUB stack, and the streams the
+           program reads its entries from and prints to. A subclass of
+           Machine to execute with can be given as machine"""
+        self._machine = (machine or grin.Machine)(program)
+        self._stdin = stdin
+        self._stdout = stdout
+
+    def run(self) -> int:
+        """Executes the program to completion, reading each entry as one
+           line of stdin and writing each printed line, and any GrinError
+           message, to stdout. Returns the exit code of the outcome, as the
+           batch runner reports it"""
+        machine = self._machine
+        while True:
+            status = machine.run()
+            if status == grin.Status.OUTPUT:
+                self._stdout.write(machine.output() + '\n')
+            elif status == grin.Status.INPUT:
+                entry = self._stdin.readline()
+                if not entry:
+                    return grin.batch.EXIT_NO_INPUT
+                machine.provide(entry[:-1] if entry.endswith('\n') else entry)
+            elif status == grin.Status.ERROR:
+                self._stdout.write(machine.error() + '\n')
+                return grin.batch.EXIT_ERROR
+            else:
+                return grin.batch.EXIT_HALTED
+
+    def machine(self) -> grin.Machine:
+        """Returns the machine executing the program"""
+        return self._machine
+
+def run_context(lines: list[str], stdin: TextIO, stdout: TextIO) -> int:
+    """Parses the given lines and executes the program in a new Context.
+       A program that fails to parse writes its GrinError message instead"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR
+    return Context(program, stdin, stdout).run()
+
+__all__ = [Context.__name__, run_context.__name__]
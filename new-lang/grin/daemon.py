@@ -0,0 +1,227 @@
+#daemon.py
+#contains a long-lived interpreter daemon, which keeps linked programs warm
+#and runs them for clients connecting over a Unix domain socket, and the
+#client that talks to it
+import asyncio
+import collections
+import grin
+import hashlib
+import json
+import os
+import socket
+import sys
+from typing import Awaitable, Callable, Iterator
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_TIMEOUT = 10.0
+
+def default_socket_path() -> str:
+    """Returns the socket path used when none is given: $GRIN_SOCKET, or a
+       per-user path in the temporary directory"""
+    path = os.environ.get('GRIN_SOCKET')
+    if path is None:
+        path = os.path.join('/tmp', f'grin-{os.getuid()}.sock')
+    return path
+
+def program_key(lines: list[str]) -> str:
+    """Returns the cache key of a program's source lines"""
+    return hashlib.sha256('\n'.join(lines).encode()).hexdigest()
+
+def valid_request(request: object) -> bool:
+    """Returns whether a decoded request is a JSON object whose fields have
+       the types Daemon.handle() expects"""
+    if not isinstance(request, dict):
+        return False
+    lists = [request.get('source', []), request.get('input', [])]
+    return all(isinstance(value, list) and all(isinstance(item, str) for item in value)
+               for value in lists) and isinstance(request.get('key', ''), str) and \
+           isinstance(request.get('stream', False), bool)
+
+async def limited(run: Awaitable, timeout: float | None, waited: Callable[[], float]) -> object:
+    """Awaits run and returns its result, raising asyncio.TimeoutError
+       once it has taken more than timeout seconds, not counting the
+       seconds waited() reports it has spent waiting on its client"""
+    task = asyncio.ensure_future(run)
+    if timeout is None:
+        return await task
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    try:
+        while True:
+            remaining = start + timeout + waited() - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            done, _ = await asyncio.wait({task}, timeout = remaining)
+            if done:
+                return task.result()
+    finally:
+        task.cancel()
+
+class Daemon:
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE, timeout: float = DEFAULT_TIMEOUT) -> None:
+        """Initiates the Daemon object with an empty program cache that
+           holds at most cache_size linked programs. Each run may take at
+           most timeout seconds, or as long as it needs if timeout is None"""
+        self._cache_size = cache_size
+        self._timeout = timeout
+        self._programs = collections.OrderedDict()
+
+    def program(self, request: dict) -> tuple[str, grin.Program | None, str | None]:
+        """Finds the program a request asks for, linking and caching its
+           source if it has not been seen. Returns its key, the program,
+           and a GrinError message if it failed to parse"""
+        if 'source' in request:
+            key = program_key(request['source'])
+        else:
+            key = request.get('key')
+        if key in self._programs:
+            self._programs.move_to_end(key)
+            return key, self._programs[key], None
+        if 'source' not in request:
+            return key, None, None
+        try:
+            program = grin.Program(request['source'])
+        except (grin.GrinParseError, grin.GrinLexError) as e:
+            return key, None, grin.parse_error_message(e)
+        self._programs[key] = program
+        if len(self._programs) > self._cache_size:
+            self._programs.popitem(last = False)
+        return key, program, None
+
+    def cached(self) -> list[str]:
+        """Returns the keys of the cached programs, least recently used first"""
+        return list(self._programs)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves one run request: a JSON line holding 'source' (a list of
+           lines) or 'key', and 'input' (a list of entries). Replies with one
+           JSON line per printed line, then one holding the final status. A
+           request that is not such an object gets a 'bad request' status.
+           A request with 'stream' set sends no input up front; instead each
+           entry is asked for with an 'input' line and read from the client
+           as an 'entry' line, and time spent waiting for it does not count
+           towards the timeout"""
+        async def send(message: dict) -> None:
+            writer.write(json.dumps(message).encode() + b'\n')
+            await writer.drain()
+
+        try:
+            try:
+                request = json.loads(await reader.readline())
+            except ValueError:
+                request = None
+            if not valid_request(request):
+                await send({'status': 'bad request'})
+                return
+            key, program, error = self.program(request)
+            if error is not None:
+                await send({'output': error})
+                await send({'key': key, 'status': 'error'})
+            elif program is None:
+                await send({'key': key, 'status': 'unknown key'})
+            else:
+                entries = iter(request.get('input', []))
+                waited = 0.0
+                since = None
+
+                async def read() -> str:
+                    entry = next(entries, None)
+                    if entry is None:
+                        raise EOFError('input exhausted')
+                    return entry
+
+                async def ask() -> str:
+                    nonlocal waited, since
+                    loop = asyncio.get_running_loop()
+                    since = loop.time()
+                    try:
+                        await send({'input': True})
+                        try:
+                            message = json.loads(await reader.readline())
+                        except ValueError:
+                            message = None
+                    finally:
+                        waited += loop.time() - since
+                        since = None
+                    if not isinstance(message, dict) or not isinstance(message.get('entry'), str):
+                        raise EOFError('input exhausted')
+                    return message['entry']
+
+                def waiting() -> float:
+                    if since is None:
+                        return waited
+                    return waited + asyncio.get_running_loop().time() - since
+
+                try:
+                    run = grin.run_async(program, ask if request.get('stream') else read,
+                                         lambda text: send({'output': text}))
+                    status = await limited(run, self._timeout, waiting)
+                    await send({'key': key, 'status': status.name.lower()})
+                except EOFError:
+                    await send({'key': key, 'status': 'no input'})
+                except asyncio.TimeoutError:
+                    await send({'key': key, 'status': 'timeout'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, path: str) -> None:
+        """Accepts run requests on the given socket path until cancelled"""
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self.handle, path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+def request(path: str, message: dict) -> Iterator[dict]:
+    """Sends one request to a daemon, yielding its replies as they arrive"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode() + b'\n')
+        with connection.makefile('r') as replies:
+            for line in replies:
+                yield json.loads(line)
+
+def client(path: str, stdin = sys.stdin, stdout = sys.stdout) -> int:
+    """Behaves like project3.py, but runs the program on a daemon: reads
+       the program from stdin up to the line holding only '.', sends it,
+       and prints the output as it arrives. Each input entry is read from
+       stdin only when the program asks for it, so it can be typed in
+       reply to what the program printed"""
+    lines = []
+    for line in stdin:
+        line = line.rstrip('\r\n')
+        if line.strip() == '.':
+            break
+        lines.append(line)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps({'source': lines, 'stream': True}).encode() + b'\n')
+        with connection.makefile('r') as replies:
+            for reply in map(json.loads, replies):
+                if 'input' in reply:
+                    entry = stdin.readline()
+                    if entry:
+                        connection.sendall(json.dumps({'entry': entry.rstrip('\r\n')}).encode() + b'\n')
+                    else:
+                        connection.shutdown(socket.SHUT_WR)
+                elif 'output' in reply:
+                    print(reply['output'], file = stdout, flush = True)
+                elif reply['status'] == 'no input':
+                    print('EOFError: program ran out of input', file = sys.stderr)
+                    return 1
+                elif reply['status'] == 'timeout':
+                    print('TimeoutError: program ran out of time', file = sys.stderr)
+                    return 1
+    return 0
+
+__all__ = [Daemon.__name__, client.__name__]
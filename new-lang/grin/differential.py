@@ -0,0 +1,315 @@
+#differential.py
+#contains the differential tester, which runs random programs through the
+#reference grin.State and every other engine, and reports the first program
+#whose output differs, shrunk to a small reproducer
+import asyncio
+import grin
+import io
+import random
+from typing import Callable, NamedTuple
+
+DEFAULT_CASES = 200
+DEFAULT_SEED = 0
+MUTATION_RATE = 0.5
+EXTRA_ENTRIES = 3
+SCHEDULER_QUANTUM = 7
+ASYNC_QUANTUM = 5
+
+Engine = Callable[[list[str], list[str]], str]
+
+class Divergence(NamedTuple):
+    """The smallest program found on which an engine's output differs from
+       the output of grin.State"""
+    engine: str
+    seed: int
+    lines: list[str]
+    entries: list[str]
+    expected: str
+    actual: str
+
+    def describe(self) -> str:
+        """Returns a report of the divergence that can be pasted into a test"""
+        return '\n'.join([f'engine {self.engine} diverges from State on case {self.seed}',
+                          f'lines = {self.lines!r}', f'entries = {self.entries!r}',
+                          f'expected = {self.expected!r}', f'actual = {self.actual!r}'])
+
+def link(lines: list[str]) -> grin.Program | str:
+    """Returns the linked program, or the text printed when it fails to parse"""
+    try:
+        return grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        return grin.parse_error_message(e) + '\n'
+
+def joined(printed: list[str]) -> str:
+    """Returns printed lines as the text written to standard output"""
+    return ''.join(line + '\n' for line in printed)
+
+def run_reference(lines: list[str], entries: list[str]) -> str | None:
+    """Returns the text grin.State prints, or None when the run says nothing
+       about the other engines: State crashed, ran out of input, or reached
+       the recursion limit that it alone has"""
+    output = io.StringIO()
+    try:
+        grin.State(lines, io.StringIO(joined(entries)), output).process_grin()
+    except SystemExit:
+        pass
+    except Exception:
+        return None
+    text = output.getvalue()
+    if text.endswith('MAXIMUM RECURSION REACHED\n'):
+        return None
+    return text
+
+def run_machine(lines: list[str], entries: list[str]) -> str:
+    """Runs the program as the batch runner does"""
+    return joined(grin.run_lines(lines, entries)['output'])
+
+def run_stream(lines: list[str], entries: list[str]) -> str:
+    """Runs the program through grin.stream()"""
+    entries = iter(entries)
+    printed = []
+    for event in grin.stream(lines):
+        if event.kind() == grin.EventKind.INPUT:
+            event.reply(next(entries))
+        else:
+            printed.append(event.text())
+    return joined(printed)
+
+def run_in_context(lines: list[str], entries: list[str], machine: type = None,
+                   callback: 'grin.trace.TraceCallback' = None) -> str:
+    """Runs the program in a Context on the given kind of Machine, traced by
+       callback if one is given"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    output = io.StringIO()
+    context = grin.Context(program, io.StringIO(joined(entries)), output, machine)
+    if callback is not None:
+        context.machine().set_trace(callback)
+    context.run()
+    return output.getvalue()
+
+def run_metered(lines: list[str], entries: list[str]) -> str:
+    """Runs the program with its metrics collected"""
+    output = io.StringIO()
+    grin.run_metered(lines, io.StringIO(joined(entries)), output)
+    return output.getvalue()
+
+def run_scheduled(lines: list[str], entries: list[str]) -> str:
+    """Runs the program as a Scheduler task, a few statements at a time"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    scheduler = grin.Scheduler(SCHEDULER_QUANTUM)
+    pid = scheduler.spawn(program)
+    for entry in entries:
+        scheduler.feed(pid, entry)
+    scheduler.run()
+    return joined(scheduler.task(pid).output())
+
+def run_awaited(lines: list[str], entries: list[str]) -> str:
+    """Runs the program on the asyncio runtime"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    entries = iter(entries)
+    printed = []
+    async def read() -> str:
+        return next(entries)
+    async def write(text: str) -> None:
+        printed.append(text)
+    asyncio.run(grin.run_async(program, read, write, ASYNC_QUANTUM))
+    return joined(printed)
+
+def run_image(lines: list[str], entries: list[str]) -> str:
+    """Runs the program from its encoded image, as shared-memory workers do"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    image = grin.ImageProgram(memoryview(grin.image.encode(program)))
+    try:
+        return joined(grin.execute(image, entries)['output'])
+    finally:
+        image.release()
+
+def run_lockstep(lines: list[str], entries: list[str]) -> str:
+    """Runs the program on the NumPy lockstep engine"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    return joined(grin.run_vectorized(program, [entries])[0]['output'])
+
+def every_fusion(program: grin.Program) -> set[tuple[str, ...]]:
+    """Returns the opcodes of every sequence of adjacent statements in the
+       program that a FusedMachine can fuse"""
+    codes = [grin.fusion.opcode(statement) for statement in program.statements()]
+    return {tuple(codes[start:start + length]) for length in grin.fusion.LENGTHS
+            for start in range(len(codes) - length + 1)}
+
+def run_fused(lines: list[str], entries: list[str]) -> str:
+    """Runs the program on a FusedMachine that fuses every sequence it
+       can, not only the frequent ones"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    machine = grin.FusedMachine(program, every_fusion(program))
+    return joined(grin.batch.complete(machine, entries, [])['output'])
+
+def run_folded(lines: list[str], entries: list[str]) -> str:
+    """Runs the program after constant folding, as the batch runner does"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    return joined(grin.execute(grin.fold_constants(program), entries)['output'])
+
+def run_pruned(lines: list[str], entries: list[str]) -> str:
+    """Runs the program after dead code elimination, as the batch runner does"""
+    program = link(lines)
+    if isinstance(program, str):
+        return program
+    return joined(grin.execute(grin.eliminate_dead_code(program), entries)['output'])
+
+def available_engines() -> dict[str, Engine]:
+    """Returns every engine available here, by name. The lockstep engine
+       is left out when NumPy is not installed"""
+    available = {
+        'machine': run_machine,
+        'stream': run_stream,
+        'context': run_in_context,
+        'profiled': lambda lines, entries: run_in_context(lines, entries, grin.ProfiledMachine),
+        'traced': lambda lines, entries: run_in_context(lines, entries, None, lambda *event: None),
+        'metered': run_metered,
+        'scheduler': run_scheduled,
+        'async': run_awaited,
+        'image': run_image,
+        'fused': run_fused,
+        'accelerated': lambda lines, entries: run_in_context(lines, entries, grin.CountedLoopMachine),
+        'folded': run_folded,
+        'pruned': run_pruned
+    }
+    if grin.vector.numpy is not None:
+        available['vector'] = run_lockstep
+    return available
+
+def mutation(chooser: random.Random, lines: list[str]) -> str:
+    """Returns a statement likely to fail or to jump somewhere unusual,
+       using the variables and labels of lines"""
+    labels = [line.split(':')[0] for line in lines if ':' in line.split('"')[0]]
+    name = chooser.choice(['N0', 'N1', 'S0', 'C1', 'T9', 'Z'])
+    label = chooser.choice(labels + ['NOWHERE'])
+    value = chooser.choice(['0', '1', '-1', '2.5', '"x"', f'"{label}"', 'N0', 'S0'])
+    condition = chooser.choice(['', f' IF {name} < {value}', f' IF {name} = {value}'])
+    return chooser.choice([
+        f'LET {name} {value}', f'ADD {name} {value}', f'SUB {name} {value}',
+        f'MULT {name} {value}', f'DIV {name} {value}', f'PRINT {name}',
+        f'GOTO "{label}"{condition}', f'GOSUB "{label}"{condition}',
+        f'GOTO {chooser.randint(-4, 4)}{condition}', f'GOSUB {chooser.randint(-4, 4)}{condition}',
+        f'GOTO {name}{condition}', f'GOSUB {name}{condition}', 'RETURN', 'END', f'LET {name}'
+    ])
+
+def return_site(chooser: random.Random, lines: list[str]) -> list[str]:
+    """Returns a GOSUB, a labeled LET that a subroutine returning in raw
+       mode steps over if they start the program, and a PRINT of what the
+       LET stores"""
+    labels = [line.split(':')[0] for line in lines if ':' in line.split('"')[0]]
+    name = chooser.choice(['N0', 'N1', 'S0', 'C1', 'T9', 'Z'])
+    label = chooser.choice(labels + ['NOWHERE'])
+    value = chooser.choice(['0', '1', '"x"'])
+    return [f'GOSUB "{label}"', f'R{len(labels)}: LET {name} {value}', f'PRINT {name}']
+
+def mutate(chooser: random.Random, lines: list[str]) -> list[str]:
+    """Returns a copy of lines with a few statements inserted, replaced,
+       labeled or removed"""
+    lines = list(lines)
+    for _ in range(chooser.randint(1, 3)):
+        index = chooser.randrange(len(lines) + 1)
+        roll = chooser.random()
+        if roll < 0.1:
+            lines[0:0] = return_site(chooser, lines)
+        elif roll < 0.4 or index == len(lines):
+            lines.insert(index, mutation(chooser, lines))
+        elif roll < 0.7:
+            lines[index] = mutation(chooser, lines)
+        elif roll < 0.85:
+            lines[index] = f'M{index}: {lines[index].split(": ", 1)[-1]}'
+        else:
+            del lines[index]
+    return lines
+
+def make_case(seed: int) -> tuple[list[str], list[str]]:
+    """Returns the lines and input entries of a random program, a small
+       generated one that is mutated half of the time"""
+    chooser = random.Random(seed)
+    lines = grin.generate(chooser.randint(5, 60), chooser.random() * 0.4, chooser.randint(0, 2),
+                          chooser.randint(1, 3), chooser.randint(0, 3), chooser.randint(1, 3),
+                          chooser.randint(1, 8), chooser.random(), chooser.random() * 0.5,
+                          chooser.random() * 0.5, chooser.random() * 0.2, seed)
+    entries = grin.generate_input(lines, seed)
+    entries += [str(chooser.randint(-9, 9)) for _ in range(EXTRA_ENTRIES)]
+    if chooser.random() < MUTATION_RATE:
+        lines = mutate(chooser, lines)
+    return lines, entries
+
+def run_engine(engine: Engine, lines: list[str], entries: list[str]) -> str:
+    """Returns the text an engine prints, or a description of the exception
+       it raised"""
+    try:
+        return engine(lines, entries)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}\n'
+
+def diverges(engine: Engine, lines: list[str], entries: list[str]) -> bool:
+    """Returns whether the engine's output differs from the reference on a
+       program the reference runs to a conclusion"""
+    expected = run_reference(lines, entries)
+    return expected is not None and run_engine(engine, lines, entries) != expected
+
+def minimize(engine: Engine, lines: list[str], entries: list[str]) -> tuple[list[str], list[str]]:
+    """Returns the lines and entries left after removing every chunk of
+       lines, and then every entry, whose removal keeps the divergence"""
+    size = max(1, len(lines) // 2)
+    while True:
+        removed = False
+        start = 0
+        while start < len(lines):
+            candidate = lines[:start] + lines[start + size:]
+            if candidate and diverges(engine, candidate, entries):
+                lines = candidate
+                removed = True
+            else:
+                start += size
+        if size > 1:
+            size //= 2
+        elif not removed:
+            break
+    for index in reversed(range(len(entries))):
+        candidate = entries[:index] + entries[index + 1:]
+        if diverges(engine, lines, candidate):
+            entries = candidate
+    return lines, entries
+
+def check(cases: int = DEFAULT_CASES, seed: int = DEFAULT_SEED,
+          engines: dict[str, Engine] = None) -> dict:
+    """Runs cases random programs, starting from the given seed, through
+       the reference and every engine. Returns how many cases were
+       compared and skipped, and the minimized Divergence of the first
+       engine to differ, or None if none did"""
+    if engines is None:
+        engines = available_engines()
+    compared = 0
+    for case in range(seed, seed + cases):
+        lines, entries = make_case(case)
+        expected = run_reference(lines, entries)
+        if expected is None:
+            continue
+        compared += 1
+        for name, engine in engines.items():
+            if run_engine(engine, lines, entries) != expected:
+                lines, entries = minimize(engine, lines, entries)
+                divergence = Divergence(name, case, lines, entries, run_reference(lines, entries),
+                                        run_engine(engine, lines, entries))
+                return {'cases': case - seed + 1, 'compared': compared,
+                        'skipped': case - seed + 1 - compared, 'divergence': divergence}
+    return {'cases': cases, 'compared': compared, 'skipped': cases - compared, 'divergence': None}
+
+__all__ = [Divergence.__name__, check.__name__]
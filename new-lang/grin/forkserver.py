@@ -0,0 +1,134 @@
+#forkserver.py
+#contains the fork server, which links a grin program once in the parent
+#process and forks workers that share its memory copy-on-write
+import gc
+import grin
+import io
+import os
+import pickle
+import selectors
+import time
+
+PIPE_READ_SIZE = 1 << 16
+
+def run_forked(program: grin.Program, inputs: list[list[str]], workers: int = None,
+               timeout: float = None) -> list[dict]:
+    """Executes the program once for each input set, across forked worker
+       processes that inherit the already linked program. Returns the
+       outcomes, as grin.execute() describes them, in the order of inputs"""
+    return fork_tasks([(program, entries) for entries in inputs], workers, timeout)
+
+def fork_tasks(tasks: list[tuple[grin.Program, list[str]]], workers: int = None,
+               timeout: float = None) -> list[dict]:
+    """Executes each (program, input set) pair across one set of forked
+       worker processes, which inherit every already linked program.
+       Returns the outcomes in the order of tasks"""
+    if not hasattr(os, 'fork'):
+        raise OSError('the fork server needs os.fork(), which this platform lacks')
+    if not tasks:
+        return []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    # Moving every object the parent holds into the permanent generation
+    # keeps the workers' collections from writing to (and so unsharing) the
+    # pages holding the programs
+    gc.freeze()
+    children = {}
+    try:
+        for worker in range(workers):
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_end)
+                serve(tasks, range(worker, len(tasks), workers), write_end, timeout)
+            os.close(write_end)
+            children[read_end] = (pid, [])
+    finally:
+        gc.unfreeze()
+
+    # Every pipe is drained as data arrives, so that no worker blocks on a
+    # full pipe while the parent is reading another's
+    with selectors.DefaultSelector() as selector:
+        for read_end in children:
+            selector.register(read_end, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, PIPE_READ_SIZE)
+                if data:
+                    children[key.fd][1].append(data)
+                else:
+                    selector.unregister(key.fd)
+                    os.close(key.fd)
+
+    outcomes = [None] * len(tasks)
+    for pid, chunks in children.values():
+        stream = io.BytesIO(b''.join(chunks))
+        while True:
+            try:
+                index, outcome = pickle.load(stream)
+            except (EOFError, pickle.UnpicklingError):
+                break
+            outcomes[index] = outcome
+        os.waitpid(pid, 0)
+    for index, outcome in enumerate(outcomes):
+        if outcome is None:
+            outcomes[index] = grin.batch.result('crashed', ['worker process exited early'], 0)
+    return outcomes
+
+def serve(tasks: list[tuple[grin.Program, list[str]]], indexes: range,
+          write_end: int, timeout: float) -> None:
+    """Runs in a forked worker: executes the tasks at the given indexes,
+       sending each outcome to the parent, then exits"""
+    code = 0
+    try:
+        with os.fdopen(write_end, 'wb') as pipe:
+            for index in indexes:
+                program, entries = tasks[index]
+                start = time.perf_counter()
+                try:
+                    outcome = grin.execute(program, entries, timeout)
+                except Exception as e:
+                    outcome = grin.batch.result('crashed', [f'{type(e).__name__}: {e}'], 0)
+                outcome['seconds'] = time.perf_counter() - start
+                pickle.dump((index, outcome), pipe)
+    except BaseException:
+        code = 1
+    finally:
+        os._exit(code)
+
+def run_batch_forked(jobs: list[grin.Job], workers: int = None, timeout: float = None) -> list[dict]:
+    """Runs a batch of jobs by linking each distinct program once and
+       running every job across one set of forked workers. Returns outcomes
+       in the order of the jobs, as grin.run_batch() does"""
+    by_program = {}
+    for index, job in enumerate(jobs):
+        by_program.setdefault(job.program(), []).append(index)
+    outcomes = [None] * len(jobs)
+    tasks = []
+    owners = []
+    for path, indexes in by_program.items():
+        try:
+            program = grin.Program(grin.batch.read_lines(path))
+            inputs = [[] if jobs[i].entries() is None else grin.batch.read_lines(jobs[i].entries())
+                      for i in indexes]
+        except (grin.GrinParseError, grin.GrinLexError) as e:
+            for index in indexes:
+                outcomes[index] = grin.batch.result('error', [grin.parse_error_message(e)], 0)
+        except OSError as e:
+            for index in indexes:
+                outcomes[index] = grin.batch.result('crashed', [f'{type(e).__name__}: {e}'], 0)
+        else:
+            # Jobs sharing a program stay next to each other in the task list
+            tasks.extend((program, entries) for entries in inputs)
+            owners.extend(indexes)
+    for index, outcome in zip(owners, fork_tasks(tasks, workers, timeout)):
+        outcomes[index] = outcome
+    for index, outcome in enumerate(outcomes):
+        outcome['program'] = jobs[index].program()
+        outcome['input'] = jobs[index].entries()
+        outcome.setdefault('seconds', 0.0)
+    return outcomes
+
+__all__ = [run_forked.__name__, fork_tasks.__name__, run_batch_forked.__name__]
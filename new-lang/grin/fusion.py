@@ -0,0 +1,290 @@
+#fusion.py
+#contains FusedMachine, a Machine that dispatches frequent sequences of
+#adjacent statements as single units, and the opcode n-gram histogram that
+#the sequences it fuses are chosen from
+import collections
+import grin
+import operator
+from typing import Callable, Iterable, TextIO
+
+LENGTHS = (2, 3)
+MAX_FUSIONS = 12
+MIN_SHARE = 0.02
+
+# Chosen by benchmarks/ngrams.py from the histogram of the benchmark
+# workloads; rerun it and paste its output here when the workloads change
+FUSIONS = (
+    ('ADD', 'GOTO IF'),
+    ('ADD', 'ADD'),
+    ('ADD', 'ADD', 'GOTO IF'),
+    ('GOSUB IF', 'GOSUB IF'),
+    ('GOSUB IF', 'GOSUB IF', 'GOSUB IF'),
+    ('LET', 'ADD'),
+    ('INNUM', 'ADD'),
+    ('INNUM', 'ADD', 'ADD'),
+    ('MULT', 'GOTO IF'),
+)
+
+_ARITHMETIC = {
+    grin.GrinTokenKind.ADD: operator.add,
+    grin.GrinTokenKind.SUB: operator.sub,
+    grin.GrinTokenKind.MULT: operator.mul
+}
+_COMPARISONS = {
+    grin.GrinTokenKind.LESS_THAN: operator.lt,
+    grin.GrinTokenKind.LESS_THAN_OR_EQUAL: operator.le,
+    grin.GrinTokenKind.GREATER_THAN: operator.gt,
+    grin.GrinTokenKind.GREATER_THAN_OR_EQUAL: operator.ge,
+    grin.GrinTokenKind.EQUAL: operator.eq,
+    grin.GrinTokenKind.NOT_EQUAL: operator.ne
+}
+_NUMBERS = {int, float}
+_CHANGES_PC = {grin.GrinTokenKind.GOTO, grin.GrinTokenKind.GOSUB, grin.GrinTokenKind.RETURN,
+               grin.GrinTokenKind.END}
+_STOPS = {'PRINT', 'GOTO', 'GOSUB', 'RETURN', 'END'}
+
+def opcode(statement: grin.Statement) -> str:
+    """Returns the name a statement has in an n-gram: its keyword,
+       followed by IF for a conditional jump"""
+    if statement.condition is not None:
+        return statement.kind.name + ' IF'
+    return statement.kind.name
+
+def histogram(runs: Iterable[tuple[grin.Program, list[str]]],
+              lengths: Iterable[int] = LENGTHS) -> dict[tuple[str, ...], float]:
+    """Runs each program with its input entries and returns, for each
+       sequence of opcodes, the share of executed statements that began
+       that sequence of adjacent statements, averaged over the programs so
+       that one long run does not outweigh the others. Sequences with a
+       PRINT, RETURN, END or unconditional jump before their last statement
+       are left out, since a unit always stops after it"""
+    shares = collections.Counter()
+    runs = list(runs)
+    for program, entries in runs:
+        statements = program.statements()
+        executed = []
+        def record(kind: grin.TraceKind, statement: grin.Statement, argument: object) -> None:
+            if kind == grin.TraceKind.STATEMENT:
+                executed.append(argument)
+        machine = grin.Machine(program)
+        machine.set_trace(record)
+        grin.batch.complete(machine, entries, [])
+        counts = collections.Counter()
+        for length in lengths:
+            for start in range(len(executed) - length + 1):
+                window = executed[start:start + length]
+                if all(second == first + 1 for first, second in zip(window, window[1:])):
+                    sequence = tuple(opcode(statements[index]) for index in window)
+                    if not _STOPS.intersection(sequence[:-1]):
+                        counts[sequence] += 1
+        for sequence, count in counts.items():
+            shares[sequence] += count / len(executed) / len(runs)
+    return dict(shares)
+
+def choose(shares: dict[tuple[str, ...], float], limit: int = MAX_FUSIONS,
+           minimum: float = MIN_SHARE) -> tuple[tuple[str, ...], ...]:
+    """Returns the sequences worth fusing: the most frequent ones, at most
+       limit of them, that begin at least the minimum share of statements"""
+    frequent = sorted((sequence for sequence, share in shares.items() if share >= minimum),
+                      key = lambda sequence: (-shares[sequence], sequence))
+    return tuple(frequent[:limit])
+
+class FusedMachine(grin.Machine):
+    def __init__(self, program: grin.Program,
+                 fusions: Iterable[tuple[str, ...]] = FUSIONS) -> None:
+        """Initiates the FusedMachine object, which executes exactly as a
+           Machine does, but runs each sequence of adjacent statements
+           whose opcodes are one of the fusions as a single unit. The
+           longest fusion starting at a statement is chosen, and only
+           its first statement may be labeled, since the main program
+           steps over labeled lines"""
+        super().__init__(program)
+        self._fusions = set(fusions)
+        self._units = self.assemble()
+        self._fired = [0] * len(self._statements)
+
+    def assemble(self) -> list[tuple[int, Callable[[], grin.Status | None]] | None]:
+        """Returns, for each statement, the length and unit of the fusion
+           starting there, or None if none does"""
+        statements = self._statements
+        lengths = sorted({len(fusion) for fusion in self._fusions}, reverse = True)
+        codes = [opcode(statement) for statement in statements]
+        units = [None] * len(statements)
+        for pc in range(len(statements)):
+            for length in lengths:
+                sequence = tuple(codes[pc:pc + length])
+                if len(sequence) == length and sequence in self._fusions and \
+                   all(statement.label is None for statement in statements[pc + 1:pc + length]):
+                    units[pc] = (length, self.fuse(pc, length))
+                    break
+        return units
+
+    def fuse(self, pc: int, length: int) -> Callable[[], grin.Status | None]:
+        """Returns a unit executing the statements from index pc on as
+           their handlers would. The unit stops early, as the dispatch loop
+           would, when a statement returns a status or does not fall through
+           to the next one"""
+        if length not in LENGTHS:
+            raise ValueError(f'fusions are {" or ".join(map(str, LENGTHS))} statements long')
+        machine = self
+        steps = [(self._handlers[statement.kind], statement, statement.kind in _CHANGES_PC)
+                 for statement in self._statements[pc:pc + length]]
+        (first, a, jumps_a), (second, b, jumps_b) = steps[:2]
+        branch = self.fuse_branch(pc + length - 2)
+        if length == 2:
+            if branch is not None:
+                return branch
+            def unit() -> grin.Status | None:
+                machine._count += 1
+                status = first(a)
+                if status is not None or jumps_a and machine._pc != pc + 1:
+                    return status
+                machine._count += 1
+                return second(b)
+            return unit
+        third, c, _ = steps[2]
+        if branch is not None:
+            def unit() -> grin.Status | None:
+                machine._count += 1
+                status = first(a)
+                if status is not None or jumps_a and machine._pc != pc + 1:
+                    return status
+                return branch()
+            return unit
+        def unit() -> grin.Status | None:
+            machine._count += 1
+            status = first(a)
+            if status is not None or jumps_a and machine._pc != pc + 1:
+                return status
+            machine._count += 1
+            status = second(b)
+            if status is not None or jumps_b and machine._pc != pc + 2:
+                return status
+            machine._count += 1
+            return third(c)
+        return unit
+
+    def fuse_branch(self, pc: int) -> Callable[[], grin.Status | None] | None:
+        """Returns a unit executing an ADD, SUB or MULT statement at index
+           pc and the conditional GOTO after it inline, or None if they are
+           not such a pair, the GOTO does not have a destination in the
+           program, or the machine is traced, since the pair would not be
+           reported. While the values involved are numbers neither statement
+           can fail, so only other values go through the handlers"""
+        math, go = self._statements[pc:pc + 2]
+        if math.kind not in _ARITHMETIC or go.kind != grin.GrinTokenKind.GOTO or \
+           go.condition is None or go.destination is None or \
+           go.destination == grin.program.OUT_OF_BOUNDS or self._trace is not None:
+            return None
+        machine = self
+        execute_math = self._handlers[math.kind]
+        execute_go = self._handlers[go.kind]
+        compute = _ARITHMETIC[math.kind]
+        compare = _COMPARISONS[go.condition.operator]
+        name = math.variable
+        value = math.value
+        left = go.condition.left
+        right = go.condition.right
+        destination = go.destination
+        def unit() -> grin.Status | None:
+            variables = machine._variables
+            first = variables.get(name)
+            second = variables.get(value.value) if value.is_identifier else value.value
+            machine._count += 1
+            if type(first) not in _NUMBERS or type(second) not in _NUMBERS:
+                status = execute_math(math)
+                if status is not None:
+                    return status
+            else:
+                variables[name] = compute(first, second)
+                machine._pc = pc + 1
+            machine._count += 1
+            first = variables.get(left.value) if left.is_identifier else left.value
+            second = variables.get(right.value) if right.is_identifier else right.value
+            if type(first) not in _NUMBERS or type(second) not in _NUMBERS:
+                return execute_go(go)
+            if compare(first, second):
+                machine._pc = destination
+                machine._raw = False
+            else:
+                machine._pc = pc + 2
+            return None
+        return unit
+
+    def run(self, budget: int = None) -> grin.Status:
+        """Executes statements as Machine.run() does, dispatching a fused
+           unit where one starts. A unit is only run when the whole of it
+           fits in what is left of the budget"""
+        if self._status == grin.Status.HALTED or self._status == grin.Status.ERROR:
+            return self._status
+        statements = self._statements
+        handlers = self._handlers
+        units = self._units
+        fired = self._fired
+        size = len(statements)
+        limit = None if budget is None else self._count + budget
+        while True:
+            pc = self._pc
+            if pc >= size:
+                status = self.leave()
+            elif limit is not None and self._count >= limit:
+                status = grin.Status.PAUSED
+            else:
+                statement = statements[pc]
+                if self._raw and statement.label is not None:
+                    self._pc = pc + 1
+                    continue
+                unit = units[pc]
+                if unit is not None and (limit is None or self._count + unit[0] <= limit):
+                    count = self._count
+                    status = unit[1]()
+                    # A unit that stopped after its first statement ran
+                    # nothing a handler would not have
+                    if self._count - count > 1:
+                        fired[pc] += 1
+                else:
+                    self._count += 1
+                    status = handlers[statement.kind](statement)
+            if status is not None:
+                self._status = status
+                return status
+
+    def set_trace(self, callback: 'grin.trace.TraceCallback | None') -> None:
+        """Traces the machine as Machine.set_trace() does. The units are
+           put together again, so that they go through the handlers that
+           report each statement"""
+        super().set_trace(callback)
+        self._units = self.assemble()
+
+    def fired(self) -> list[dict]:
+        """Returns a row for each fused unit that ran, in line order, with
+           its first line, its opcodes and the number of times it ran"""
+        statements = self._statements
+        return [{'line': statements[pc].line,
+                 'fusion': [opcode(statement) for statement in statements[pc:pc + unit[0]]],
+                 'count': self._fired[pc]}
+                for pc, unit in enumerate(self._units) if unit is not None and self._fired[pc]]
+
+def format_fusions(rows: list[dict]) -> str:
+    """Returns the rows of FusedMachine.fired() as a table"""
+    table = [f'{"LINE":>6} {"COUNT":>10}  FUSION']
+    for row in rows:
+        table.append(f'{row["line"]:>6} {row["count"]:>10}  {" ; ".join(row["fusion"])}')
+    return '\n'.join(table)
+
+def run_fused(lines: list[str], stdin: TextIO, stdout: TextIO, report: TextIO = None) -> int:
+    """Executes the program as run_context() does under a FusedMachine and,
+       if a report stream is given, writes the fusions that fired to it.
+       Returns the run's exit code"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR
+    context = grin.Context(program, stdin, stdout, FusedMachine)
+    code = context.run()
+    if report is not None:
+        report.write(format_fusions(context.machine().fired()) + '\n')
+    return code
+
+__all__ = [FusedMachine.__name__, format_fusions.__name__, run_fused.__name__]
@@ -0,0 +1,168 @@
+#gen.py
+#contains the program generator, which writes valid, terminating grin
+#programs of a chosen size and shape for scale and stress testing
+import grin
+import random
+
+DEFAULT_SEED = 0
+
+class _Generator:
+    def __init__(self, chooser: random.Random, variables: int, labels: float, floats: float,
+                 strings: float, computed: float, inputs: float) -> None:
+        """Initiates the generator of one program"""
+        self._chooser = chooser
+        count = max(2, variables)
+        self._texts = [f'S{index}' for index in range(max(1, round(count * strings)))]
+        self._numbers = [f'N{index}' for index in range(max(1, count - len(self._texts)))]
+        self._labels = labels
+        self._floats = floats
+        self._computed = computed
+        self._inputs = inputs
+        self._names = 0
+        # Until its first jump the main program steps over labeled lines,
+        # so the opening jump is never labeled and the rest may be
+        self._lines = ['GOTO "START"']
+
+    def name(self, prefix: str) -> str:
+        """Returns a new name for a label or loop counter"""
+        self._names += 1
+        return f'{prefix}{self._names}'
+
+    def emit(self, line: str, label: str = None) -> None:
+        """Adds a line, with a label if one is given or, by chance, a new
+           one"""
+        if label is None and self._chooser.random() < self._labels:
+            label = self.name('L')
+        self._lines.append(line if label is None else f'{label}: {line}')
+
+    def number(self) -> str:
+        """Returns a numeric literal, an integer or a float"""
+        if self._chooser.random() < self._floats:
+            return f'{self._chooser.uniform(0.5, 9.5):.2f}'
+        return str(self._chooser.randint(1, 9))
+
+    def straight(self) -> None:
+        """Adds one statement that neither jumps nor fails"""
+        chooser = self._chooser
+        if chooser.random() < self._inputs:
+            if chooser.random() < 0.5:
+                self.emit(f'INNUM {chooser.choice(self._numbers)}')
+            else:
+                self.emit(f'INSTR {chooser.choice(self._texts)}')
+            return
+        roll = chooser.random()
+        if roll < 0.2:
+            self.emit(f'LET {chooser.choice(self._numbers)} {self.number()}')
+        elif roll < 0.45:
+            self.emit(f'ADD {chooser.choice(self._numbers)} {chooser.choice([self.number()] + self._numbers)}')
+        elif roll < 0.55:
+            self.emit(f'SUB {chooser.choice(self._numbers)} {self.number()}')
+        elif roll < 0.65:
+            self.emit(f'MULT {chooser.choice(self._numbers)} {chooser.choice(["2", "0.5", "-1"])}')
+        elif roll < 0.75:
+            self.emit(f'DIV {chooser.choice(self._numbers)} {self.number()}')
+        elif roll < 0.85:
+            self.emit(f'ADD {chooser.choice(self._texts)} "{chooser.choice("abcxyz")}"')
+        else:
+            self.emit(f'PRINT {chooser.choice(self._numbers + self._texts)}')
+
+    def target(self, label: str) -> str:
+        """Returns the target of a jump to a label, which by chance is held
+           in an identifier set just before the jump"""
+        if self._chooser.random() < self._computed:
+            holder = self.name('T')
+            self.emit(f'LET {holder} "{label}"')
+            return holder
+        return f'"{label}"'
+
+    def loop(self, body: int, depth: int, iterations: int, calls: list[str], call_rate: float) -> None:
+        """Adds a counted loop of about body statements, nesting further
+           loops until depth is 1"""
+        counter = self.name('C')
+        top = self.name('L')
+        self.emit(f'LET {counter} 0')
+        self.emit(f'ADD {counter} 1', top)
+        self.block(body, depth - 1, iterations, calls, call_rate)
+        self.emit(f'GOTO {self.target(top)} IF {counter} < {iterations}')
+
+    def block(self, size: int, depth: int, iterations: int, calls: list[str], call_rate: float) -> None:
+        """Adds about size lines of statements, loops and GOSUB calls"""
+        end = len(self._lines) + size
+        while len(self._lines) < end:
+            roll = self._chooser.random()
+            if depth > 0 and roll < 0.15 and end - len(self._lines) > 6:
+                self.loop((end - len(self._lines)) // 2, depth, iterations, calls, call_rate)
+            elif calls and roll < 0.15 + call_rate:
+                self.emit(f'GOSUB {self.target(self._chooser.choice(calls))}')
+            else:
+                self.straight()
+
+    def declare(self) -> None:
+        """Adds the START line and gives every variable a starting value"""
+        self.emit(f'LET {self._numbers[0]} 0', 'START')
+        for name in self._numbers[1:]:
+            self.emit(f'LET {name} {self.number()}')
+        for name in self._texts:
+            self.emit(f'LET {name} ""')
+
+    def lines(self) -> list[str]:
+        """Returns the lines added so far"""
+        return self._lines
+
+def generate(lines: int = 100, labels: float = 0.1, loop_depth: int = 2, iterations: int = 3,
+             gosub_depth: int = 2, fan_out: int = 2, variables: int = 8, floats: float = 0.3,
+             strings: float = 0.25, computed: float = 0.1, inputs: float = 0.0,
+             seed: int = DEFAULT_SEED) -> list[str]:
+    """Returns the lines of a valid program that halts, about lines long.
+       Labels is the share of statements given a label of their own, and
+       loops of the given iterations nest up to loop_depth. Subroutines
+       form a tree gosub_depth deep in which each calls fan_out others.
+       Variables are split between numbers and strings by the share
+       strings, and floats is the share of numeric literals that are
+       floats. Computed is the share of jumps whose target is held in an
+       identifier, and inputs the share of statements that read input"""
+    generator = _Generator(random.Random(seed), variables, labels, floats, strings, computed, inputs)
+    generator.declare()
+
+    levels = []
+    total = 0
+    width = fan_out
+    for level in range(gosub_depth):
+        if total + width > max(1, lines // 8):
+            break
+        levels.append([generator.name('F') for _ in range(width)])
+        total += width
+        width *= fan_out
+    body = max(1, lines - len(generator.lines()) - 1 - total)
+    share = body // 2 // max(1, total)
+    generator.block(body - share * total, loop_depth, iterations, levels[0] if levels else [], 0.05)
+    generator.emit('END')
+
+    for level, names in enumerate(levels):
+        children = levels[level + 1] if level + 1 < len(levels) else []
+        for index, name in enumerate(names):
+            start = len(generator.lines())
+            generator.emit('PRINT "' + name + '"', name)
+            for child in children[index * fan_out:(index + 1) * fan_out]:
+                generator.emit(f'GOSUB {generator.target(child)}')
+            generator.block(max(0, share - (len(generator.lines()) - start)), 0, iterations, [], 0.0)
+            generator.emit('RETURN')
+    return generator.lines()
+
+def generate_input(lines: list[str], seed: int = DEFAULT_SEED) -> list[str]:
+    """Returns the input entries a generated program reads, made up by
+       running it: an integer or float for each INNUM and a word for each
+       INSTR"""
+    chooser = random.Random(seed)
+    entries = []
+    for event in grin.stream(lines):
+        if event.kind() == grin.EventKind.INPUT:
+            if event.text() == grin.GrinTokenKind.INNUM.name:
+                entry = str(chooser.randint(-99, 99)) if chooser.random() < 0.7 else f'{chooser.uniform(-99, 99):.3f}'
+            else:
+                entry = chooser.choice(['alpha', 'beta', 'gamma', 'delta'])
+            entries.append(entry)
+            event.reply(entry)
+    return entries
+
+__all__ = [generate.__name__, generate_input.__name__]
@@ -1,6 +1,36 @@
 #go.py
-#contains GoTo and GoSub classes, which have an inherited relationship
+#contains GoTo and GoSub classes, which have an inherited relationship, and
+#Suffix, the view of a program's remaining lines that a jump executes
 import grin
+class Suffix:
+    def __init__(self, lines: list, start: int, stripped: bool) -> None:
+        """Initiates the Suffix object, which behaves as the slice
+           lines[start:] without copying it. Stripped tells whether the
+           labels have already been removed from lines"""
+        self._lines = lines
+        self._indices = range(len(lines))[start:]
+        self._stripped = stripped
+
+    def __iter__(self):
+        """Returns an iterator over the lines from start to the end"""
+        return map(self._lines.__getitem__, self._indices)
+
+    def __len__(self) -> int:
+        """Returns the number of lines from start to the end"""
+        return len(self._indices)
+
+    def __getitem__(self, index: int) -> list:
+        """Returns the line at the given index counted from start"""
+        return self._lines[self._indices[index]]
+
+    def start(self) -> int:
+        """Returns the index in lines of the first line"""
+        return self._indices.start
+
+    def stripped(self) -> bool:
+        """Returns whether the labels have been removed from the lines"""
+        return self._stripped
+
 class GoTo:
     def __init__(self, target: list, statement: list) -> None:
         """Initiates the GoTo object"""
@@ -9,7 +39,10 @@ class GoTo:
         self.modify()
 
     def modify(self) -> None:
-        """Removes the label from a line to extract the command"""
+        """Removes the label from a line to extract the command. A
+           stripped Suffix has no labels left, so it is not scanned"""
+        if isinstance(self._statement, Suffix) and self._statement.stripped():
+            return
         for line in range(len(self._statement)):
             for token in self._statement[line]:
                 if token.kind() == grin.GrinTokenKind.COLON:
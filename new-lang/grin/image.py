@@ -0,0 +1,250 @@
+#image.py
+#contains ProgramImage, a read-only encoding of a linked grin program that
+#lives in shared memory, so that many worker processes can execute one copy
+import functools
+import grin
+import struct
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+MAGIC = b'GRINIMG1'
+HEADER = struct.Struct('<8s4q')
+FIELDS = 10
+NONE = -1
+NO_DESTINATION = -2
+CACHE_SIZE = 1024
+
+_KINDS = {kind.index(): kind for kind in grin.GrinTokenKind}
+
+class _Pool:
+    def __init__(self) -> None:
+        """Initiates the constant pool used while encoding a program"""
+        self._indexes = {}
+        self._encoded = []
+
+    def add(self, value: str | int | float | None) -> int:
+        """Returns the index of a constant, adding it if it is new"""
+        if value is None:
+            return NONE
+        key = (type(value), value)
+        if key not in self._indexes:
+            if type(value) == str:
+                encoded = b's' + value.encode()
+            elif type(value) == int:
+                encoded = b'i' + str(value).encode()
+            else:
+                encoded = b'f' + repr(value).encode()
+            self._indexes[key] = len(self._encoded)
+            self._encoded.append(encoded)
+        return self._indexes[key]
+
+    def operand(self, operand: grin.Operand | None) -> int:
+        """Encodes an operand as twice its constant's index, plus one if it
+           names an identifier"""
+        if operand is None:
+            return NONE
+        return self.add(operand.value) * 2 + operand.is_identifier
+
+    def encoded(self) -> list[bytes]:
+        """Returns the encoded constants"""
+        return self._encoded
+
+def encode(program: grin.Program) -> bytes:
+    """Encodes a linked program as a header followed by the statement
+       table, the label table, the constant offsets and the constants"""
+    pool = _Pool()
+    rows = []
+    for statement in program.statements():
+        condition = statement.condition
+        rows.extend([
+            statement.kind.index(), statement.line, pool.add(statement.label),
+            pool.add(statement.variable), pool.operand(statement.value),
+            pool.add(statement.target),
+            NO_DESTINATION if statement.destination is None else statement.destination,
+            NONE if condition is None else pool.operand(condition.left),
+            NONE if condition is None else condition.operator.index(),
+            NONE if condition is None else pool.operand(condition.right)])
+    labels = []
+    for name in sorted(program.labels()):
+        labels.extend([pool.add(name), program.labels()[name]])
+    offsets = [0]
+    for constant in pool.encoded():
+        offsets.append(offsets[-1] + len(constant))
+    header = HEADER.pack(MAGIC, len(program.statements()), len(program.labels()),
+                         len(pool.encoded()), offsets[-1])
+    return b''.join([header, struct.pack(f'<{len(rows)}q', *rows),
+                     struct.pack(f'<{len(labels)}q', *labels),
+                     struct.pack(f'<{len(offsets)}q', *offsets)] + pool.encoded())
+
+class ImageStatements(Sequence):
+    def __init__(self, image: 'ImageProgram') -> None:
+        """Initiates the sequence of statements decoded from an image"""
+        self._image = image
+
+    def __len__(self) -> int:
+        return self._image._size
+
+    def __getitem__(self, index: int) -> grin.Statement:
+        if index < 0 or index >= self._image._size:
+            raise IndexError('statement index out of range')
+        return self._image.statement(index)
+
+class ImageLabels(Mapping):
+    def __init__(self, image: 'ImageProgram') -> None:
+        """Initiates the mapping of labels, looked up by binary search in
+           an image's sorted label table"""
+        self._image = image
+
+    def __len__(self) -> int:
+        return self._image._label_count
+
+    def __iter__(self):
+        table = self._image._labels
+        for index in range(self._image._label_count):
+            yield self._image.constant(table[2 * index])
+
+    def __getitem__(self, name: str) -> int:
+        if type(name) != str:
+            raise KeyError(name)
+        table = self._image._labels
+        low, high = 0, self._image._label_count
+        while low < high:
+            middle = (low + high) // 2
+            found = self._image.constant(table[2 * middle])
+            if found == name:
+                return table[2 * middle + 1]
+            elif found < name:
+                low = middle + 1
+            else:
+                high = middle
+        raise KeyError(name)
+
+class ImageProgram:
+    def __init__(self, buffer: memoryview) -> None:
+        """Initiates the ImageProgram object, which executes in a Machine
+           like a Program but decodes statements from the buffer as they are
+           needed instead of holding them"""
+        magic, self._size, self._label_count, count, blob_size = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError('buffer does not hold a grin program image')
+        offsets_start = self._size * FIELDS + 2 * self._label_count
+        blob_start = HEADER.size + (offsets_start + count + 1) * 8
+        raw = buffer[HEADER.size:blob_start]
+        table = raw.cast('q')
+        self._rows = table[:self._size * FIELDS]
+        self._labels = table[self._size * FIELDS:offsets_start]
+        self._offsets = table[offsets_start:]
+        self._blob = buffer[blob_start:blob_start + blob_size]
+        self._views = [raw, table, self._rows, self._labels, self._offsets, self._blob]
+        self.statement = functools.lru_cache(maxsize = CACHE_SIZE)(self.statement)
+
+    def release(self) -> None:
+        """Releases this program's views of the buffer, after which it can
+           no longer be executed"""
+        self.statement.cache_clear()
+        for view in reversed(self._views):
+            view.release()
+
+    def constant(self, index: int) -> str | int | float | None:
+        """Decodes one constant from the pool"""
+        if index == NONE:
+            return None
+        encoded = self._blob[self._offsets[index]:self._offsets[index + 1]]
+        tag, text = encoded[0], str(encoded[1:], 'utf-8')
+        if tag == ord('s'):
+            return text
+        elif tag == ord('i'):
+            return int(text)
+        return float(text)
+
+    def operand(self, code: int) -> grin.Operand | None:
+        """Decodes an operand"""
+        if code == NONE:
+            return None
+        return grin.Operand(bool(code & 1), self.constant(code >> 1))
+
+    def statement(self, index: int) -> grin.Statement:
+        """Decodes the statement at the given index. A bounded number of
+           recently decoded statements is kept"""
+        row = self._rows[index * FIELDS:(index + 1) * FIELDS]
+        condition = None
+        if row[8] != NONE:
+            condition = grin.Condition(self.operand(row[7]), _KINDS[row[8]], self.operand(row[9]))
+        return grin.Statement(
+            _KINDS[row[0]], row[1], self.constant(row[2]), self.constant(row[3]),
+            self.operand(row[4]), self.constant(row[5]),
+            None if row[6] == NO_DESTINATION else row[6], condition)
+
+    def statements(self) -> ImageStatements:
+        """Returns the statements, decoded on access"""
+        return ImageStatements(self)
+
+    def labels(self) -> ImageLabels:
+        """Returns the labels, looked up on access"""
+        return ImageLabels(self)
+
+class ProgramImage:
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool) -> None:
+        """Initiates the ProgramImage object. Use create() or attach()"""
+        self._memory = memory
+        self._owner = owner
+        self._program = ImageProgram(memory.buf)
+
+    @staticmethod
+    def create(program: grin.Program) -> 'ProgramImage':
+        """Encodes a linked program into a new block of shared memory"""
+        data = encode(program)
+        memory = shared_memory.SharedMemory(create = True, size = len(data))
+        memory.buf[:len(data)] = data
+        return ProgramImage(memory, True)
+
+    @staticmethod
+    def attach(name: str) -> 'ProgramImage':
+        """Attaches to the image another process created"""
+        return ProgramImage(shared_memory.SharedMemory(name = name), False)
+
+    def name(self) -> str:
+        """Returns the name other processes attach by"""
+        return self._memory.name
+
+    def program(self) -> ImageProgram:
+        """Returns the program that a Machine executes from the image"""
+        return self._program
+
+    def close(self) -> None:
+        """Detaches from the image, and frees it if this process created it"""
+        self._program.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> 'ProgramImage':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+_attached = None
+
+def _attach_worker(name: str) -> None:
+    """Attaches a pool worker to the shared image once, when it starts"""
+    global _attached
+    _attached = ProgramImage.attach(name)
+
+def _execute_attached(entries: list[str], timeout: float = None) -> dict:
+    """Executes the worker's attached image against one input set"""
+    return grin.execute(_attached.program(), entries, timeout)
+
+def run_shared(program: grin.Program, inputs: list[list[str]], workers: int = None,
+               timeout: float = None) -> list[dict]:
+    """Executes the program once for each input set across a pool of worker
+       processes that all execute the same shared image. Returns outcomes in
+       the order of inputs"""
+    with ProgramImage.create(program) as image:
+        with ProcessPoolExecutor(max_workers = workers, initializer = _attach_worker,
+                                 initargs = (image.name(),)) as executor:
+            run = functools.partial(_execute_attached, timeout = timeout)
+            return list(executor.map(run, inputs, chunksize = 16))
+
+__all__ = [ProgramImage.__name__, ImageProgram.__name__, run_shared.__name__]
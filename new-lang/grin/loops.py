@@ -0,0 +1,223 @@
+#loops.py
+#contains the counted-loop analysis, which finds loops that step a counter
+#by a constant and only accumulate into other variables, and
+#CountedLoopMachine, which runs the remaining iterations of such a loop at
+#once instead of one statement at a time
+import grin
+import itertools
+import math
+from typing import NamedTuple, TextIO
+
+_UPDATES = {grin.GrinTokenKind.ADD, grin.GrinTokenKind.SUB}
+_ACCUMULATIONS = {grin.GrinTokenKind.ADD, grin.GrinTokenKind.SUB, grin.GrinTokenKind.MULT}
+_FLIPPED = {
+    grin.GrinTokenKind.LESS_THAN: grin.GrinTokenKind.GREATER_THAN,
+    grin.GrinTokenKind.LESS_THAN_OR_EQUAL: grin.GrinTokenKind.GREATER_THAN_OR_EQUAL,
+    grin.GrinTokenKind.GREATER_THAN: grin.GrinTokenKind.LESS_THAN,
+    grin.GrinTokenKind.GREATER_THAN_OR_EQUAL: grin.GrinTokenKind.LESS_THAN_OR_EQUAL
+}
+_NUMBERS = {int, float}
+
+class CountedLoop(NamedTuple):
+    """A loop whose body runs from the statement at index header to the
+       conditional GOTO at index latch that jumps back to it. The body
+       steps counter by the constant step once, at index update, and its
+       other statements are ADD, SUB or MULT statements accumulating into
+       variables nothing else in the loop reads. The GOTO jumps while the
+       counter compares to bound with operator, the counter on the left"""
+    header: int
+    latch: int
+    counter: str
+    step: int
+    update: int
+    operator: grin.GrinTokenKind
+    bound: grin.Operand
+
+def counted_loop(statements: list[grin.Statement], latch: int) -> CountedLoop | None:
+    """Returns the counted loop closed by the statement at index latch, or
+       None if that statement does not close one"""
+    go = statements[latch]
+    if go.kind != grin.GrinTokenKind.GOTO or go.condition is None or \
+       go.condition.operator not in _FLIPPED or go.destination is None or \
+       go.destination == grin.program.OUT_OF_BOUNDS or go.destination >= latch:
+        return None
+    body = statements[go.destination:latch]
+    if any(statement.kind not in _ACCUMULATIONS for statement in body):
+        return None
+    written = [statement.variable for statement in body]
+    if len(set(written)) != len(written):
+        return None
+    condition = go.condition
+    for counter, bound, operator in [(condition.left, condition.right, condition.operator),
+                                     (condition.right, condition.left, _FLIPPED[condition.operator])]:
+        if not counter.is_identifier or counter.value not in written:
+            continue
+        update = go.destination + written.index(counter.value)
+        step = statements[update].value
+        if statements[update].kind not in _UPDATES or step.is_identifier or type(step.value) != int or \
+           bound.is_identifier and bound.value in written:
+            continue
+        for statement in body:
+            operand = statement.value
+            if operand.is_identifier and operand.value in written and \
+               operand.value != counter.value and statement is not statements[update]:
+                break
+        else:
+            signed = step.value if statements[update].kind == grin.GrinTokenKind.ADD else -step.value
+            return CountedLoop(go.destination, latch, counter.value, signed, update, operator, bound)
+    return None
+
+def find_counted_loops(program: grin.Program) -> list[CountedLoop]:
+    """Returns the counted loops of a program, in the order of their
+       latches"""
+    statements = program.statements()
+    loops = [counted_loop(statements, latch) for latch in range(len(statements))]
+    return [loop for loop in loops if loop is not None]
+
+def iterations(start: int, step: int, operator: grin.GrinTokenKind, bound: int | float) -> int | None:
+    """Returns how many times in a row the condition holds for a counter
+       starting at start and stepped by step between tests, or None if
+       it always holds"""
+    if math.isnan(bound):
+        return 0
+    if math.isinf(bound):
+        holds = bound > 0 if operator in {grin.GrinTokenKind.LESS_THAN,
+                                          grin.GrinTokenKind.LESS_THAN_OR_EQUAL} else bound < 0
+        return None if holds else 0
+    # An integer counter compares to a bound as it compares to the nearest
+    # integer on the side the comparison faces, so the bound becomes an
+    # integer and the count is exact
+    if operator == grin.GrinTokenKind.LESS_THAN:
+        upper = math.ceil(bound)
+    elif operator == grin.GrinTokenKind.LESS_THAN_OR_EQUAL:
+        upper = math.floor(bound) + 1
+    elif operator == grin.GrinTokenKind.GREATER_THAN:
+        lower = math.floor(bound)
+    else:
+        lower = math.ceil(bound) - 1
+    if operator in {grin.GrinTokenKind.LESS_THAN, grin.GrinTokenKind.LESS_THAN_OR_EQUAL}:
+        if start >= upper:
+            return 0
+        return None if step <= 0 else -((start - upper) // step)
+    if start <= lower:
+        return 0
+    return None if step >= 0 else -((lower - start) // -step)
+
+def accumulate(kind: grin.GrinTokenKind, value: str | int | float, operand: str | int | float | None,
+               counter: int, step: int, count: int) -> str | int | float | None:
+    """Returns a variable's value after an ADD, SUB or MULT statement runs
+       count times, with the given operand, or with the counter's values
+       counter, counter + step and so on if operand is None. Returns None
+       if some run would fail or change the variable's type in a way a
+       later run could not handle"""
+    if operand is None:
+        if type(value) == int and kind in _UPDATES:
+            total = count * counter + step * count * (count - 1) // 2
+            return value + total if kind == grin.GrinTokenKind.ADD else value - total
+        operands = range(counter, counter + step * count, step)
+    else:
+        if type(value) == int and type(operand) == int:
+            if kind == grin.GrinTokenKind.ADD:
+                return value + operand * count
+            elif kind == grin.GrinTokenKind.SUB:
+                return value - operand * count
+            return value * operand ** count
+        if type(value) == str and type(operand) == str and kind == grin.GrinTokenKind.ADD:
+            return value + operand * count
+        # Floats round on every run, so they are still added one at a
+        # time, but without holding an operand for each run
+        operands = itertools.repeat(operand, count)
+    if type(value) not in _NUMBERS or operand is not None and type(operand) not in _NUMBERS:
+        return None
+    for operand in operands:
+        if kind == grin.GrinTokenKind.ADD:
+            value += operand
+        elif kind == grin.GrinTokenKind.SUB:
+            value -= operand
+        else:
+            value *= operand
+    return value
+
+class CountedLoopMachine(grin.Machine):
+    def __init__(self, program: grin.Program) -> None:
+        """Initiates the CountedLoopMachine object, which executes exactly
+           as a Machine does, but finishes the counted loops of the
+           program at once whenever it reaches their latch with the
+           condition holding. A traced machine runs every loop one
+           statement at a time, so that each statement is reported"""
+        super().__init__(program)
+        self._loops = {loop.latch: loop for loop in find_counted_loops(program)}
+        self._limit = None
+        self._accelerated = 0
+
+    def run(self, budget: int = None) -> grin.Status:
+        """Executes statements as Machine.run() does. A loop is only
+           finished at once as far as the budget allows"""
+        self._limit = None if budget is None else self._count + budget
+        return super().run(budget)
+
+    def execute_go(self, statement: grin.Statement) -> grin.Status | None:
+        """Executes a GOTO or GOSUB statement, first running as many
+           iterations of a counted loop it closes as it would jump back for"""
+        loop = self._loops.get(self._pc)
+        if loop is not None and self._trace is None:
+            self.accelerate(loop)
+        return super().execute_go(statement)
+
+    def accelerate(self, loop: CountedLoop) -> None:
+        """Runs the iterations of a loop whose latch is being executed,
+           leaving the machine at the latch as if it had run them one
+           statement at a time. Nothing is run unless the values involved
+           are ones the loop's statements can handle on every iteration"""
+        variables = self._variables
+        start = variables.get(loop.counter)
+        bound = variables.get(loop.bound.value) if loop.bound.is_identifier else loop.bound.value
+        if type(start) != int or type(bound) not in _NUMBERS:
+            return
+        count = iterations(start, loop.step, loop.operator, bound)
+        if count is None or count == 0:
+            return
+        length = loop.latch - loop.header + 1
+        if self._limit is not None:
+            count = min(count, (self._limit - self._count) // length)
+            if count == 0:
+                return
+        results = {}
+        for index in range(loop.header, loop.latch):
+            if index == loop.update:
+                continue
+            statement = self._statements[index]
+            value = variables.get(statement.variable)
+            operand = statement.value
+            if operand.is_identifier and operand.value == loop.counter:
+                first = start + loop.step if index > loop.update else start
+                result = accumulate(statement.kind, value, None, first, loop.step, count)
+            else:
+                operand = variables.get(operand.value) if operand.is_identifier else operand.value
+                result = accumulate(statement.kind, value, operand, start, loop.step, count) \
+                         if operand is not None else None
+            if value is None or result is None:
+                return
+            results[statement.variable] = result
+        results[loop.counter] = start + loop.step * count
+        variables.update(results)
+        self._count += count * length
+        self._raw = False
+        self._accelerated += count
+
+    def accelerated(self) -> int:
+        """Returns the number of loop iterations run at once"""
+        return self._accelerated
+
+def run_accelerated(lines: list[str], stdin: TextIO, stdout: TextIO) -> int:
+    """Executes the program as run_context() does under a
+       CountedLoopMachine. Returns the run's exit code"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR
+    return grin.Context(program, stdin, stdout, CountedLoopMachine).run()
+
+__all__ = [CountedLoop.__name__, find_counted_loops.__name__, CountedLoopMachine.__name__,
+           run_accelerated.__name__]
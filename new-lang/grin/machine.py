@@ -0,0 +1,325 @@
+#machine.py
+#contains the Machine class, which executes a linked grin Program one
+#statement at a time and can be suspended and resumed between statements
+import grin
+from enum import Enum
+from typing import Generator
+
+MAX_GOSUB_DEPTH = 10000
+
+class Status(Enum):
+    """Describes why Machine.run() returned"""
+    OUTPUT = 1
+    INPUT = 2
+    PAUSED = 3
+    HALTED = 4
+    ERROR = 5
+
+class EventKind(Enum):
+    """Identifies a kind of event produced by Machine.stream()"""
+    OUTPUT = 1
+    INPUT = 2
+    ERROR = 3
+
+class Event:
+    def __init__(self, kind: EventKind, text: str, machine: 'Machine' = None) -> None:
+        """Initiates the Event object"""
+        self._kind = kind
+        self._text = text
+        self._machine = machine
+
+    def kind(self) -> EventKind:
+        """Returns the kind of event"""
+        return self._kind
+
+    def text(self) -> str:
+        """Returns the printed text of an OUTPUT or ERROR event, or the
+           keyword of the statement waiting on an INPUT event"""
+        return self._text
+
+    def reply(self, entry: str) -> None:
+        """Provides the entry that an INPUT event is waiting on"""
+        self._machine.provide(entry)
+
+class Machine:
+    def __init__(self, program: grin.Program) -> None:
+        """Initiates the Machine object with fresh variables and an empty
+           GOSUB stack"""
+        self._program = program
+        self._statements = program.statements()
+        self._labels = program.labels()
+        self._variables = {}
+        self._stack = []
+        self._pc = 0
+        self._raw = True
+        self._count = 0
+        self._status = None
+        self._output = None
+        self._input = None
+        self._error = None
+        self._trace = None
+        self._handlers = {
+            grin.GrinTokenKind.LET: self.execute_let,
+            grin.GrinTokenKind.PRINT: self.execute_print,
+            grin.GrinTokenKind.ADD: self.execute_math,
+            grin.GrinTokenKind.SUB: self.execute_math,
+            grin.GrinTokenKind.MULT: self.execute_math,
+            grin.GrinTokenKind.DIV: self.execute_math,
+            grin.GrinTokenKind.INNUM: self.execute_input,
+            grin.GrinTokenKind.INSTR: self.execute_input,
+            grin.GrinTokenKind.GOTO: self.execute_go,
+            grin.GrinTokenKind.GOSUB: self.execute_go,
+            grin.GrinTokenKind.RETURN: self.execute_leave,
+            grin.GrinTokenKind.END: self.execute_leave
+        }
+
+    def run(self, budget: int = None) -> Status:
+        """Executes statements until the program produces output, waits
+           on input, finishes, fails, or has executed budget statements.
+           Returns the Status describing which of these happened"""
+        if self._status == Status.HALTED or self._status == Status.ERROR:
+            return self._status
+        statements = self._statements
+        handlers = self._handlers
+        size = len(statements)
+        limit = None if budget is None else self._count + budget
+        while True:
+            pc = self._pc
+            if pc >= size:
+                status = self.leave()
+            elif limit is not None and self._count >= limit:
+                status = Status.PAUSED
+            else:
+                statement = statements[pc]
+                if self._raw and statement.label is not None:
+                    # Like State.process_grin, the main program steps over
+                    # labeled lines until it takes its first jump
+                    self._pc = pc + 1
+                    continue
+                self._count += 1
+                status = handlers[statement.kind](statement)
+            if status is not None:
+                self._status = status
+                return status
+
+    def load(self, pc: int, raw: bool, stack: list[tuple[int, bool]], variables: dict,
+             count: int) -> None:
+        """Puts the machine in the state it would have after executing count
+           statements and arriving at the statement at index pc, with the
+           given GOSUB stack of (return index, raw) pairs and variables. A
+           traced machine goes on reporting writes to the new variables"""
+        self._pc = pc
+        self._raw = raw
+        self._stack = stack
+        self._variables = variables if self._trace is None else \
+                          grin.trace.TracedVariables(self._trace, variables)
+        self._count = count
+
+    def read(self, operand: grin.Operand) -> str | int | float:
+        """Returns the value of an operand, giving identifiers that have
+           not been set the default value of 0"""
+        if operand.is_identifier:
+            return self._variables.setdefault(operand.value, 0)
+        return operand.value
+
+    def fail(self, statement: grin.Statement, message: str) -> Status:
+        """Records a GrinError message for the given statement"""
+        self._error = f'ERROR AT LINE {statement.line}: {message}'
+        return Status.ERROR
+
+    def leave(self) -> Status | None:
+        """Returns from the current GOSUB, or halts the program if there
+           is no GOSUB to return from"""
+        if self._stack:
+            self._pc, self._raw = self._stack.pop()
+            return None
+        return Status.HALTED
+
+    def execute_let(self, statement: grin.Statement) -> None:
+        """Executes a LET statement"""
+        self._variables[statement.variable] = self.read(statement.value)
+        self._pc += 1
+
+    def execute_print(self, statement: grin.Statement) -> Status:
+        """Executes a PRINT statement"""
+        self._output = str(self.read(statement.value))
+        self._pc += 1
+        return Status.OUTPUT
+
+    def execute_math(self, statement: grin.Statement) -> Status | None:
+        """Executes an ADD, SUB, MULT or DIV statement"""
+        first = self._variables.setdefault(statement.variable, 0)
+        second = self.read(statement.value)
+        kind = statement.kind
+        try:
+            if kind == grin.GrinTokenKind.ADD:
+                result = first + second
+            elif kind == grin.GrinTokenKind.SUB:
+                result = first - second
+            elif kind == grin.GrinTokenKind.MULT:
+                result = first * second
+            elif type(first) == int and type(second) == int:
+                result = first // second
+            else:
+                result = first / second
+        except TypeError:
+            return self.fail(statement, 'FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES')
+        except ZeroDivisionError:
+            return self.fail(statement, 'CANNOT DIVIDE BY ZERO')
+        self._variables[statement.variable] = result
+        self._pc += 1
+
+    def execute_input(self, statement: grin.Statement) -> Status | None:
+        """Executes an INNUM or INSTR statement using the entry given to
+           provide(), or asks for one if none is waiting"""
+        entry = self._input
+        if entry is None:
+            # The statement runs again once an entry is provided
+            self._count -= 1
+            return Status.INPUT
+        self._input = None
+        if statement.kind == grin.GrinTokenKind.INNUM:
+            i = grin.to_int(entry)
+            self._variables[statement.variable] = i if i is not None else grin.to_float(entry)
+        else:
+            self._variables[statement.variable] = entry
+        self._pc += 1
+
+    def compare(self, statement: grin.Statement) -> bool | Status:
+        """Evaluates the condition of a GOTO or GOSUB statement"""
+        condition = statement.condition
+        value1 = self.read(condition.left)
+        value2 = self.read(condition.right)
+        sign = condition.operator
+        try:
+            if sign == grin.GrinTokenKind.LESS_THAN:
+                return value1 < value2
+            elif sign == grin.GrinTokenKind.LESS_THAN_OR_EQUAL:
+                return value1 <= value2
+            elif sign == grin.GrinTokenKind.GREATER_THAN:
+                return value1 > value2
+            elif sign == grin.GrinTokenKind.GREATER_THAN_OR_EQUAL:
+                return value1 >= value2
+            elif sign == grin.GrinTokenKind.EQUAL:
+                return value1 == value2
+            else:
+                return value1 != value2
+        except TypeError:
+            return self.fail(statement, 'CANNOT COMPARE TYPES')
+
+    def resolve(self, statement: grin.Statement) -> int | Status | None:
+        """Returns the index of the statement a jump lands on, or None if
+           its target names nothing that can be jumped to"""
+        destination = statement.destination
+        if destination is None:
+            if statement.target not in self._variables:
+                return None
+            value = self._variables[statement.target]
+            if type(value) == int:
+                destination = statement.line + value - 1
+                if destination > len(self._statements) or destination < 0:
+                    destination = grin.program.OUT_OF_BOUNDS
+            elif value in self._labels:
+                return self._labels[value]
+            else:
+                return None
+        if destination == grin.program.OUT_OF_BOUNDS:
+            return self.fail(statement, 'TARGET LINE IS OUT OF BOUNDS')
+        return destination
+
+    def execute_go(self, statement: grin.Statement) -> Status | None:
+        """Executes a GOTO or GOSUB statement. A GOTO whose target cannot
+           be resolved leaves the current GOSUB, as State.process_grin does"""
+        if statement.condition is not None:
+            valid = self.compare(statement)
+            if valid is Status.ERROR:
+                return valid
+            if not valid:
+                self._pc += 1
+                return None
+        destination = self.resolve(statement)
+        if destination is Status.ERROR:
+            return destination
+        if statement.kind == grin.GrinTokenKind.GOTO:
+            if destination is None:
+                return self.leave()
+        elif destination is None:
+            self._pc += 1
+            return None
+        else:
+            if len(self._stack) >= MAX_GOSUB_DEPTH:
+                return self.fail(statement, 'MAXIMUM RECURSION REACHED')
+            self._stack.append((self._pc + 1, self._raw))
+        self._pc = destination
+        self._raw = False
+        return None
+
+    def execute_leave(self, statement: grin.Statement) -> Status | None:
+        """Executes a RETURN or END statement"""
+        return self.leave()
+
+    def set_trace(self, callback: 'grin.trace.TraceCallback | None') -> None:
+        """Calls callback(kind, statement, argument) on each statement
+           executed, jump or GOSUB taken, GOSUB frame left and variable
+           written, as described by grin.TraceKind, until it is replaced or
+           removed with None. Only a traced machine pays for the reports"""
+        grin.trace.install(self, callback)
+
+    def provide(self, entry: str) -> None:
+        """Provides the entry that a waiting INNUM or INSTR statement reads"""
+        self._input = entry
+
+    def output(self) -> str:
+        """Returns the text printed by the most recent PRINT statement"""
+        return self._output
+
+    def error(self) -> str:
+        """Returns the GrinError message of a failed program"""
+        return self._error
+
+    def status(self) -> Status | None:
+        """Returns the Status of the most recent call to run()"""
+        return self._status
+
+    def count(self) -> int:
+        """Returns the number of statements executed so far"""
+        return self._count
+
+    def get_identifiers(self) -> dict:
+        """Returns the identifier dictionary"""
+        return self._variables
+
+    def stream(self) -> Generator[Event, str, None]:
+        """Executes the program, yielding an Event for each line printed
+           and each entry waited on. The entry for an INPUT event is given
+           either by sending it into the generator or by Event.reply()"""
+        while True:
+            status = self.run()
+            if status == Status.OUTPUT:
+                yield Event(EventKind.OUTPUT, self._output)
+            elif status == Status.INPUT:
+                statement = self._statements[self._pc]
+                entry = yield Event(EventKind.INPUT, statement.kind.name, self)
+                if entry is not None:
+                    self.provide(entry)
+                elif self._input is None:
+                    raise EOFError(f'no input provided at line {statement.line}')
+            elif status == Status.ERROR:
+                yield Event(EventKind.ERROR, self._error)
+                return
+            else:
+                return
+
+def stream(lines: list[str]) -> Generator[Event, str, None]:
+    """Parses the given lines and streams the execution of the program,
+       as Machine.stream() does. A program that fails to parse produces a
+       single ERROR event"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        yield Event(EventKind.ERROR, grin.parse_error_message(e))
+        return
+    yield from Machine(program).stream()
+
+__all__ = [Machine.__name__, Status.__name__, Event.__name__, EventKind.__name__,
+           stream.__name__]
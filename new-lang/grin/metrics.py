@@ -0,0 +1,119 @@
+#metrics.py
+#contains MeteredMachine, a Machine that keeps counters describing a run,
+#and the functions that time a program's parse, link and execute phases
+import grin
+import time
+from typing import TextIO
+
+class MeteredMachine(grin.Machine):
+    def __init__(self, program: grin.Program) -> None:
+        """Initiates the MeteredMachine object, which executes exactly as a
+           Machine does while counting jumps, GOSUB depth and string sizes"""
+        super().__init__(program)
+        self._jumps = {'GOTO': 0, 'GOSUB': 0, 'RETURN': 0}
+        self._deepest = 0
+        self._longest = 0
+
+    def resolve(self, statement: grin.Statement) -> int | grin.Status | None:
+        """Resolves a jump as Machine.resolve() does, counting a GOTO if it
+           is taken"""
+        destination = super().resolve(statement)
+        if type(destination) == int and statement.kind == grin.GrinTokenKind.GOTO:
+            self._jumps['GOTO'] += 1
+        return destination
+
+    def execute_go(self, statement: grin.Statement) -> grin.Status | None:
+        """Executes a GOTO or GOSUB as Machine.execute_go() does, counting a
+           GOSUB once its frame is pushed, so that one refused at the
+           maximum depth is not"""
+        depth = len(self._stack)
+        status = super().execute_go(statement)
+        if len(self._stack) > depth:
+            self._jumps['GOSUB'] += 1
+            self._deepest = max(self._deepest, len(self._stack))
+        return status
+
+    def leave(self) -> grin.Status | None:
+        """Leaves a GOSUB as Machine.leave() does, counting the return"""
+        if self._stack:
+            self._jumps['RETURN'] += 1
+        return super().leave()
+
+    def measure(self, statement: grin.Statement) -> None:
+        """Updates the largest string size with the variable a statement set"""
+        value = self._variables.get(statement.variable)
+        if type(value) == str and len(value) > self._longest:
+            self._longest = len(value)
+
+    def execute_let(self, statement: grin.Statement) -> None:
+        super().execute_let(statement)
+        self.measure(statement)
+
+    def execute_math(self, statement: grin.Statement) -> grin.Status | None:
+        status = super().execute_math(statement)
+        self.measure(statement)
+        return status
+
+    def execute_input(self, statement: grin.Statement) -> grin.Status | None:
+        status = super().execute_input(statement)
+        self.measure(statement)
+        return status
+
+    def metrics(self) -> dict:
+        """Returns the counters of the run so far"""
+        return {'statements': self._count, 'jumps': dict(self._jumps),
+                'max_gosub_depth': self._deepest, 'variables': len(self._variables),
+                'largest_string': self._longest}
+
+class _Phase:
+    def __init__(self, phases: dict, name: str) -> None:
+        """Initiates the timer of one phase, recorded into phases"""
+        self._phases = phases
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def __exit__(self, *exc_info) -> None:
+        self._phases[self._name] = {'wall': time.perf_counter() - self._wall,
+                                    'cpu': time.process_time() - self._cpu}
+
+def run_metered(lines: list[str], stdin: TextIO, stdout: TextIO) -> tuple[int, dict]:
+    """Executes the program as run_context() does under a MeteredMachine.
+       Returns the run's exit code and its metrics, which add the wall and
+       CPU seconds of each phase to MeteredMachine.metrics()"""
+    phases = {}
+    try:
+        with _Phase(phases, 'parse'):
+            statements = [grin.program.to_statement(tokens) for tokens in grin.parsing.parse(lines)]
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR, {'phases': phases}
+    with _Phase(phases, 'link'):
+        program = grin.Program.from_statements(statements)
+    context = grin.Context(program, stdin, stdout, MeteredMachine)
+    with _Phase(phases, 'execute'):
+        code = context.run()
+    metrics = context.machine().metrics()
+    metrics['phases'] = phases
+    return code, metrics
+
+def format_metrics(metrics: dict) -> str:
+    """Formats metrics as the summary printed at the end of a run"""
+    summary = []
+    phases = metrics.get('phases', {})
+    execute = phases.get('execute', {}).get('wall')
+    if 'statements' in metrics:
+        rate = f' ({metrics["statements"] / execute:,.0f}/s)' if execute else ''
+        jumps = ', '.join(f'{kind} {count}' for kind, count in metrics['jumps'].items())
+        summary.extend([f'statements executed: {metrics["statements"]}{rate}',
+                        f'jumps taken: {jumps}',
+                        f'max GOSUB depth: {metrics["max_gosub_depth"]}',
+                        f'live variables: {metrics["variables"]}',
+                        f'largest string: {metrics["largest_string"]}'])
+    for name, times in phases.items():
+        summary.append(f'{name}: {times["wall"] * 1000:.3f} ms wall, {times["cpu"] * 1000:.3f} ms cpu')
+    return '\n'.join(summary)
+
+__all__ = [MeteredMachine.__name__, run_metered.__name__, format_metrics.__name__]
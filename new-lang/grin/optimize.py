@@ -0,0 +1,324 @@
+#optimize.py
+#contains the optimizing passes over linked grin programs, which rewrite
+#and remove statements without changing what a Machine prints, including
+#the line numbers in its error messages
+import grin
+
+MAX_ROUNDS = 8
+MAX_FOLDED_LENGTH = 1000
+MAX_FOLDED_INT = 2 ** 64
+
+_MATH = {grin.GrinTokenKind.ADD, grin.GrinTokenKind.SUB, grin.GrinTokenKind.MULT,
+         grin.GrinTokenKind.DIV}
+_JUMPS = {grin.GrinTokenKind.GOTO, grin.GrinTokenKind.GOSUB}
+_INPUTS = {grin.GrinTokenKind.INNUM, grin.GrinTokenKind.INSTR}
+_WRITES = _MATH | _INPUTS | {grin.GrinTokenKind.LET}
+_INHERITED = {grin.EdgeKind.FALL, grin.EdgeKind.JUMP, grin.EdgeKind.BRANCH}
+_CALLS = {grin.EdgeKind.CALL, grin.EdgeKind.DYNAMIC_CALL}
+_UNKNOWN = object()
+
+def compute(kind: grin.GrinTokenKind, first: str | int | float,
+            second: str | int | float) -> str | int | float:
+    """Returns the result of an ADD, SUB, MULT or DIV statement as
+       Machine.execute_math computes it, raising the TypeError or
+       ZeroDivisionError that makes it fail"""
+    if kind == grin.GrinTokenKind.ADD:
+        return first + second
+    elif kind == grin.GrinTokenKind.SUB:
+        return first - second
+    elif kind == grin.GrinTokenKind.MULT:
+        return first * second
+    elif type(first) == int and type(second) == int:
+        return first // second
+    return first / second
+
+def compare(operator: grin.GrinTokenKind, first: str | int | float,
+            second: str | int | float) -> bool:
+    """Returns the result of a condition as Machine.compare computes it,
+       raising the TypeError that makes it fail"""
+    if operator == grin.GrinTokenKind.LESS_THAN:
+        return first < second
+    elif operator == grin.GrinTokenKind.LESS_THAN_OR_EQUAL:
+        return first <= second
+    elif operator == grin.GrinTokenKind.GREATER_THAN:
+        return first > second
+    elif operator == grin.GrinTokenKind.GREATER_THAN_OR_EQUAL:
+        return first >= second
+    elif operator == grin.GrinTokenKind.EQUAL:
+        return first == second
+    return first != second
+
+def affordable(kind: grin.GrinTokenKind, first: str | int | float,
+               second: str | int | float) -> bool:
+    """Returns whether the result of an ADD, SUB, MULT or DIV statement may
+       be small enough to fold. A repeated string or a product of integers
+       can be far too large to build, so its size is bounded from the
+       operands before it is computed"""
+    if kind != grin.GrinTokenKind.MULT:
+        return True
+    if type(first) == str and type(second) == int:
+        return len(first) * second <= MAX_FOLDED_LENGTH
+    if type(first) == int and type(second) == str:
+        return first * len(second) <= MAX_FOLDED_LENGTH
+    if type(first) == int and type(second) == int:
+        return first.bit_length() + second.bit_length() <= MAX_FOLDED_INT.bit_length() + 1
+    return True
+
+def foldable(value: str | int | float) -> bool:
+    """Returns whether a computed value is small enough to write into the
+       program as a literal"""
+    if type(value) == str:
+        return len(value) <= MAX_FOLDED_LENGTH
+    return type(value) != int or abs(value) <= MAX_FOLDED_INT
+
+def read(operand: grin.Operand, known: dict) -> str | int | float:
+    """Returns the value of an operand, or _UNKNOWN if it names an
+       identifier whose value is not known"""
+    if operand.is_identifier:
+        return known.get(operand.value, _UNKNOWN)
+    return operand.value
+
+def resolved(operand: grin.Operand, known: dict) -> grin.Operand:
+    """Returns the operand, replaced by a literal if its value is known.
+       Only identifiers that have been written are known, so the read they
+       are replaced in could not have created them"""
+    value = read(operand, known)
+    return operand if value is _UNKNOWN else grin.Operand(False, value)
+
+def always_false(statement: grin.Statement) -> bool:
+    """Returns whether a statement is a jump whose condition compares two
+       literals and can never hold"""
+    condition = statement.condition
+    if statement.kind not in _JUMPS or condition is None or \
+       condition.left.is_identifier or condition.right.is_identifier:
+        return False
+    try:
+        return not compare(condition.operator, condition.left.value, condition.right.value)
+    except TypeError:
+        return False
+
+def fold_statement(statement: grin.Statement, known: dict, labels: dict[str, int],
+                   size: int) -> grin.Statement:
+    """Returns the statement with the known values of its operands written
+       in, its arithmetic folded into a LET and a condition that always
+       holds dropped, and updates known with the values it writes. A
+       statement that would fail is left to fail when it runs"""
+    kind = statement.kind
+    if kind == grin.GrinTokenKind.LET:
+        value = read(statement.value, known)
+        if value is _UNKNOWN:
+            known.pop(statement.variable, None)
+            return statement
+        known[statement.variable] = value
+        return statement._replace(value = grin.Operand(False, value))
+    elif kind in _MATH:
+        statement = statement._replace(value = resolved(statement.value, known))
+        first = known.pop(statement.variable, _UNKNOWN)
+        second = read(statement.value, known)
+        if first is _UNKNOWN or second is _UNKNOWN or not affordable(kind, first, second):
+            return statement
+        try:
+            result = compute(kind, first, second)
+        except (TypeError, ZeroDivisionError, OverflowError, MemoryError):
+            return statement
+        if not foldable(result):
+            return statement
+        known[statement.variable] = result
+        return grin.Statement(grin.GrinTokenKind.LET, statement.line, statement.label,
+                              variable = statement.variable, value = grin.Operand(False, result))
+    elif kind == grin.GrinTokenKind.PRINT:
+        return statement._replace(value = resolved(statement.value, known))
+    elif kind in _INPUTS:
+        known.pop(statement.variable, None)
+        return statement
+    elif kind in _JUMPS:
+        condition = statement.condition
+        if condition is not None:
+            condition = condition._replace(left = resolved(condition.left, known),
+                                           right = resolved(condition.right, known))
+            statement = statement._replace(condition = condition)
+            if not condition.left.is_identifier and not condition.right.is_identifier:
+                try:
+                    if compare(condition.operator, condition.left.value, condition.right.value):
+                        statement = statement._replace(condition = None)
+                except TypeError:
+                    pass
+        if statement.destination is None and statement.target in known:
+            # A jump through an identifier whose value is known is linked
+            # as Machine.resolve would resolve it. An integer keeps the
+            # identifier as its target, since it counts lines differently
+            # from an integer written in the jump
+            value = known[statement.target]
+            if type(value) == int:
+                destination = statement.line + value - 1
+                if destination > size or destination < 0:
+                    destination = grin.program.OUT_OF_BOUNDS
+                statement = statement._replace(destination = destination)
+            elif value in labels:
+                statement = statement._replace(target = value, destination = labels[value])
+    return statement
+
+def fold(program: grin.Program, cfg: grin.ControlFlowGraph) -> list[grin.Statement]:
+    """Returns the statements with the values known along straight-line
+       code written in and folded. What is known at the end of a block
+       carries into a block that can only be entered from it, unless a
+       GOSUB runs in between"""
+    statements = list(program.statements())
+    labels = program.labels()
+    blocks = cfg.blocks()
+    out = {}
+    for index in cfg.reverse_postorder():
+        block = blocks[index]
+        known = {}
+        entering = cfg.predecessors(index)
+        if len(entering) == 1 and entering[0].kind in _INHERITED and entering[0].source in out:
+            source = blocks[entering[0].source]
+            if source.start == source.end or \
+               statements[source.end - 1].kind != grin.GrinTokenKind.GOSUB:
+                known = dict(out[source.index])
+        for position in range(block.start, block.end):
+            statements[position] = fold_statement(statements[position], known, labels,
+                                                  len(statements))
+        out[index] = known
+    return statements
+
+def remove(program: grin.Program, keep: list[bool]) -> grin.Program:
+    """Returns the program without the statements not kept. A jump to a
+       removed statement lands on the next one kept, and the statements
+       keep their line numbers"""
+    statements = program.statements()
+    forward = [0] * (len(statements) + 1)
+    forward[len(statements)] = sum(keep)
+    for index in reversed(range(len(statements))):
+        forward[index] = forward[index + 1] - 1 if keep[index] else forward[index + 1]
+    kept = []
+    for index, statement in enumerate(statements):
+        if keep[index]:
+            destination = statement.destination
+            if destination is not None and destination != grin.program.OUT_OF_BOUNDS:
+                statement = statement._replace(destination = forward[destination])
+            kept.append(statement)
+    labels = {name: forward[index] for name, index in program.labels().items() if keep[index]}
+    return grin.Program.from_linked(kept, labels)
+
+def reachable(cfg: grin.ControlFlowGraph) -> list[bool]:
+    """Returns whether each statement of the graph's program is in a block
+       that can be reached from the entry"""
+    blocks = cfg.reachable()
+    return [cfg.block_of(index).index in blocks for index in range(len(cfg.program().statements()))]
+
+def fold_constants(program: grin.Program) -> grin.Program:
+    """Returns a program that prints what the given one prints, with known
+       values propagated through straight-line code, arithmetic on them
+       folded as Machine.execute_math computes it, conditional jumps that always
+       or never jump resolved, and statements that cannot be reached
+       removed. A program with a jump through an identifier that may hold
+       anything is returned unchanged"""
+    for _ in range(MAX_ROUNDS):
+        cfg = grin.ControlFlowGraph(program)
+        if cfg.unknown_targets():
+            return program
+        statements = fold(program, cfg)
+        folded = grin.Program.from_linked(statements, program.labels())
+        cfg = grin.ControlFlowGraph(folded)
+        if not cfg.offset_jumps():
+            keep = [kept and (statement.label is not None or not always_false(statement))
+                    for kept, statement in zip(reachable(cfg), statements)]
+            folded = remove(folded, keep)
+        if folded.statements() == program.statements():
+            return folded
+        program = folded
+    return program
+
+def accesses(statement: grin.Statement) -> tuple[set[str], str | None]:
+    """Returns the identifiers a statement reads and the variable it
+       writes, if any. A jump through an identifier reads it, since
+       whether the identifier exists decides where the jump lands"""
+    reads = set()
+    operands = [statement.value]
+    if statement.kind in _MATH:
+        reads.add(statement.variable)
+    elif statement.kind in _JUMPS:
+        if statement.condition is not None:
+            operands = [statement.condition.left, statement.condition.right]
+        if statement.destination is None:
+            reads.add(statement.target)
+    for operand in operands:
+        if operand is not None and operand.is_identifier:
+            reads.add(operand.value)
+    return reads, statement.variable if statement.kind in _WRITES else None
+
+def live_out(cfg: grin.ControlFlowGraph, live_in: dict[int, set[str]], block: int) -> set[str]:
+    """Returns the variables that may be read after a block runs"""
+    live = set()
+    for edge in cfg.successors(block):
+        live |= live_in[edge.target]
+    return live
+
+def live_variables(cfg: grin.ControlFlowGraph) -> dict[int, set[str]]:
+    """Returns the variables that may be read after entering each block.
+       Leaving a frame returns past some GOSUB, so what may be read where
+       its block goes on, other than into the call, is live on leaving.
+       That includes the statements a GOSUB returning in raw mode steps to
+       past labeled lines"""
+    statements = cfg.program().statements()
+    returns = {edge.target for index, statement in enumerate(statements)
+               if statement.kind == grin.GrinTokenKind.GOSUB
+               for edge in cfg.successors(cfg.block_of(index).index) if edge.kind not in _CALLS}
+    live_in = {block.index: set() for block in cfg.blocks()}
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(cfg.blocks()):
+            if block.index == cfg.exit():
+                live = set().union(*(live_in[site] for site in returns))
+            else:
+                live = live_out(cfg, live_in, block.index)
+                for index in reversed(range(block.start, block.end)):
+                    reads, written = accesses(statements[index])
+                    live.discard(written)
+                    live |= reads
+            if live != live_in[block.index]:
+                live_in[block.index] = live
+                changed = True
+    return live_in
+
+def dead_stores(cfg: grin.ControlFlowGraph) -> set[int]:
+    """Returns the indexes of the unlabeled LET statements whose value is
+       overwritten or never read. A LET reading an identifier that a jump
+       goes through is kept, since the read may create it"""
+    statements = cfg.program().statements()
+    probed = {statement.target for statement in statements
+              if statement.kind in _JUMPS and statement.destination is None}
+    live_in = live_variables(cfg)
+    dead = set()
+    for block in cfg.blocks():
+        live = live_out(cfg, live_in, block.index)
+        for index in reversed(range(block.start, block.end)):
+            statement = statements[index]
+            reads, written = accesses(statement)
+            if statement.kind == grin.GrinTokenKind.LET and statement.label is None and \
+               written not in live and not reads & probed:
+                dead.add(index)
+                continue
+            live.discard(written)
+            live |= reads
+    return dead
+
+def eliminate_dead_code(program: grin.Program) -> grin.Program:
+    """Returns a program that prints what the given one prints, without
+       the statements that cannot be reached and the LET statements whose
+       value is never read. A program with a jump through an identifier
+       that may hold anything or a line offset is returned unchanged"""
+    for _ in range(MAX_ROUNDS):
+        cfg = grin.ControlFlowGraph(program)
+        if cfg.unknown_targets() or cfg.offset_jumps():
+            return program
+        dead = dead_stores(cfg)
+        keep = [kept and index not in dead for index, kept in enumerate(reachable(cfg))]
+        if all(keep):
+            return program
+        program = remove(program, keep)
+    return program
+
+__all__ = [fold_constants.__name__, eliminate_dead_code.__name__]
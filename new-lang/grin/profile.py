@@ -0,0 +1,115 @@
+#profile.py
+#contains ProfiledMachine, a Machine whose dispatch loop records how often
+#each line runs and how long it takes, and the report built from it
+import grin
+import json
+import time
+from typing import TextIO
+
+class ProfiledMachine(grin.Machine):
+    def __init__(self, program: grin.Program) -> None:
+        """Initiates the ProfiledMachine object, which executes exactly as a
+           Machine does while counting and timing every statement"""
+        super().__init__(program)
+        size = len(self._statements)
+        self._counts = [0] * size
+        self._times = [0.0] * size
+        self._callee_times = [0.0] * size
+        self._calls = []
+        self._outside = 0.0
+        self._left = None
+
+    def run(self, budget: int = None) -> grin.Status:
+        """Executes statements as Machine.run() does. Each statement's own
+           time is charged to its line, and the time from a GOSUB until its
+           frame is left is charged to the line of the GOSUB as callee time.
+           Time spent outside run(), such as waiting on input, is not charged"""
+        if self._status == grin.Status.HALTED or self._status == grin.Status.ERROR:
+            return self._status
+        if self._left is not None:
+            self._outside += time.perf_counter() - self._left
+        statements = self._statements
+        handlers = self._handlers
+        counts = self._counts
+        times = self._times
+        callee_times = self._callee_times
+        calls = self._calls
+        outside = self._outside
+        clock = lambda: time.perf_counter() - outside
+        size = len(statements)
+        limit = None if budget is None else self._count + budget
+        while True:
+            pc = self._pc
+            depth = len(self._stack)
+            start = clock()
+            if pc >= size:
+                status = self.leave()
+            elif limit is not None and self._count >= limit:
+                status = grin.Status.PAUSED
+            else:
+                statement = statements[pc]
+                if self._raw and statement.label is not None:
+                    self._pc = pc + 1
+                    continue
+                self._count += 1
+                status = handlers[statement.kind](statement)
+                if status != grin.Status.INPUT:
+                    counts[pc] += 1
+            end = clock()
+            if pc < size and status != grin.Status.INPUT and status != grin.Status.PAUSED:
+                times[pc] += end - start
+            if len(self._stack) > depth:
+                calls.append((pc, end))
+            elif len(self._stack) < depth:
+                caller, called = calls.pop()
+                callee_times[caller] += end - called
+            if status is not None:
+                self._status = status
+                self._left = time.perf_counter()
+                return status
+
+    def profile(self) -> list[dict]:
+        """Returns one dictionary per line that has run, holding its line
+           number, execution count, own time, and time spent in callees of
+           a GOSUB on that line, in seconds"""
+        rows = []
+        for index, statement in enumerate(self._statements):
+            if self._counts[index]:
+                rows.append({'line': statement.line, 'count': self._counts[index],
+                             'seconds': self._times[index],
+                             'callee_seconds': self._callee_times[index]})
+        return rows
+
+def format_profile(rows: list[dict], lines: list[str] = None, limit: int = None) -> str:
+    """Formats a profile as a table sorted by cumulative time, the sum of a
+       line's own time and its callee time, with the source of each line if
+       lines are given"""
+    rows = sorted(rows, key = lambda row: row['seconds'] + row['callee_seconds'], reverse = True)
+    table = [f'{"LINE":>6} {"COUNT":>10} {"OWN (ms)":>12} {"CALLEES (ms)":>14} {"TOTAL (ms)":>12}  SOURCE']
+    for row in rows[:limit]:
+        source = '' if lines is None else lines[row['line'] - 1].strip()
+        total = row['seconds'] + row['callee_seconds']
+        table.append(f'{row["line"]:>6} {row["count"]:>10} {row["seconds"] * 1000:>12.3f} '
+                     f'{row["callee_seconds"] * 1000:>14.3f} {total * 1000:>12.3f}  {source}')
+    return '\n'.join(table)
+
+def run_profiled(lines: list[str], stdin: TextIO, stdout: TextIO, report: TextIO,
+                 path: str = None) -> int:
+    """Executes the program as run_context() does under a ProfiledMachine,
+       then writes the formatted profile to report and, if a path is given,
+       the profile as JSON to that file. Returns the run's exit code"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR
+    context = grin.Context(program, stdin, stdout, ProfiledMachine)
+    code = context.run()
+    rows = context.machine().profile()
+    report.write(format_profile(rows, lines) + '\n')
+    if path is not None:
+        with open(path, 'w') as file:
+            json.dump(rows, file, indent = 2)
+    return code
+
+__all__ = [ProfiledMachine.__name__, format_profile.__name__, run_profiled.__name__]
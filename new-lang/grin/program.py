@@ -0,0 +1,119 @@
+#program.py
+#contains the Program class, which parses and links a grin program once so
+#that it can be executed without going back to its tokens
+import grin
+from typing import Iterable, NamedTuple
+
+class Operand(NamedTuple):
+    """A value used by a statement, which is either a literal value or
+       the name of an identifier"""
+    is_identifier: bool
+    value: str | int | float
+
+class Condition(NamedTuple):
+    """The comparison following IF in a GOTO or GOSUB statement"""
+    left: Operand
+    operator: grin.GrinTokenKind
+    right: Operand
+
+class Statement(NamedTuple):
+    """One linked grin statement. Only the fields that apply to the
+       statement's kind are set; the rest are None"""
+    kind: grin.GrinTokenKind
+    line: int
+    label: str | None = None
+    variable: str | None = None
+    value: Operand | None = None
+    target: int | str | None = None
+    destination: int | None = None
+    condition: Condition | None = None
+
+OUT_OF_BOUNDS = -1
+
+def to_operand(token: grin.GrinToken) -> Operand:
+    """Converts a value token into an Operand"""
+    return Operand(token.kind() == grin.GrinTokenKind.IDENTIFIER, token.value())
+
+def to_statement(tokens: list[grin.GrinToken]) -> Statement:
+    """Converts the tokens of one parsed line into an unlinked Statement"""
+    label = None
+    if len(tokens) > 1 and tokens[1].kind() == grin.GrinTokenKind.COLON:
+        label = tokens[0].value()
+        tokens = tokens[2:]
+    kind = tokens[0].kind()
+    line = tokens[0].location().line()
+
+    if kind == grin.GrinTokenKind.PRINT:
+        return Statement(kind, line, label, value = to_operand(tokens[1]))
+    elif kind == grin.GrinTokenKind.INNUM or kind == grin.GrinTokenKind.INSTR:
+        return Statement(kind, line, label, variable = tokens[1].value())
+    elif kind == grin.GrinTokenKind.GOTO or kind == grin.GrinTokenKind.GOSUB:
+        condition = None
+        if len(tokens) > 2:
+            condition = Condition(to_operand(tokens[3]), tokens[4].kind(), to_operand(tokens[5]))
+        return Statement(kind, line, label, target = tokens[1].value(), condition = condition)
+    elif kind == grin.GrinTokenKind.END or kind == grin.GrinTokenKind.RETURN:
+        return Statement(kind, line, label)
+    else:
+        return Statement(kind, line, label, variable = tokens[1].value(),
+                         value = to_operand(tokens[2]))
+
+class Program:
+    def __init__(self, lines: Iterable[str]) -> None:
+        """Parses and links the given lines. Raises a GrinParseError or
+           GrinLexError if the lines cannot be parsed"""
+        self.link_all([to_statement(tokens) for tokens in grin.parsing.parse(lines)])
+
+    @classmethod
+    def from_statements(cls, statements: list[Statement]) -> 'Program':
+        """Links statements that have already been parsed"""
+        program = cls.__new__(cls)
+        program.link_all(statements)
+        return program
+
+    @classmethod
+    def from_linked(cls, statements: list[Statement], labels: dict[str, int]) -> 'Program':
+        """Wraps statements whose jumps are already linked, such as those an
+           optimizing pass has rewritten, without linking them again"""
+        program = cls.__new__(cls)
+        program._statements = statements
+        program._labels = labels
+        return program
+
+    def link_all(self, statements: list[Statement]) -> None:
+        """Collects the labels of the statements and links each of them"""
+        self._labels = {}
+        for index, statement in enumerate(statements):
+            if statement.label is not None:
+                self._labels[statement.label] = index
+        self._statements = [self.link(statement, len(statements)) for statement in statements]
+
+    def link(self, statement: Statement, size: int) -> Statement:
+        """Resolves the destination of a jump whose target is known before
+           the program runs: an integer offset, or the name of a label.
+           Targets naming an identifier are left to be resolved at run time"""
+        target = statement.target
+        if type(target) == int:
+            limit = statement.line + target
+            if limit > size or limit < 0:
+                return statement._replace(destination = OUT_OF_BOUNDS)
+            return statement._replace(destination = (limit - 1) % size)
+        elif target in self._labels:
+            return statement._replace(destination = self._labels[target])
+        return statement
+
+    def statements(self) -> list[Statement]:
+        """Returns the linked statements, one per line of the program"""
+        return self._statements
+
+    def labels(self) -> dict[str, int]:
+        """Returns a dictionary mapping each label to the index of the
+           statement it labels"""
+        return self._labels
+
+def parse_error_message(error: grin.GrinParseError | grin.GrinLexError) -> str:
+    """Returns the message printed when a program fails to parse"""
+    return f'ERROR AT LINE {error.location().line()}: FAILED TO PARSE INPUT'
+
+__all__ = [Program.__name__, Statement.__name__, Operand.__name__, Condition.__name__,
+           parse_error_message.__name__]
@@ -0,0 +1,97 @@
+#sampling.py
+#contains SamplingProfiler, which periodically records the line a Machine is
+#executing and the GOSUB calls that led there, and writes the samples in the
+#collapsed-stack format read by flamegraph tools
+import grin
+import threading
+from typing import TextIO
+
+DEFAULT_INTERVAL = 0.001
+ROOT = 'main'
+
+class SamplingProfiler:
+    def __init__(self, machine: grin.Machine, lines: list[str] = None,
+                 interval: float = DEFAULT_INTERVAL) -> None:
+        """Initiates the SamplingProfiler object for a machine, which is
+           sampled every interval seconds by a background thread once
+           start() is called. The machine itself runs uninstrumented. If the
+           program's lines are given, frames are named by their source"""
+        self._machine = machine
+        self._statements = machine._statements
+        self._lines = lines
+        self._interval = interval
+        self._samples = {}
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def frame(self, index: int) -> str:
+        """Returns the name of the frame for the statement at an index"""
+        line = self._statements[index].line
+        if self._lines is None:
+            return f'line {line}'
+        # Semicolons separate frames in the collapsed-stack format
+        return f'{line}: {self._lines[line - 1].strip()}'.replace(';', ',')
+
+    def sample(self) -> None:
+        """Records the machine's current line under the GOSUB statements
+           of its active calls. Samples taken between statements, after the
+           program has fallen off its last line, are skipped"""
+        pc = self._machine._pc
+        stack = list(self._machine._stack)
+        if pc >= len(self._statements):
+            return
+        frames = (ROOT,) + tuple(self.frame(index - 1) for index, _ in stack) + (self.frame(pc),)
+        self._samples[frames] = self._samples.get(frames, 0) + 1
+
+    def start(self) -> None:
+        """Starts sampling on a background thread"""
+        self._stopped.clear()
+        self._thread = threading.Thread(target = self.sample_until_stopped, daemon = True)
+        self._thread.start()
+
+    def sample_until_stopped(self) -> None:
+        """Takes a sample every interval until stop() is called"""
+        while not self._stopped.wait(self._interval):
+            self.sample()
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the background thread to finish"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def samples(self) -> dict[tuple[str, ...], int]:
+        """Returns the number of samples taken of each stack, outermost
+           frame first"""
+        return dict(self._samples)
+
+    def collapsed(self) -> str:
+        """Returns the samples in the collapsed-stack format, one stack per
+           line with its frames joined by semicolons and then its count"""
+        return ''.join(f'{";".join(frames)} {count}\n'
+                       for frames, count in sorted(self._samples.items()))
+
+def run_sampled(lines: list[str], stdin: TextIO, stdout: TextIO, report: TextIO,
+                interval: float = DEFAULT_INTERVAL) -> int:
+    """Executes the program as run_context() does while sampling it, then
+       writes the collapsed stacks to report. Returns the run's exit code"""
+    try:
+        program = grin.Program(lines)
+    except (grin.GrinParseError, grin.GrinLexError) as e:
+        stdout.write(grin.parse_error_message(e) + '\n')
+        return grin.batch.EXIT_ERROR
+    context = grin.Context(program, stdin, stdout)
+    with SamplingProfiler(context.machine(), lines, interval) as profiler:
+        code = context.run()
+    report.write(profiler.collapsed())
+    return code
+
+__all__ = [SamplingProfiler.__name__, run_sampled.__name__]
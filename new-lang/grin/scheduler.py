@@ -0,0 +1,160 @@
+#scheduler.py
+#contains the Scheduler class, which interleaves many grin programs in one
+#thread by running each one for a slice of statements at a time
+import grin
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+class TaskState(Enum):
+    """Describes where a Task is in its life"""
+    READY = 1
+    PARKED = 2
+    FINISHED = 3
+
+class Task:
+    def __init__(self, pid: int, machine: grin.Machine) -> None:
+        """Initiates the Task object, which is one program instance"""
+        self._pid = pid
+        self._machine = machine
+        self._state = TaskState.READY
+        self._entries = deque()
+        self._output = []
+        self._slices = 0
+        self._waits = 0
+
+    def pid(self) -> int:
+        """Returns the id the Scheduler gave this task"""
+        return self._pid
+
+    def machine(self) -> grin.Machine:
+        """Returns the Machine holding this task's variables and stacks"""
+        return self._machine
+
+    def state(self) -> TaskState:
+        """Returns whether the task is ready, parked on input or finished"""
+        return self._state
+
+    def output(self) -> list[str]:
+        """Returns the lines printed so far, including a GrinError message
+           if the program failed"""
+        return self._output
+
+    def statements(self) -> int:
+        """Returns the number of statements this task has executed"""
+        return self._machine.count()
+
+    def slices(self) -> int:
+        """Returns the number of time slices this task has been given"""
+        return self._slices
+
+    def waits(self) -> int:
+        """Returns the number of times this task was parked on input"""
+        return self._waits
+
+class Scheduler:
+    def __init__(self, quantum: int = 100,
+                 on_output: Callable[[int, str], None] = None) -> None:
+        """Initiates the Scheduler object. Each time slice runs at most
+           quantum statements of one task. If on_output is given, it is
+           called with the pid and text of each printed line instead of
+           the line being kept in the task's output"""
+        if quantum < 1:
+            raise ValueError('quantum must be at least one statement')
+        self._quantum = quantum
+        self._on_output = on_output
+        self._tasks = {}
+        self._ready = deque()
+        self._next_pid = 1
+
+    def spawn(self, program: grin.Program) -> int:
+        """Adds a new instance of the given program and returns its pid"""
+        pid = self._next_pid
+        self._next_pid += 1
+        task = Task(pid, grin.Machine(program))
+        self._tasks[pid] = task
+        self._ready.append(task)
+        return pid
+
+    def feed(self, pid: int, entry: str) -> None:
+        """Queues an entry for the task's next INNUM or INSTR statement,
+           waking the task if it is parked waiting for one"""
+        task = self._tasks[pid]
+        task._entries.append(entry)
+        if task._state == TaskState.PARKED:
+            task._state = TaskState.READY
+            self._ready.append(task)
+
+    def step(self) -> bool:
+        """Gives one time slice to the next ready task. Returns False if
+           no task was ready"""
+        if not self._ready:
+            return False
+        task = self._ready.popleft()
+        task._slices += 1
+        machine = task._machine
+        limit = machine.count() + self._quantum
+        while True:
+            status = machine.run(limit - machine.count())
+            if status == grin.Status.OUTPUT:
+                self.emit(task, machine.output())
+            elif status == grin.Status.INPUT:
+                if not task._entries:
+                    task._state = TaskState.PARKED
+                    task._waits += 1
+                    return True
+                machine.provide(task._entries.popleft())
+            elif status == grin.Status.PAUSED:
+                self._ready.append(task)
+                return True
+            else:
+                if status == grin.Status.ERROR:
+                    self.emit(task, machine.error())
+                task._state = TaskState.FINISHED
+                return True
+
+    def run(self, slices: int = None) -> None:
+        """Gives out time slices round-robin until every task is parked or
+           finished, or until the given number of slices has been used"""
+        while slices is None or slices > 0:
+            if not self.step():
+                return
+            if slices is not None:
+                slices -= 1
+
+    def emit(self, task: Task, text: str) -> None:
+        """Delivers one printed line of a task"""
+        if self._on_output is None:
+            task._output.append(text)
+        else:
+            self._on_output(task._pid, text)
+
+    def task(self, pid: int) -> Task:
+        """Returns the task with the given pid"""
+        return self._tasks[pid]
+
+    def tasks(self, state: TaskState = None) -> list[Task]:
+        """Returns every task, or only those in the given state"""
+        return [task for task in self._tasks.values() if state is None or task._state == state]
+
+    def remove(self, pid: int) -> Task:
+        """Forgets a task, returning it. Removing a task that has not
+           finished stops it"""
+        task = self._tasks.pop(pid)
+        if task._state == TaskState.READY:
+            self._ready.remove(task)
+        task._state = TaskState.FINISHED
+        return task
+
+    def fairness(self) -> float:
+        """Returns Jain's fairness index of the statements executed by each
+           task that is still running: 1.0 when every task has executed the
+           same number, approaching 1/n as one task gets all of them"""
+        counts = [task.statements() for task in self._tasks.values()
+                  if task._state != TaskState.FINISHED]
+        total = sum(counts)
+        if total == 0:
+            return 1.0
+        return total * total / (len(counts) * sum(count * count for count in counts))
+
+__all__ = [Scheduler.__name__, Task.__name__, TaskState.__name__]
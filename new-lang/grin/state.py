@@ -2,11 +2,19 @@
 #contains the structure to each grin program
 import grin
 import sys
+from typing import TextIO
 class State:
-    def __init__(self, lines: list) -> None:
-        """Initiates the State object"""
+    def __init__(self, lines: list, stdin: TextIO = None, stdout: TextIO = None) -> None:
+        """Initiates the State object. Input is read from stdin and output
+           written to stdout, which default to sys.stdin and sys.stdout.
+           A State still ends a failed program with sys.exit() and recurses
+           once per jump, so it is not suited to running programs on other
+           threads; grin.Context is the thread-safe way to do that"""
         self._lines = lines
+        self._stdin = stdin
+        self._stdout = stdout
         self._events = self.read()
+        self._stripped = self.strip()
         self._identifiers = {}
         self._labels = self.labels()
         self._commands = self.label_command()
@@ -26,9 +34,22 @@ class State:
             except StopIteration:
                 return events
         except (grin.GrinParseError, grin.GrinLexError) as e:
-            print(f'ERROR AT LINE {e.location().line()}: FAILED TO PARSE INPUT')
+            self.write(f'ERROR AT LINE {e.location().line()}: FAILED TO PARSE INPUT')
             sys.exit()
 
+    def write(self, value: str | int | float) -> None:
+        """Writes one line of output"""
+        print(value, file = self._stdout)
+
+    def read_entry(self) -> str:
+        """Reads one line of input, raising EOFError at its end"""
+        if self._stdin is None:
+            return input()
+        entry = self._stdin.readline()
+        if not entry:
+            raise EOFError('EOF when reading a line')
+        return entry[:-1] if entry.endswith('\n') else entry
+
     def identifiers(self, line: list[grin.GrinToken]) -> None:
         """Adds to the identifier dictionary with the corresponding
            value"""
@@ -42,15 +63,27 @@ class State:
                 value = line[2].value()
             self._identifiers[key] = value
 
+    def strip(self) -> list[list[grin.GrinToken]]:
+        """Returns the lines with their labels removed, as every line
+           executed after a jump is"""
+        stripped = []
+        for line in self._events:
+            if any(token.kind() == grin.GrinTokenKind.COLON for token in line):
+                line = line[2:]
+            stripped.append(line)
+        return stripped
+
     def labels(self) -> dict:
-        """Adds labels and their commands into a dictionary and
-           returns that dictionary"""
+        """Adds labels and the lines from them to the end into a
+           dictionary and returns that dictionary. The lines are a Suffix
+           of the program rather than a copy of it, so a program with many
+           labels loads in linear time"""
         labels = dict()
         for line in range(len(self._events)):
             token = self._events[line]
             try:
                 if token[1].kind() == grin.GrinTokenKind.COLON:
-                    new_events = self._events[token[1].location().line()-1:]
+                    new_events = grin.Suffix(self._events, token[1].location().line()-1, False)
                     labels[token[0].value()] = new_events
             except IndexError:
                 pass
@@ -105,16 +138,16 @@ class State:
                 else:
                     self._identifiers[line[1].value()] = self._identifiers[line[1].value()] / second
         except TypeError:
-            print(f'ERROR AT LINE {line[0].location().line()}: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES')
+            self.write(f'ERROR AT LINE {line[0].location().line()}: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES')
             sys.exit()
         except ZeroDivisionError:
-            print(f'ERROR AT LINE {line[0].location().line()}: CANNOT DIVIDE BY ZERO')
+            self.write(f'ERROR AT LINE {line[0].location().line()}: CANNOT DIVIDE BY ZERO')
             sys.exit()
 
     def input_num(self, line: list) -> None:
         """Takes an input number and converts it
            to the corresponding type"""
-        entry = input()
+        entry = self.read_entry()
         i = grin.to_int(entry)
         f = grin.to_float(entry)
         self._identifiers[line[1].value()] = i if i is not None else f
@@ -155,18 +188,18 @@ class State:
             elif sign == grin.GrinTokenKind.NOT_EQUAL:
                 return value1 != value2
         except TypeError:
-            print(f'ERROR AT LINE {line[0].location().line()}: CANNOT COMPARE TYPES')
+            self.write(f'ERROR AT LINE {line[0].location().line()}: CANNOT COMPARE TYPES')
             sys.exit()
 
     def print_grin(self, line: list) -> None:
         """Prints a result given the line"""
         if self.is_literal(line):
-            print(line[1].value())
+            self.write(line[1].value())
         elif line[1].value() in self._identifiers.keys():
-            print(self._identifiers[line[1].value()])
+            self.write(self._identifiers[line[1].value()])
         else:
             self._identifiers[line[1].value()] = 0
-            print(self._identifiers[line[1].value()])
+            self.write(self._identifiers[line[1].value()])
 
     def get_line(self, label: str) -> int:
         """Given a label, gets the line location of the
@@ -188,7 +221,7 @@ class State:
                 if type(line[1].value()) == int:
                     limit = line[1].location().line() + line[1].value()
                     if limit > len(self._events) or limit < 0:
-                        print(f'ERROR AT LINE {line[0].location().line()}: TARGET LINE IS OUT OF BOUNDS')
+                        self.write(f'ERROR AT LINE {line[0].location().line()}: TARGET LINE IS OUT OF BOUNDS')
                         sys.exit()
                     else:
                         self.go_to_int(line, 1, kind)
@@ -200,7 +233,7 @@ class State:
                         self.go_to_identifier(line, 1, kind)
             return valid
         except RecursionError:
-            print(f'ERROR AT LINE {line[0].location().line()}: MAXIMUM RECURSION REACHED')
+            self.write(f'ERROR AT LINE {line[0].location().line()}: MAXIMUM RECURSION REACHED')
             sys.exit()
 
     def construct_go(self, kind: str, target: list, events: list) -> 'grin.GoSub | grin.GoTo':
@@ -217,16 +250,19 @@ class State:
         element = line[i]
         value = element.value()
         location = element.location().line()
-        new_events = self._events[location+value-1:]
+        new_events = grin.Suffix(self._stripped, location+value-1, True)
         go_statement = self.construct_go(kind, line, new_events)
         self._go_x[element.location().line()] = go_statement
         self.process_grin(events = [go_statement.get_statement()])
 
     def go_to_label(self, line: list, i: int, kind: str) -> None:
-        """Executes a go statement that has a label target"""
+        """Executes a go statement that has a label target. From then on
+           the label's lines are the stripped ones, as if its own copy of
+           them had been stripped in place"""
         element = line[i]
-        new_events = self._labels[element.value()]
-        new_events[0] = self._commands[line[i].value()]
+        labeled = self._labels[element.value()]
+        new_events = grin.Suffix(self._stripped, labeled.start(), True)
+        self._labels[element.value()] = new_events
         go_statement = self.construct_go(kind, line, new_events)
         self._go_x[element.location().line()] = go_statement
         self.process_grin(events = [go_statement.get_statement()])
@@ -240,10 +276,10 @@ class State:
         if type(c) == int:
             limit = element.location().line() + c - 1
             if limit > len(self._events) or limit < 0:
-                print(f'ERROR AT LINE {line[0].location().line()}: TARGET LINE IS OUT OF BOUNDS')
+                self.write(f'ERROR AT LINE {line[0].location().line()}: TARGET LINE IS OUT OF BOUNDS')
                 sys.exit()
             else:
-                new_events = self._events[limit:]
+                new_events = grin.Suffix(self._stripped, limit, True)
                 go_statement = self.construct_go(kind, line, new_events)
                 self._go_x[element.location().line()] = go_statement
                 self.process_grin(events = [go_statement.get_statement()])
@@ -272,7 +308,7 @@ class State:
             elif self.is_math(line):
                 self.do_math(line)
             elif line[0].kind() == grin.GrinTokenKind.INSTR:
-                self._identifiers[line[1].value()] = input()
+                self._identifiers[line[1].value()] = self.read_entry()
             elif line[0].kind() == grin.GrinTokenKind.INNUM:
                 self.input_num(line)
             elif line[0].kind() == grin.GrinTokenKind.GOTO:
@@ -0,0 +1,113 @@
+#trace.py
+#contains the tracing support behind Machine.set_trace(), which wraps the
+#statement handlers of a single machine while a callback is set, so that the
+#machine keeps running its own dispatch loop and methods
+import grin
+from enum import Enum
+from typing import Callable
+
+class TraceKind(Enum):
+    """Identifies the kind of event passed to a trace callback"""
+    STATEMENT = 1
+    JUMP = 2
+    CALL = 3
+    RETURN = 4
+    WRITE = 5
+
+TraceCallback = Callable[[TraceKind, 'grin.Statement | None', object], None]
+
+class TracedVariables(dict):
+    def __init__(self, callback: TraceCallback, variables: dict) -> None:
+        """Initiates the TracedVariables object, a dictionary of variables
+           that reports every write to the callback"""
+        super().__init__(variables)
+        self._callback = callback
+        self.statement = None
+
+    def __setitem__(self, name: str, value: str | int | float) -> None:
+        super().__setitem__(name, value)
+        self._callback(TraceKind.WRITE, self.statement, (name, value))
+
+    def setdefault(self, name: str, value: str | int | float = None) -> str | int | float:
+        if name in self:
+            return self[name]
+        self[name] = value
+        return value
+
+    def update(self, variables: dict) -> None:
+        for name, value in variables.items():
+            self[name] = value
+
+_INPUTS = {grin.GrinTokenKind.INNUM, grin.GrinTokenKind.INSTR}
+_JUMPS = {grin.GrinTokenKind.GOTO, grin.GrinTokenKind.GOSUB}
+
+class Tracer:
+    def __init__(self, machine: grin.Machine, callback: TraceCallback) -> None:
+        """Initiates the Tracer object, which reports what one machine does
+           to the callback through wrappers around its handlers and its
+           leave() and resolve() methods, whichever class they come from"""
+        self._machine = machine
+        self._callback = callback
+        self._leave = machine.leave
+        self._resolve = machine.resolve
+        self._statement = None
+        self._destination = None
+
+    def wrap(self, handler: Callable[[grin.Statement], 'grin.Status | None']) \
+            -> Callable[[grin.Statement], 'grin.Status | None']:
+        """Returns a handler that reports a statement before executing it
+           with the given handler, and the jump or call it takes. An input
+           statement is reported once, when its entry has been provided"""
+        machine = self._machine
+        callback = self._callback
+        def execute(statement: grin.Statement) -> grin.Status | None:
+            if statement.kind in _INPUTS and machine._input is None:
+                return handler(statement)
+            callback(TraceKind.STATEMENT, statement, machine._pc)
+            machine._variables.statement = statement
+            self._statement = statement
+            self._destination = None
+            status = handler(statement)
+            self._statement = None
+            if status is None and statement.kind in _JUMPS and type(self._destination) == int:
+                kind = TraceKind.CALL if statement.kind == grin.GrinTokenKind.GOSUB else TraceKind.JUMP
+                callback(kind, statement, self._destination)
+            return status
+        execute.untraced = handler
+        return execute
+
+    def leave(self) -> grin.Status | None:
+        """Leaves a frame as the machine's own leave() does, reporting it
+           with the statement that left it, or None for falling off the end"""
+        machine = self._machine
+        depth = len(machine._stack)
+        status = self._leave()
+        if len(machine._stack) < depth:
+            self._callback(TraceKind.RETURN, self._statement, machine._pc)
+        return status
+
+    def resolve(self, statement: grin.Statement) -> int | grin.Status | None:
+        """Resolves a jump as the machine's own resolve() does, remembering
+           where it lands"""
+        self._destination = self._resolve(statement)
+        return self._destination
+
+def install(machine: grin.Machine, callback: TraceCallback | None) -> None:
+    """Installs a trace callback on one machine, or removes it if callback
+       is None. A traced machine dispatches through handlers wrapped by a
+       Tracer; an untraced one is left with the ordinary methods"""
+    if machine._trace is not None:
+        machine._handlers = {kind: handler.untraced for kind, handler in machine._handlers.items()}
+        del machine.leave, machine.resolve
+        machine._variables = dict(machine._variables)
+        machine._trace = None
+    if callback is None:
+        return
+    tracer = Tracer(machine, callback)
+    machine._trace = callback
+    machine._variables = TracedVariables(callback, machine._variables)
+    machine._handlers = {kind: tracer.wrap(handler) for kind, handler in machine._handlers.items()}
+    machine.leave = tracer.leave
+    machine.resolve = tracer.resolve
+
+__all__ = [TraceKind.__name__]
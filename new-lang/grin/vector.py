@@ -0,0 +1,357 @@
+#vector.py
+#contains the lockstep engine, which executes one numeric grin program for
+#many input sets at once by holding each variable as a NumPy array with one
+#lane per input set
+import grin
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INT_BOUND = 2 ** 62 - 1
+PRODUCT_BOUND = 2 ** 61
+EXACT_FLOAT_BOUND = 2 ** 53
+TIMEOUT_CHECK_INTERVAL = 1000
+
+class _Fallback(Exception):
+    """Raised, before a statement changes anything, when the lockstep engine
+       cannot execute that statement for a group; the group's lanes then
+       finish on scalar Machines"""
+
+class _Group:
+    def __init__(self, lanes: 'numpy.ndarray', pc: int, raw: bool, stack: list, variables: dict,
+                 count: int, cursor: int) -> None:
+        """Initiates a group of lanes that are at the same statement with
+           the same GOSUB stack, and so can execute each statement together"""
+        self.lanes = lanes
+        self.pc = pc
+        self.raw = raw
+        self.stack = stack
+        self.variables = variables
+        self.count = count
+        self.cursor = cursor
+
+    def subset(self, mask: 'numpy.ndarray') -> '_Group':
+        """Returns a copy of the group holding only the lanes in mask"""
+        return _Group(self.lanes[mask], self.pc, self.raw, list(self.stack),
+                      {name: values[mask] for name, values in self.variables.items()},
+                      self.count, self.cursor)
+
+class VectorEngine:
+    def __init__(self, program: grin.Program, inputs: list[list[str]],
+                 timeout: float = None) -> None:
+        """Initiates the VectorEngine object for one program and the input
+           sets of its lanes. Since the lanes execute together, the timeout
+           in seconds applies to all of them at once"""
+        if numpy is None:
+            raise ModuleNotFoundError('the lockstep engine needs NumPy')
+        self._program = program
+        self._statements = program.statements()
+        self._inputs = [list(entries) for entries in inputs]
+        self._outputs = [[] for _ in self._inputs]
+        self._outcomes = [None] * len(self._inputs)
+        self._timeout = timeout
+        self._deadline = None
+        self._handlers = {
+            grin.GrinTokenKind.LET: self.execute_let,
+            grin.GrinTokenKind.PRINT: self.execute_print,
+            grin.GrinTokenKind.ADD: self.execute_math,
+            grin.GrinTokenKind.SUB: self.execute_math,
+            grin.GrinTokenKind.MULT: self.execute_math,
+            grin.GrinTokenKind.DIV: self.execute_math,
+            grin.GrinTokenKind.INNUM: self.execute_innum,
+            grin.GrinTokenKind.GOTO: self.execute_go,
+            grin.GrinTokenKind.GOSUB: self.execute_go,
+            grin.GrinTokenKind.RETURN: self.execute_leave,
+            grin.GrinTokenKind.END: self.execute_leave
+        }
+
+    def run(self) -> list[dict]:
+        """Executes every lane to completion and returns their outcomes, as
+           grin.run_many() describes them, in the order of the input sets.
+           Lanes still executing when the timeout passes finish as 'timeout'"""
+        if self._timeout is not None:
+            self._deadline = time.monotonic() + self._timeout
+        if self._inputs:
+            groups = [_Group(numpy.arange(len(self._inputs)), 0, True, [], {}, 0, 0)]
+            with numpy.errstate(all = 'ignore'):
+                while groups:
+                    groups.extend(self.advance(groups.pop()))
+        return self._outcomes
+
+    def advance(self, group: _Group) -> list[_Group]:
+        """Executes a group until it finishes or splits, returning the
+           groups that are left to execute"""
+        statements = self._statements
+        size = len(statements)
+        check = 0 if self._deadline is None else TIMEOUT_CHECK_INTERVAL
+        while True:
+            if check:
+                check -= 1
+                if not check:
+                    if time.monotonic() >= self._deadline:
+                        self.finish(group, 'timeout')
+                        return []
+                    check = TIMEOUT_CHECK_INTERVAL
+            if group.pc >= size:
+                if not self.leave(group):
+                    self.finish(group, 'halted')
+                    return []
+                continue
+            statement = statements[group.pc]
+            if group.raw and statement.label is not None:
+                group.pc += 1
+                continue
+            handler = self._handlers.get(statement.kind)
+            if handler is None:
+                self.fall_back(group)
+                return []
+            group.count += 1
+            try:
+                groups = handler(group, statement)
+            except _Fallback:
+                group.count -= 1
+                self.fall_back(group)
+                return []
+            if groups is not None:
+                return groups
+
+    def leave(self, group: _Group) -> bool:
+        """Returns from the group's current GOSUB, or returns False if
+           there is none"""
+        if group.stack:
+            group.pc, group.raw = group.stack.pop()
+            return True
+        return False
+
+    def finish(self, group: _Group, status: str, message: str = None) -> None:
+        """Records the outcome of every lane in the group"""
+        for lane in group.lanes.tolist():
+            if message is not None:
+                self._outputs[lane].append(message)
+            self._outcomes[lane] = grin.batch.result(status, self._outputs[lane], group.count)
+
+    def fail(self, group: _Group, statement: grin.Statement, message: str) -> None:
+        """Finishes every lane in the group with a GrinError message"""
+        self.finish(group, 'error', f'ERROR AT LINE {statement.line}: {message}')
+
+    def fall_back(self, group: _Group) -> None:
+        """Finishes each lane of the group on its own scalar Machine, starting
+           from the group's state"""
+        for position, lane in enumerate(group.lanes.tolist()):
+            variables = {name: values[position].item() for name, values in group.variables.items()}
+            machine = grin.Machine(self._program)
+            machine.load(group.pc, group.raw, list(group.stack), variables, group.count)
+            self._outcomes[lane] = grin.batch.complete(
+                machine, self._inputs[lane][group.cursor:], self._outputs[lane], self.remaining())
+
+    def remaining(self) -> float | None:
+        """Returns the seconds left before the timeout, or None if there is
+           no timeout"""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def constant(self, value: str | int | float, lanes: int) -> 'numpy.ndarray':
+        """Returns an array holding a numeric literal in every lane"""
+        if type(value) == int and -INT_BOUND <= value <= INT_BOUND:
+            return numpy.full(lanes, value, dtype = numpy.int64)
+        elif type(value) == float:
+            return numpy.full(lanes, value, dtype = numpy.float64)
+        raise _Fallback()
+
+    def read(self, group: _Group, operand: grin.Operand) -> 'numpy.ndarray':
+        """Returns the lanes' values of an operand, giving identifiers that
+           have not been set the default value of 0"""
+        if operand.is_identifier:
+            values = group.variables.get(operand.value)
+            if values is None:
+                values = group.variables[operand.value] = numpy.zeros(len(group.lanes), dtype = numpy.int64)
+            return values
+        return self.constant(operand.value, len(group.lanes))
+
+    def execute_let(self, group: _Group, statement: grin.Statement) -> None:
+        """Executes a LET statement"""
+        group.variables[statement.variable] = self.read(group, statement.value)
+        group.pc += 1
+
+    def execute_print(self, group: _Group, statement: grin.Statement) -> None:
+        """Executes a PRINT statement"""
+        operand = statement.value
+        if not operand.is_identifier:
+            texts = [str(operand.value)] * len(group.lanes)
+        else:
+            texts = [str(value) for value in self.read(group, operand).tolist()]
+        for lane, text in zip(group.lanes.tolist(), texts):
+            self._outputs[lane].append(text)
+        group.pc += 1
+
+    def execute_math(self, group: _Group, statement: grin.Statement) -> list[_Group] | None:
+        """Executes an ADD, SUB, MULT or DIV statement, following the
+           integer and float rules of State.do_math"""
+        first = group.variables.get(statement.variable)
+        if first is None:
+            first = numpy.zeros(len(group.lanes), dtype = numpy.int64)
+        second = self.read(group, statement.value)
+        integers = first.dtype == numpy.int64 and second.dtype == numpy.int64
+        kind = statement.kind
+        if kind == grin.GrinTokenKind.ADD:
+            result = first + second
+        elif kind == grin.GrinTokenKind.SUB:
+            result = first - second
+        elif kind == grin.GrinTokenKind.MULT:
+            if integers and (numpy.abs(first.astype(numpy.float64) * second) > PRODUCT_BOUND).any():
+                raise _Fallback()
+            result = first * second
+        else:
+            zero = second == 0
+            if zero.any():
+                failed = group.subset(zero)
+                self.fail(failed, statement, 'CANNOT DIVIDE BY ZERO')
+                if zero.all():
+                    return []
+                group = group.subset(~zero)
+                first, second = first[~zero], second[~zero]
+                self.store(group, statement, first // second if integers else first / second)
+                return [group]
+            result = first // second if integers else first / second
+        self.store(group, statement, result)
+
+    def store(self, group: _Group, statement: grin.Statement, result: 'numpy.ndarray') -> None:
+        """Stores the result of a math statement and moves past it, unless
+           an integer result has grown beyond what the lanes can hold"""
+        if result.dtype == numpy.int64 and (numpy.abs(result) > INT_BOUND).any():
+            raise _Fallback()
+        group.variables[statement.variable] = result
+        group.pc += 1
+
+    def execute_innum(self, group: _Group, statement: grin.Statement) -> list[_Group] | None:
+        """Executes an INNUM statement, splitting the group when the lanes'
+           entries are not all integers or not all floats"""
+        kinds = []
+        values = []
+        for lane in group.lanes.tolist():
+            entries = self._inputs[lane]
+            if group.cursor >= len(entries):
+                kinds.append('no input')
+                values.append(0)
+                continue
+            entry = entries[group.cursor]
+            i = grin.to_int(entry)
+            f = grin.to_float(entry) if i is None else None
+            if i is not None and -INT_BOUND <= i <= INT_BOUND:
+                kinds.append('int')
+                values.append(i)
+            elif i is None and f is not None:
+                kinds.append('float')
+                values.append(f)
+            else:
+                kinds.append('other')
+                values.append(0)
+        kinds = numpy.array(kinds)
+        if (kinds == kinds[0]).all():
+            if kinds[0] == 'other':
+                raise _Fallback()
+            elif kinds[0] == 'no input':
+                group.count -= 1
+                self.finish(group, 'no input')
+                return []
+            dtype = numpy.int64 if kinds[0] == 'int' else numpy.float64
+            group.variables[statement.variable] = numpy.array(values, dtype = dtype)
+            group.pc += 1
+            group.cursor += 1
+            return None
+
+        group.count -= 1
+        groups = []
+        for kind in ('int', 'float', 'no input', 'other'):
+            mask = kinds == kind
+            if mask.any():
+                part = group.subset(mask)
+                if kind == 'no input':
+                    self.finish(part, 'no input')
+                elif kind == 'other':
+                    self.fall_back(part)
+                else:
+                    groups.append(part)
+        return groups
+
+    def compare(self, group: _Group, statement: grin.Statement) -> 'numpy.ndarray':
+        """Evaluates the condition of a GOTO or GOSUB statement in every lane"""
+        condition = statement.condition
+        value1 = self.read(group, condition.left)
+        value2 = self.read(group, condition.right)
+        if value1.dtype != value2.dtype:
+            # NumPy compares integers with floats after rounding the integer
+            # to a float, which is only exact for small integers
+            for values in (value1, value2):
+                if values.dtype == numpy.int64 and (numpy.abs(values) > EXACT_FLOAT_BOUND).any():
+                    raise _Fallback()
+        sign = condition.operator
+        if sign == grin.GrinTokenKind.LESS_THAN:
+            return value1 < value2
+        elif sign == grin.GrinTokenKind.LESS_THAN_OR_EQUAL:
+            return value1 <= value2
+        elif sign == grin.GrinTokenKind.GREATER_THAN:
+            return value1 > value2
+        elif sign == grin.GrinTokenKind.GREATER_THAN_OR_EQUAL:
+            return value1 >= value2
+        elif sign == grin.GrinTokenKind.EQUAL:
+            return value1 == value2
+        else:
+            return value1 != value2
+
+    def execute_go(self, group: _Group, statement: grin.Statement) -> list[_Group] | None:
+        """Executes a GOTO or GOSUB statement, splitting the group when the
+           lanes disagree about its condition"""
+        if statement.destination is None:
+            raise _Fallback()
+        if statement.condition is not None:
+            valid = self.compare(group, statement)
+            if not valid.any():
+                group.pc += 1
+                return None
+            if not valid.all():
+                staying = group.subset(~valid)
+                staying.pc += 1
+                group = group.subset(valid)
+                return [staying, group] if self.jump(group, statement) else [staying]
+        return None if self.jump(group, statement) else []
+
+    def jump(self, group: _Group, statement: grin.Statement) -> bool:
+        """Moves a group to the destination of a jump it takes. Returns
+           False if the jump failed, finishing the group"""
+        if statement.destination == grin.program.OUT_OF_BOUNDS:
+            self.fail(group, statement, 'TARGET LINE IS OUT OF BOUNDS')
+            return False
+        if statement.kind == grin.GrinTokenKind.GOSUB:
+            if len(group.stack) >= grin.machine.MAX_GOSUB_DEPTH:
+                self.fail(group, statement, 'MAXIMUM RECURSION REACHED')
+                return False
+            group.stack.append((group.pc + 1, group.raw))
+        group.pc = statement.destination
+        group.raw = False
+        return True
+
+    def execute_leave(self, group: _Group, statement: grin.Statement) -> list[_Group] | None:
+        """Executes a RETURN or END statement"""
+        if not self.leave(group):
+            self.finish(group, 'halted')
+            return []
+
+def run_vectorized(program: grin.Program | list[str], inputs: list[list[str]],
+                   timeout: float = None) -> list[dict]:
+    """Executes one program against each of many input sets in lockstep,
+       returning the same outcomes as grin.run_many(). Lanes are split into
+       groups where their conditions or input types differ, and any group
+       reaching something other than integer and float arithmetic (strings,
+       INSTR, jumps through identifiers, integers too large for 64 bits)
+       finishes on ordinary Machines. Lanes still executing after timeout
+       seconds finish as 'timeout'"""
+    if not isinstance(program, grin.Program):
+        program = grin.Program(program)
+    return VectorEngine(program, inputs, timeout).run()
+
+__all__ = [run_vectorized.__name__]
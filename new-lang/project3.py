@@ -10,7 +10,9 @@
 # offloading as much of the complexity as you can into additional modules in
 # the 'grin' package, isolated in a way that allows you to unit test them.
 
+import argparse
 import grin
+import sys
 
 def read_input() -> list:
     """Reads and returns a list of the input from the standard input"""
@@ -22,11 +24,57 @@ def read_input() -> list:
         else:
             return lines
 
-def main() -> None:
-    """Runs the main program by reading and processing the grin input"""
+def parse_arguments(argv: list[str] = None) -> argparse.Namespace:
+    """Parses the command line options"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile', action = 'store_true',
+                        help = 'report the count and time of each line to standard error; '
+                               'the program runs on grin.Machine, which unlike grin.State '
+                               'has no limit on the number of jumps a program takes')
+    parser.add_argument('--profile-json', default = None,
+                        help = 'also write the profile as JSON to this file')
+    parser.add_argument('--sample', default = None,
+                        help = 'sample the running line and its GOSUB calls, writing collapsed '
+                               'stacks for flamegraph tools to this file; also runs on grin.Machine')
+    parser.add_argument('--metrics', action = 'store_true',
+                        help = 'print counters and phase timings of the run to standard error; '
+                               'also runs on grin.Machine')
+    parser.add_argument('--fused', action = 'store_true',
+                        help = 'dispatch frequent sequences of statements as single units; '
+                               'also runs on grin.Machine')
+    parser.add_argument('--dump-fusions', action = 'store_true',
+                        help = 'run as --fused does and report each fusion that fired, and how '
+                               'often, to standard error')
+    parser.add_argument('--accelerate', action = 'store_true',
+                        help = 'finish counted loops that only accumulate at once; '
+                               'also runs on grin.Machine')
+    parser.add_argument('--sample-interval', type = float, default = grin.sampling.DEFAULT_INTERVAL,
+                        help = 'seconds between samples')
+    return parser.parse_args(argv)
+
+def main(argv: list[str] = None) -> int | None:
+    """Runs the main program by reading and processing the grin input.
+       When profiling, sampling, collecting metrics, fusing or accelerating loops, the
+       program runs on grin.Machine instead of grin.State, and the exit code of the run
+       is returned"""
+    args = parse_arguments(argv)
     lines = read_input()
-    program = grin.State(lines)
-    program.process_grin()
+    if args.profile or args.profile_json is not None:
+        return grin.run_profiled(lines, sys.stdin, sys.stdout, sys.stderr, args.profile_json)
+    elif args.metrics:
+        code, metrics = grin.run_metered(lines, sys.stdin, sys.stdout)
+        print(grin.format_metrics(metrics), file = sys.stderr)
+        return code
+    elif args.sample is not None:
+        with open(args.sample, 'w') as report:
+            return grin.run_sampled(lines, sys.stdin, sys.stdout, report, args.sample_interval)
+    elif args.fused or args.dump_fusions:
+        return grin.run_fused(lines, sys.stdin, sys.stdout, sys.stderr if args.dump_fusions else None)
+    elif args.accelerate:
+        return grin.run_accelerated(lines, sys.stdin, sys.stdout)
+    else:
+        program = grin.State(lines)
+        program.process_grin()
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
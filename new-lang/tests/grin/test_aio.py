@@ -0,0 +1,88 @@
+#test_aio.py
+#conducts tests for the asyncio runtime
+
+import unittest
+import asyncio
+import os
+import socket
+import tempfile
+import grin
+
+async def run_lines(lines: list, entries: list) -> tuple[grin.Status, list]:
+    """Runs a program against a queue of entries, returning its status
+       and printed lines"""
+    queue = asyncio.Queue()
+    for entry in entries:
+        queue.put_nowait(entry)
+    printed = []
+
+    async def write(text: str) -> None:
+        printed.append(text)
+
+    status = await grin.run_async(grin.Program(lines), queue.get, write)
+    return status, printed
+
+class RunAsyncTests(unittest.TestCase):
+    def test_print_and_input_are_awaited(self):
+        status, printed = asyncio.run(run_lines(['INNUM A', 'INSTR B', 'PRINT A', 'PRINT B'], ['7', 'X']))
+        self.assertEqual(status, grin.Status.HALTED)
+        self.assertEqual(printed, ['7', 'X'])
+
+    def test_error_is_written(self):
+        status, printed = asyncio.run(run_lines(['LET A "X"', 'GOTO 1 IF A < 1'], []))
+        self.assertEqual(status, grin.Status.ERROR)
+        self.assertEqual(printed, ['ERROR AT LINE 2: CANNOT COMPARE TYPES'])
+
+    def test_sessions_interleave(self):
+        loop_lines = ['LET I 0', 'TOP: ADD I 1', 'GOTO "TOP" IF I < 5000', 'PRINT I']
+
+        async def both() -> list:
+            waiting = asyncio.ensure_future(run_lines(['INNUM A', 'PRINT A'], []))
+            busy = await run_lines(loop_lines, [])
+            self.assertFalse(waiting.done())
+            waiting.cancel()
+            return busy[1]
+
+        self.assertEqual(asyncio.run(both()), ['5000'])
+
+    def test_printing_loop_yields(self):
+        async def ticking() -> int:
+            written = 0
+
+            async def write(text: str) -> None:
+                # Fails instead of hanging if the loop never yields
+                nonlocal written
+                written += 1
+                if written > 100000:
+                    raise RuntimeError('the event loop got no turn')
+
+            async def ticker() -> int:
+                for tick in range(10):
+                    await asyncio.sleep(0)
+                return tick + 1
+
+            program = grin.Program(['L: PRINT 1', 'GOTO "L"'])
+            running = asyncio.ensure_future(grin.run_async(program, asyncio.Queue().get, write, 100))
+            ticks = await ticker()
+            self.assertFalse(running.done())
+            running.cancel()
+            return ticks
+
+        self.assertEqual(asyncio.run(ticking()), 10)
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix domain sockets')
+class UnixServerTests(unittest.TestCase):
+    def test_session_over_socket(self):
+        async def session(path: str) -> bytes:
+            server = await grin.serve_unix(path)
+            async with server:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b'INSTR A\nPRINT "HELLO"\nPRINT A\n.\nWORLD\n')
+                await writer.drain()
+                data = await reader.read()
+                writer.close()
+                return data
+
+        with tempfile.TemporaryDirectory() as directory:
+            data = asyncio.run(session(os.path.join(directory, 'grin.sock')))
+        self.assertEqual(data, b'HELLO\nWORLD\n')
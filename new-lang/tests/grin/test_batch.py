@@ -0,0 +1,118 @@
+#test_batch.py
+#conducts tests for the batch runner
+
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+import grin
+import grin.__main__
+
+def write(path: str, lines: list) -> None:
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+class ExecuteTests(unittest.TestCase):
+    def test_halted(self):
+        outcome = grin.run_lines(['INNUM A', 'PRINT A'], ['3'])
+        self.assertEqual(outcome['status'], 'halted')
+        self.assertEqual(outcome['exit'], grin.batch.EXIT_HALTED)
+        self.assertEqual(outcome['output'], ['3'])
+        self.assertEqual(outcome['statements'], 2)
+
+    def test_parse_error(self):
+        outcome = grin.run_lines(['PRINT'], [])
+        self.assertEqual(outcome['status'], 'error')
+        self.assertEqual(outcome['output'], ['ERROR AT LINE 1: FAILED TO PARSE INPUT'])
+
+    def test_out_of_input(self):
+        outcome = grin.run_lines(['PRINT 1', 'INSTR A'], [])
+        self.assertEqual(outcome['status'], 'no input')
+        self.assertEqual(outcome['output'], ['1'])
+
+    def test_timeout(self):
+        outcome = grin.run_lines(['LET A 1', 'GOTO 0'], [], timeout = 0.05)
+        self.assertEqual(outcome['status'], 'timeout')
+        self.assertEqual(outcome['exit'], grin.batch.EXIT_TIMEOUT)
+
+    def test_timeout_while_printing(self):
+        outcome = grin.run_lines(['LET A 1', 'PRINT A', 'GOTO -1'], [], timeout = 0.05)
+        self.assertEqual(outcome['status'], 'timeout')
+        self.assertEqual(set(outcome['output']), {'1'})
+
+    def test_timeout_while_reading(self):
+        outcome = grin.run_lines(['INSTR A', 'GOTO -1'], iter(lambda: 'x', None), timeout = 0.05)
+        self.assertEqual(outcome['status'], 'timeout')
+
+class RunManyTests(unittest.TestCase):
+    LINES = ['INNUM A', 'INNUM B', 'DIV A B', 'PRINT A']
+
+    def test_outcomes_in_input_order(self):
+        inputs = [[str(n), '2'] for n in range(10)]
+        outcomes = grin.run_many(self.LINES, inputs)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [[str(n // 2)] for n in range(10)])
+
+    def test_each_run_gets_fresh_state(self):
+        program = grin.Program(['INNUM A', 'ADD T A', 'PRINT T'])
+        outcomes = grin.run_many(program, [['1'], ['1'], ['1']])
+        self.assertEqual([outcome['output'] for outcome in outcomes], [['1']] * 3)
+
+    def test_errors_per_input_set(self):
+        outcomes = grin.run_many(self.LINES, [['1', '0'], ['1.5', '2']])
+        self.assertEqual(outcomes[0]['output'], ['ERROR AT LINE 3: CANNOT DIVIDE BY ZERO'])
+        self.assertEqual(outcomes[1]['output'], ['0.75'])
+
+    def test_spread_across_workers(self):
+        inputs = ([str(n), '3'] for n in range(100))
+        outcomes = grin.run_many(self.LINES, inputs, workers = 2, chunksize = 8)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [[str(n // 3)] for n in range(100)])
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = self._directory.name
+        write(os.path.join(self.path, 'a.grin'), ['INNUM A', 'MULT A 2', 'PRINT A', '.'])
+        write(os.path.join(self.path, 'a.in'), ['21'])
+        write(os.path.join(self.path, 'b.grin'), ['PRINT "B"'])
+        write(os.path.join(self.path, 'notes.txt'), ['ignored'])
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_find_jobs_in_directory(self):
+        jobs = grin.find_jobs(self.path)
+        self.assertEqual([os.path.basename(job.program()) for job in jobs], ['a.grin', 'b.grin'])
+        self.assertEqual(jobs[0].entries(), os.path.join(self.path, 'a.in'))
+        self.assertIsNone(jobs[1].entries())
+
+    def test_find_jobs_in_manifest(self):
+        manifest = os.path.join(self.path, 'manifest')
+        write(manifest, ['# programs', 'b.grin a.in', '', 'a.grin'])
+        jobs = grin.find_jobs(manifest)
+        self.assertEqual(jobs[0].program(), os.path.join(self.path, 'b.grin'))
+        self.assertEqual(jobs[0].entries(), os.path.join(self.path, 'a.in'))
+        self.assertIsNone(jobs[1].entries())
+
+    def test_run_batch_in_process(self):
+        outcomes = grin.run_batch(grin.find_jobs(self.path), workers = 0)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [['42'], ['B']])
+
+    def test_run_batch_in_pool(self):
+        outcomes = grin.run_batch(grin.find_jobs(self.path) * 3, workers = 2, chunksize = 2)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [['42'], ['B']] * 3)
+
+    def test_missing_program_crashes(self):
+        outcome = grin.run_job(grin.Job(os.path.join(self.path, 'missing.grin')))
+        self.assertEqual(outcome['status'], 'crashed')
+
+    def test_command_line_report(self):
+        report = os.path.join(self.path, 'report.json')
+        with contextlib.redirect_stderr(io.StringIO()):
+            code = grin.__main__.main(['batch', self.path, '-j', '0', '-o', report])
+        self.assertEqual(code, 0)
+        with open(report) as file:
+            data = json.load(file)
+        self.assertEqual(data['jobs'], 2)
+        self.assertEqual(data['statuses'], {'halted': 2})
@@ -0,0 +1,122 @@
+#test_cache.py
+#conducts tests for the result cache
+
+import unittest
+import os
+import tempfile
+import grin
+import grin.cache
+
+class ResultCacheTests(unittest.TestCase):
+    def test_hit_skips_execution(self):
+        cache = grin.ResultCache()
+        first = grin.run_cached(cache, ['INNUM A', 'PRINT A'], ['3'])
+        self.assertNotIn('cached', first)
+        original = grin.batch.execute
+        grin.batch.execute = None
+        try:
+            second = grin.run_cached(cache, ['INNUM A', 'PRINT A'], ['3'])
+        finally:
+            grin.batch.execute = original
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['output'], ['3'])
+        self.assertEqual(second['statements'], first['statements'])
+        self.assertEqual((cache.hits(), cache.misses()), (1, 1))
+
+    def test_input_is_part_of_key(self):
+        cache = grin.ResultCache()
+        grin.run_cached(cache, ['INNUM A', 'PRINT A'], ['3'])
+        outcome = grin.run_cached(cache, ['INNUM A', 'PRINT A'], ['4'])
+        self.assertNotIn('cached', outcome)
+        self.assertEqual(outcome['output'], ['4'])
+
+    def test_key_is_unambiguous(self):
+        self.assertNotEqual(grin.cache.run_key(['PRINT 1'], ['a', 'b']),
+                            grin.cache.run_key(['PRINT 1'], ['a\nb']))
+        self.assertNotEqual(grin.cache.run_key(['PRINT 1', 'PRINT 2'], []),
+                            grin.cache.run_key(['PRINT 1'], ['PRINT 2']))
+
+    def test_abnormal_runs_not_cached(self):
+        cache = grin.ResultCache()
+        for lines, entries in [(['INSTR A'], []), (['ADD A "x"'], []), (['PRINT'], [])]:
+            grin.run_cached(cache, lines, entries)
+            self.assertNotIn('cached', grin.run_cached(cache, lines, entries))
+        self.assertEqual(cache.hits(), 0)
+
+    def test_large_output_not_cached(self):
+        cache = grin.ResultCache(max_output = 10)
+        lines = ['PRINT "abcdefghijklmnop"']
+        grin.run_cached(cache, lines, [])
+        self.assertNotIn('cached', grin.run_cached(cache, lines, []))
+
+    def test_memory_eviction(self):
+        cache = grin.ResultCache(capacity = 2)
+        for value in ['1', '2', '1', '3']:
+            grin.run_cached(cache, [f'PRINT {value}'], [])
+        self.assertTrue(grin.run_cached(cache, ['PRINT 1'], []).get('cached'))
+        self.assertNotIn('cached', grin.run_cached(cache, ['PRINT 2'], []))
+
+    def test_hit_cannot_be_modified(self):
+        cache = grin.ResultCache()
+        grin.run_cached(cache, ['PRINT 1'], [])
+        grin.run_cached(cache, ['PRINT 1'], [])['output'].append('2')
+        self.assertEqual(grin.run_cached(cache, ['PRINT 1'], [])['output'], ['1'])
+
+class DiskCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self._path = self._directory.name
+
+    def test_shared_between_caches(self):
+        grin.run_cached(grin.ResultCache(self._path), ['PRINT 5'], [])
+        outcome = grin.run_cached(grin.ResultCache(self._path), ['PRINT 5'], [])
+        self.assertTrue(outcome['cached'])
+        self.assertEqual(outcome['output'], ['5'])
+
+    def test_disk_eviction(self):
+        cache = grin.ResultCache(self._path, capacity = 8)
+        for value in range(10):
+            grin.run_cached(cache, [f'PRINT {value}'], [])
+        stored = [name for name in os.listdir(self._path) if name.endswith('.json')]
+        self.assertEqual(len(stored), 8)
+        self.assertNotIn('cached', grin.run_cached(grin.ResultCache(self._path), ['PRINT 0'], []))
+        self.assertTrue(grin.run_cached(grin.ResultCache(self._path), ['PRINT 9'], [])['cached'])
+
+    def test_eviction_tolerates_removed_files(self):
+        cache = grin.ResultCache(self._path, capacity = 2)
+        for value in range(2):
+            grin.run_cached(cache, [f'PRINT {value}'], [])
+        original = os.stat
+        def stat(path, *args, **kwargs):
+            if str(path).endswith('.json'):
+                os.remove(path)
+            return original(path, *args, **kwargs)
+        os.stat = stat
+        try:
+            outcome = grin.run_cached(cache, ['PRINT 2'], [])
+        finally:
+            os.stat = original
+        self.assertEqual(outcome['status'], 'halted')
+
+    def test_version_change_invalidates(self):
+        grin.run_cached(grin.ResultCache(self._path), ['PRINT 5'], [])
+        with open(os.path.join(self._path, 'VERSION'), 'w') as file:
+            file.write('older')
+        cache = grin.ResultCache(self._path)
+        self.assertEqual([name for name in os.listdir(self._path) if name.endswith('.json')], [])
+        self.assertNotIn('cached', grin.run_cached(cache, ['PRINT 5'], []))
+
+    def test_batch(self):
+        with open(os.path.join(self._path, 'a.grin'), 'w') as file:
+            file.write('PRINT 1\n')
+        jobs = grin.find_jobs(self._path)
+        store = os.path.join(self._path, 'cache')
+        first = grin.run_batch(jobs, workers = 0, cache = store)
+        second = grin.run_batch(jobs, workers = 0, cache = store)
+        self.assertNotIn('cached', first[0])
+        self.assertTrue(second[0]['cached'])
+        self.assertEqual(second[0]['output'], ['1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#test_cfg.py
+#conducts tests for the control-flow graph builder
+
+import unittest
+import contextlib
+import io
+import os
+import tempfile
+import grin
+import grin.__main__
+import grin.differential
+
+def graph(lines: list) -> grin.ControlFlowGraph:
+    return grin.ControlFlowGraph(grin.Program(lines))
+
+def edges(lines: list) -> set:
+    """Returns the edges as (first line, first line, kind name) triples,
+       with 'entry' and 'exit' for the empty blocks"""
+    cfg = graph(lines)
+    def name(block: int) -> int | str:
+        if block == cfg.entry():
+            return 'entry'
+        elif block == cfg.exit():
+            return 'exit'
+        return cfg.blocks()[block].start + 1
+    return {(name(edge.source), name(edge.target), edge.kind.name) for edge in cfg.edges()}
+
+def executed(lines: list, entries: list) -> list:
+    """Returns the indexes of the statements a Machine executes, in order"""
+    machine = grin.Machine(grin.Program(lines))
+    indexes = []
+    def record(kind: grin.TraceKind, statement: grin.Statement, argument: object) -> None:
+        if kind == grin.TraceKind.STATEMENT:
+            indexes.append(statement.line - 1)
+    machine.set_trace(record)
+    grin.batch.complete(machine, entries, [], 1.0)
+    return indexes
+
+class BlockTests(unittest.TestCase):
+    def test_leaders(self):
+        cfg = graph(['GOTO "S"', 'S: LET A 1', 'PRINT A', 'GOSUB "F"', 'ADD A 1', 'END',
+                     'F: PRINT A', 'RETURN'])
+        self.assertEqual([(block.start, block.end) for block in cfg.blocks()],
+                         [(0, 0), (0, 1), (1, 4), (4, 6), (6, 8), (8, 8)])
+        self.assertEqual(cfg.block_of(2).index, 2)
+
+    def test_jump_targets_start_blocks(self):
+        cfg = graph(['LET A 1', 'PRINT A', 'ADD A 1', 'GOTO -1 IF A < 3'])
+        self.assertEqual([(block.start, block.end) for block in cfg.blocks()[1:-1]],
+                         [(0, 2), (2, 4)])
+
+    def test_empty_program(self):
+        cfg = graph([])
+        self.assertEqual(len(cfg.blocks()), 2)
+        self.assertEqual(edges([]), {('entry', 'exit', 'LEAVE')})
+
+class EdgeTests(unittest.TestCase):
+    def test_static_edges(self):
+        self.assertEqual(edges(['GOTO "S"', 'S: ADD A 1', 'GOTO "S" IF A < 3', 'GOSUB "F"',
+                                'END', 'F: RETURN']),
+                         {('entry', 1, 'FALL'), (1, 2, 'JUMP'), (2, 2, 'BRANCH'), (2, 4, 'FALL'),
+                          (4, 6, 'CALL'), (4, 5, 'FALL'), (5, 'exit', 'LEAVE'),
+                          (6, 'exit', 'LEAVE')})
+
+    def test_main_program_steps_over_labels(self):
+        self.assertEqual(edges(['A: PRINT 1', 'B: PRINT 2', 'PRINT 3']),
+                         {('entry', 1, 'FALL'), ('entry', 2, 'SKIP'), ('entry', 3, 'SKIP'),
+                          (1, 2, 'FALL'), (1, 3, 'SKIP'), (2, 3, 'FALL'), (3, 'exit', 'LEAVE')})
+
+    def test_out_of_bounds_jump_fails(self):
+        self.assertIn((1, 'exit', 'JUMP'), edges(['GOTO 5', 'END']))
+
+    def test_known_identifier_targets(self):
+        cfg = graph(['LET T "B"', 'GOTO T', 'A: LET T 2', 'GOTO T', 'B: GOTO "A"', 'END'])
+        self.assertEqual(cfg.unknown_targets(), set())
+        self.assertEqual(edges(['LET T "B"', 'GOTO T', 'A: LET T 2', 'GOTO T', 'B: GOTO "A"',
+                                'PRINT 1']),
+                         {('entry', 1, 'FALL'), (1, 4, 'DYNAMIC'), (1, 5, 'DYNAMIC'),
+                          (1, 'exit', 'LEAVE'), (3, 4, 'FALL'), (4, 5, 'DYNAMIC'),
+                          (4, 6, 'DYNAMIC'), (4, 'exit', 'LEAVE'), (5, 3, 'JUMP'),
+                          (6, 'exit', 'LEAVE')})
+
+    def test_read_identifier_may_hold_zero(self):
+        self.assertIn((2, 2, 'DYNAMIC'), edges(['PRINT T', 'GOTO T']))
+
+    def test_unknown_identifier_targets(self):
+        lines = ['INNUM T', 'GOSUB T', 'END', 'A: RETURN', 'B: RETURN']
+        self.assertEqual(graph(lines).unknown_targets(), {1})
+        self.assertTrue({(1, 4, 'DYNAMIC_CALL'), (1, 5, 'DYNAMIC_CALL'), (1, 3, 'FALL')} <=
+                        edges(lines))
+
+    def test_edges_cover_execution(self):
+        for case in range(150):
+            lines, entries = grin.differential.make_case(case)
+            try:
+                cfg = graph(lines)
+            except (grin.GrinParseError, grin.GrinLexError):
+                continue
+            if cfg.unknown_targets():
+                continue
+            with self.subTest(case = case):
+                statements = cfg.program().statements()
+                path = executed(lines, entries)
+                reached = {(edge.source, edge.target) for edge in cfg.edges()}
+                for first, second in zip(path, path[1:]):
+                    block = cfg.block_of(first)
+                    if second == first + 1 and first + 1 < block.end:
+                        continue
+                    if any(edge.target == cfg.exit() for edge in cfg.successors(block.index)):
+                        # A frame was left, so this is a return to a call site
+                        continue
+                    self.assertEqual(cfg.block_of(second).start, second)
+                    self.assertIn((block.index, cfg.block_of(second).index), reached)
+
+class DominatorTests(unittest.TestCase):
+    def test_dominators(self):
+        cfg = graph(['GOTO "S"', 'S: LET A 1', 'GOTO "B" IF A > 0', 'PRINT 1', 'B: PRINT A',
+                     'END', 'PRINT 9'])
+        self.assertEqual([(block.start, block.end) for block in cfg.blocks()[1:-1]],
+                         [(0, 1), (1, 3), (3, 4), (4, 6), (6, 7)])
+        self.assertEqual(cfg.idom(4), 2)
+        self.assertEqual(cfg.idom(3), 2)
+        self.assertTrue(cfg.dominates(2, 4))
+        self.assertFalse(cfg.dominates(3, 4))
+        self.assertIsNone(cfg.idom(5))
+        self.assertNotIn(5, cfg.reachable())
+
+class LoopTests(unittest.TestCase):
+    def test_nested_loops(self):
+        cfg = graph(['GOTO "S"', 'S: LET N 0', 'L: ADD N 1', 'LET M 0', 'W: ADD M 1',
+                     'GOTO "W" IF M < 2', 'GOTO "L" IF N < 3', 'END'])
+        self.assertEqual(cfg.loops(), [grin.Loop(3, frozenset({3, 4, 5})), grin.Loop(4, frozenset({4}))])
+
+    def test_recursion_is_not_a_loop(self):
+        self.assertEqual(graph(['GOTO "F"', 'F: ADD N 1', 'GOSUB "F" IF N < 3', 'RETURN']).loops(), [])
+
+    def test_loop_entered_by_skipping_its_label_is_not_natural(self):
+        self.assertEqual(graph(['LET N 0', 'L: ADD N 1', 'GOTO "L" IF N < 3']).loops(), [])
+
+class DotTests(unittest.TestCase):
+    def test_dot(self):
+        dot = graph(['LET T "A"', 'GOTO T', 'A: PRINT "hi"', 'INNUM T', 'GOSUB T']).to_dot()
+        self.assertTrue(dot.startswith('digraph grin {'))
+        self.assertIn('b1 [label = "1  LET T \\"A\\"\\l2  GOTO T\\l", color = red];', dot)
+        self.assertIn('3  A: PRINT \\"hi\\"\\l', dot)
+        self.assertIn('color = red', dot)
+        self.assertIn('b0 -> b1 [label = "fall"];', dot)
+        self.assertIn('[label = "dynamic", style = dashed]', dot)
+
+    def test_folded_offset_jump(self):
+        for lines, text in [(['LET T 2', 'GOTO T', 'PRINT 1', 'B: PRINT 2'], '2  GOTO T (= line 4)'),
+                            (['LET T 1', 'GOTO T'], '2  GOTO T (= end)'),
+                            (['LET T 5', 'GOTO T'], '2  GOTO T (= out of bounds)')]:
+            with self.subTest(lines = lines):
+                program = grin.fold_constants(grin.Program(lines))
+                self.assertIn(text + '\\l', grin.ControlFlowGraph(program).to_dot())
+
+class CfgCommandTests(unittest.TestCase):
+    def test_writes_dot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.grin')
+            with open(path, 'w') as file:
+                file.write('PRINT 1\nEND\n')
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(grin.__main__.main(['cfg', path]), 0)
+            self.assertEqual(output.getvalue(), graph(['PRINT 1', 'END']).to_dot())
+
+if __name__ == '__main__':
+    unittest.main()
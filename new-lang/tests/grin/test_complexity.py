@@ -0,0 +1,222 @@
+#test_complexity.py
+#conducts tests that loading and executing programs grows linearly with
+#their size, by counting the work each operation does at several sizes.
+#Timing each operation and fitting the exponent of its growth depends on the
+#load of the machine, so those benchmarks only run when GRIN_BENCHMARKS is set
+
+import unittest
+import contextlib
+import gc
+import io
+import math
+import os
+import time
+import grin
+from typing import Callable, Iterator
+
+SIZES = [1000, 2000, 4000, 8000]
+BENCHMARKS = bool(os.environ.get('GRIN_BENCHMARKS'))
+REPEATS = 3
+LINEAR = 1.5
+CONSTANT = 0.4
+
+@contextlib.contextmanager
+def counting(owner: type, name: str) -> Iterator[list]:
+    """Counts the calls to a method of a class while in the block, yielding
+       the list of their arguments"""
+    original = getattr(owner, name)
+    calls = []
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    setattr(owner, name, counted)
+    try:
+        yield calls
+    finally:
+        setattr(owner, name, original)
+
+def best_time(run: Callable[[], object], repeats: int = REPEATS) -> float:
+    """Returns the shortest time run() takes over repeats calls"""
+    best = math.inf
+    for _ in range(repeats):
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+def exponent(sizes: list, times: list) -> float:
+    """Returns the slope of the least squares line through the points
+       (log size, log time)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(seconds) for seconds in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / \
+           sum((x - mean_x) ** 2 for x in xs)
+
+def growth(make: Callable[[int], object], run: Callable[[object], object],
+           sizes: list = SIZES) -> float:
+    """Returns the exponent of the time taken by run(make(size))"""
+    times = []
+    for size in sizes:
+        made = make(size)
+        times.append(best_time(lambda: run(made)))
+    return exponent(sizes, times)
+
+def run_growth(make: Callable[[int], list], sizes: list = SIZES) -> float:
+    """Returns the exponent of the time State.process_grin() takes on the
+       program make(size), not counting loading it. A State runs only
+       once, so each timed run gets a fresh one"""
+    times = []
+    for size in sizes:
+        lines = make(size)
+        programs = [state(lines) for _ in range(REPEATS)]
+        times.append(min(best_time(program.process_grin, 1) for program in programs))
+    return exponent(sizes, times)
+
+def labeled(size: int) -> list:
+    """Returns a straight-line program of size lines, half of them labeled"""
+    return [f'L{index}: ADD A 1' if index % 2 else 'ADD A 1' for index in range(size)] + ['END']
+
+def looping(jump: str, padding: int, iterations: int = 200) -> list:
+    """Returns a program that jumps back iterations times and then ends,
+       followed by padding lines that are never executed"""
+    return ['LET N 0', 'TOP: ADD N 1', f'GOTO {jump} IF N < {iterations}', 'END'] + \
+           [f'P{index}: PRINT N' for index in range(padding)]
+
+def state(lines: list) -> grin.State:
+    """Returns a State loaded with the lines, writing to and reading from
+       empty buffers"""
+    return grin.State(lines, io.StringIO(), io.StringIO())
+
+class CountingList(list):
+    """A list that counts the reads of its items, however they are made"""
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+    def __iter__(self):
+        self.reads += len(self)
+        return super().__iter__()
+
+    def index(self, *args):
+        self.reads += len(self)
+        return super().index(*args)
+
+class CountingDict(dict):
+    """A dictionary that counts its lookups, a scan of its keys counting
+       one for each key"""
+    lookups = 0
+
+    def __getitem__(self, key):
+        self.lookups += 1
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.lookups += 1
+        return super().__contains__(key)
+
+    def get(self, *args):
+        self.lookups += 1
+        return super().get(*args)
+
+    def __iter__(self):
+        self.lookups += len(self)
+        return super().__iter__()
+
+    def items(self):
+        self.lookups += len(self)
+        return super().items()
+
+class ExponentTests(unittest.TestCase):
+    def test_exponent(self):
+        self.assertAlmostEqual(exponent([1, 2, 4], [3, 6, 12]), 1.0)
+        self.assertAlmostEqual(exponent([1, 2, 4], [3, 12, 48]), 2.0)
+
+class LoadWorkTests(unittest.TestCase):
+    def test_state_labels_are_views(self):
+        # Each label's lines are one Suffix, never a copy of the rest of the
+        # program, and the labels are found once
+        for size in SIZES:
+            with self.subTest(size = size):
+                with counting(grin.State, 'labels') as labels, counting(grin.Suffix, '__init__') as suffixes:
+                    loaded = state(labeled(size))
+                self.assertEqual(len(labels), 1)
+                self.assertEqual(len(suffixes), len(loaded.get_labels()))
+
+class ExecutionWorkTests(unittest.TestCase):
+    def test_state_jump_work_independent_of_length(self):
+        # A jump makes one Suffix and does not look at the lines it skips
+        for jump in ['"TOP"', '-1']:
+            with self.subTest(jump = jump):
+                counts = []
+                for size in SIZES:
+                    loaded = state(looping(jump, size))
+                    with counting(grin.Suffix, '__init__') as suffixes, \
+                         counting(grin.Suffix, '__getitem__') as lookups:
+                        loaded.process_grin()
+                    counts.append((len(suffixes), len(lookups)))
+                self.assertEqual(counts, [counts[0]] * len(SIZES))
+                self.assertEqual(counts[0][0], 200)
+
+    def test_machine_jump_work_independent_of_length(self):
+        # Each statement stepped to is read once, the labeled line stepped
+        # over before the first jump included, and a jump reads no other
+        # statement and looks up only the label it names, whatever the
+        # padding
+        for first, jump, lookups in [([], '"TOP"', 0), ([], '-1', 0), (['LET T "TOP"'], 'T', 400),
+                                     (['LET T -1'], 'T', 0)]:
+            with self.subTest(jump = jump, first = first):
+                for size in SIZES:
+                    machine = grin.Machine(grin.Program(first + looping(jump, size)))
+                    machine._statements = CountingList(machine._statements)
+                    machine._labels = CountingDict(machine._labels)
+                    self.assertEqual(machine.run(), grin.Status.HALTED)
+                    self.assertEqual(machine._statements.reads, machine.count() + 1)
+                    self.assertEqual(machine._labels.lookups, lookups)
+
+@unittest.skipUnless(BENCHMARKS, 'set GRIN_BENCHMARKS to time growth')
+class LoadGrowthTests(unittest.TestCase):
+    def test_state_init(self):
+        self.assertLess(growth(labeled, state), LINEAR)
+
+    def test_state_labels(self):
+        self.assertLess(growth(lambda size: state(labeled(size)), grin.State.labels), LINEAR)
+
+    def test_state_label_command(self):
+        self.assertLess(growth(lambda size: state(labeled(size)), grin.State.label_command), LINEAR)
+
+    def test_program(self):
+        self.assertLess(growth(labeled, grin.Program), LINEAR)
+
+@unittest.skipUnless(BENCHMARKS, 'set GRIN_BENCHMARKS to time growth')
+class ExecutionGrowthTests(unittest.TestCase):
+    def test_machine_loop(self):
+        program = lambda size: grin.Program(looping('"TOP"', 0, size))
+        self.assertLess(growth(program, lambda linked: grin.Machine(linked).run()), LINEAR)
+
+    def test_state_loop(self):
+        # A State recurses once per jump, so the loop is kept below the
+        # recursion limit and grows by the length of its body instead
+        def make(size: int) -> list:
+            return ['LET N 0', 'TOP: ADD N 1'] + ['ADD A N'] * (size // 20) + \
+                   ['GOTO "TOP" IF N < 20', 'END']
+        self.assertLess(run_growth(make), LINEAR)
+
+    def test_state_jump_time_independent_of_length(self):
+        for jump in ['"TOP"', '-1']:
+            with self.subTest(jump = jump):
+                self.assertLess(run_growth(lambda size: looping(jump, size)), CONSTANT)
+
+    def test_machine_jump_time_independent_of_length(self):
+        program = lambda size: grin.Program(looping('"TOP"', size))
+        self.assertLess(growth(program, lambda linked: grin.Machine(linked).run()), CONSTANT)
+
+if __name__ == '__main__':
+    unittest.main()
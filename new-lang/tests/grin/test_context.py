@@ -0,0 +1,69 @@
+#test_context.py
+#conducts tests for execution contexts and concurrent in-process runs
+
+import unittest
+import io
+from concurrent.futures import ThreadPoolExecutor
+import grin
+
+COUNTDOWN = ['INNUM N', 'GOTO "LOOP"', 'LOOP: PRINT N', 'SUB N 1', 'GOTO "LOOP" IF N > 0']
+
+def run(lines: list, entries: str) -> tuple:
+    output = io.StringIO()
+    code = grin.run_context(lines, io.StringIO(entries), output)
+    return code, output.getvalue()
+
+class ContextTests(unittest.TestCase):
+    def test_halted(self):
+        self.assertEqual(run(['INSTR A', 'INNUM B', 'PRINT A', 'PRINT B'], 'hi there\n2.5\n'),
+                         (grin.batch.EXIT_HALTED, 'hi there\n2.5\n'))
+
+    def test_last_entry_without_newline(self):
+        self.assertEqual(run(['INSTR A', 'PRINT A'], 'x'), (grin.batch.EXIT_HALTED, 'x\n'))
+
+    def test_error(self):
+        self.assertEqual(run(['PRINT 1', 'DIV A 0'], ''),
+                         (grin.batch.EXIT_ERROR, '1\nERROR AT LINE 2: CANNOT DIVIDE BY ZERO\n'))
+
+    def test_parse_error(self):
+        self.assertEqual(run(['PRINT'], ''),
+                         (grin.batch.EXIT_ERROR, 'ERROR AT LINE 1: FAILED TO PARSE INPUT\n'))
+
+    def test_no_input(self):
+        self.assertEqual(run(['INNUM A'], ''), (grin.batch.EXIT_NO_INPUT, ''))
+
+    def test_matches_state(self):
+        for lines, entries in [(COUNTDOWN, '3\n'), (['LET A 1', 'GOSUB 2', 'END', 'PRINT A'], ''),
+                               (['INSTR A', 'ADD A 1'], 'x\n')]:
+            with self.subTest(lines = lines):
+                output = io.StringIO()
+                try:
+                    grin.State(lines, io.StringIO(entries), output).process_grin()
+                except SystemExit:
+                    pass
+                self.assertEqual(run(lines, entries)[1], output.getvalue())
+
+class ConcurrencyTests(unittest.TestCase):
+    def test_threads_are_isolated(self):
+        program = grin.Program(COUNTDOWN)
+        def count(n: int) -> str:
+            output = io.StringIO()
+            grin.Context(program, io.StringIO(f'{n}\n'), output).run()
+            return output.getvalue()
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+            outputs = list(executor.map(count, range(1, 65)))
+        for n, output in enumerate(outputs, 1):
+            self.assertEqual(output, ''.join(f'{i}\n' for i in range(n, 0, -1)))
+
+    def test_errors_stay_in_their_thread(self):
+        def divide(n: int) -> tuple:
+            return run(['INNUM N', 'LET A 6', 'DIV A N', 'PRINT A'], f'{n}\n')
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            outcomes = list(executor.map(divide, [0, 2, 0, 3]))
+        self.assertEqual([code for code, _ in outcomes],
+                         [grin.batch.EXIT_ERROR, grin.batch.EXIT_HALTED] * 2)
+        self.assertEqual(outcomes[0][1], 'ERROR AT LINE 3: CANNOT DIVIDE BY ZERO\n')
+        self.assertEqual(outcomes[3][1], '2\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#test_daemon.py
+#conducts tests for the interpreter daemon and its client
+
+import unittest
+import asyncio
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+import grin
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix domain sockets')
+class DaemonTests(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'grin.sock')
+        self.daemon = grin.Daemon(cache_size = 2, timeout = 0.5)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target = self._serve)
+        self._thread.start()
+        self._ready.wait()
+        self.wait_for_socket()
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self.daemon.serve(self.path))
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+
+    def tearDown(self):
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+        self._loop.close()
+        self._directory.cleanup()
+
+    def wait_for_socket(self):
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                    connection.connect(self.path)
+                    return
+            except OSError:
+                time.sleep(0.01)
+
+    def test_client_mirrors_project3(self):
+        stdin = io.StringIO('INNUM A\nINSTR B\nPRINT A\nPRINT B\n.\n5\nHELLO\n')
+        stdout = io.StringIO()
+        self.assertEqual(grin.client(self.path, stdin, stdout), 0)
+        self.assertEqual(stdout.getvalue(), '5\nHELLO\n')
+
+    def test_client_reads_input_when_asked(self):
+        # Each entry is read after the output before it has been printed,
+        # and waiting for it does not count towards the timeout
+        stdout = io.StringIO()
+        class Typist:
+            def __iter__(typist):
+                return iter(['PRINT "ready"', 'INNUM A', 'PRINT A', 'INNUM B', 'INNUM C', 'ADD C B',
+                             'PRINT C', '.'])
+
+            def readline(typist):
+                time.sleep(0.3)
+                return f'{len(stdout.getvalue().splitlines())}\n'
+        stdin = Typist()
+        self.assertEqual(grin.client(self.path, stdin, stdout), 0)
+        self.assertEqual(stdout.getvalue(), 'ready\n1\n4\n')
+
+    def test_streamed_input_can_run_out(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.path)
+            connection.sendall(b'{"source": ["INNUM A"], "stream": true}\n')
+            with connection.makefile('r') as replies:
+                self.assertEqual(replies.readline(), '{"input": true}\n')
+                connection.shutdown(socket.SHUT_WR)
+                self.assertIn('"status": "no input"', replies.readline())
+
+    def test_programs_are_cached_by_key(self):
+        replies = list(grin.daemon.request(self.path, {'source': ['PRINT 1']}))
+        key = replies[-1]['key']
+        self.assertEqual(replies, [{'output': '1'}, {'key': key, 'status': 'halted'}])
+        replies = list(grin.daemon.request(self.path, {'key': key}))
+        self.assertEqual(replies[0], {'output': '1'})
+        self.assertEqual(self.daemon.cached(), [key])
+
+    def test_unknown_key(self):
+        replies = list(grin.daemon.request(self.path, {'key': 'nothing'}))
+        self.assertEqual(replies, [{'key': 'nothing', 'status': 'unknown key'}])
+
+    def test_errors_are_reported(self):
+        replies = list(grin.daemon.request(self.path, {'source': ['PRINT']}))
+        self.assertEqual(replies[0], {'output': 'ERROR AT LINE 1: FAILED TO PARSE INPUT'})
+        self.assertEqual(replies[1]['status'], 'error')
+        replies = list(grin.daemon.request(self.path, {'source': ['INNUM A']}))
+        self.assertEqual(replies[0]['status'], 'no input')
+
+    def test_cache_is_bounded(self):
+        for value in range(3):
+            list(grin.daemon.request(self.path, {'source': [f'PRINT {value}']}))
+        self.assertEqual(len(self.daemon.cached()), 2)
+
+    def test_endless_programs_time_out(self):
+        for source in [['L: LET A 1', 'GOTO "L"'], ['L: PRINT 1', 'GOTO "L"']]:
+            with self.subTest(source = source):
+                replies = list(grin.daemon.request(self.path, {'source': source}))
+                self.assertEqual(replies[-1]['status'], 'timeout')
+
+    def test_bad_requests_are_rejected(self):
+        for line in [b'[]\n', b'1\n', b'not json\n', b'{"source": "PRINT 1"}\n', b'{"input": [1]}\n',
+                     b'{"source": [], "stream": 1}\n']:
+            with self.subTest(line = line):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                    connection.connect(self.path)
+                    connection.sendall(line)
+                    with connection.makefile('r') as replies:
+                        self.assertEqual(replies.read(), '{"status": "bad request"}\n')
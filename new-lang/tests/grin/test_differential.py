@@ -0,0 +1,72 @@
+#test_differential.py
+#conducts tests for the differential tester
+
+import unittest
+import contextlib
+import io
+import grin
+import grin.__main__
+import grin.differential
+
+def misreads_mult(lines: list, entries: list) -> str:
+    """An engine that prints an extra line whenever a program multiplies"""
+    extra = 'extra\n' if any('MULT' in line for line in lines) else ''
+    return grin.differential.run_machine(lines, entries) + extra
+
+class ReferenceTests(unittest.TestCase):
+    def test_output_and_errors(self):
+        self.assertEqual(grin.differential.run_reference(['INNUM A', 'PRINT A', 'DIV A 0'], ['4']),
+                         '4\nERROR AT LINE 3: CANNOT DIVIDE BY ZERO\n')
+        self.assertEqual(grin.differential.run_reference(['LET'], []),
+                         'ERROR AT LINE 1: FAILED TO PARSE INPUT\n')
+
+    def test_inconclusive_runs(self):
+        for lines, entries in [(['INNUM A'], []), (['A: GOTO "A"', 'GOTO "A"'], []),
+                               (['LET T "A"', 'GOTO "A"', 'A: ADD N 1', 'GOTO T IF N < 3'], [])]:
+            with self.subTest(lines = lines):
+                self.assertIsNone(grin.differential.run_reference(lines, entries))
+
+class EngineTests(unittest.TestCase):
+    def test_engines_agree(self):
+        lines = ['INNUM A', 'INSTR B', 'GOSUB "F"', 'PRINT B', 'END', 'F: PRINT A', 'ADD A 1',
+                 'GOTO "F" IF A < 3', 'RETURN']
+        for name, engine in grin.differential.available_engines().items():
+            with self.subTest(engine = name):
+                self.assertEqual(engine(lines, ['1', 'x']), '1\n2\nx\n')
+                self.assertEqual(engine(['PRINT 1', 'LET'], []),
+                                 'ERROR AT LINE 2: FAILED TO PARSE INPUT\n')
+
+    def test_cases_are_reproducible(self):
+        self.assertEqual(grin.differential.make_case(3), grin.differential.make_case(3))
+
+class CheckTests(unittest.TestCase):
+    def test_no_divergence(self):
+        report = grin.check(60)
+        self.assertIsNone(report['divergence'])
+        self.assertEqual(report['cases'], 60)
+        self.assertGreater(report['compared'], report['skipped'])
+
+    def test_divergence_is_minimized(self):
+        divergence = grin.check(50, engines = {'mult': misreads_mult})['divergence']
+        self.assertEqual(divergence.engine, 'mult')
+        self.assertEqual(len(divergence.lines), 1)
+        self.assertIn('MULT', divergence.lines[0])
+        self.assertEqual(divergence.entries, [])
+        self.assertEqual(divergence.actual, divergence.expected + 'extra\n')
+        self.assertIn(repr(divergence.lines), divergence.describe())
+
+    def test_crash_is_a_divergence(self):
+        def crashes(lines: list, entries: list) -> str:
+            raise ValueError('broken')
+        divergence = grin.check(5, engines = {'crashes': crashes})['divergence']
+        self.assertEqual(divergence.actual, 'ValueError: broken\n')
+
+class DiffCommandTests(unittest.TestCase):
+    def test_exit_codes(self):
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertEqual(grin.__main__.main(['diff', '-n', '10', '--engines', 'machine,stream']), 0)
+            self.assertIn('machine, stream', errors.getvalue())
+            self.assertEqual(grin.__main__.main(['diff', '--engines', 'missing']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
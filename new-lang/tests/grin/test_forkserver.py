@@ -0,0 +1,70 @@
+#test_forkserver.py
+#conducts tests for the fork server
+
+import unittest
+import os
+import tempfile
+import grin
+
+DOUBLER = grin.Program(['INNUM A', 'MULT A 2', 'PRINT A'])
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork()')
+class ForkServerTests(unittest.TestCase):
+    def test_outcomes_in_input_order(self):
+        inputs = [[str(n)] for n in range(20)]
+        outcomes = grin.run_forked(DOUBLER, inputs, workers = 3)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [[str(2 * n)] for n in range(20)])
+        self.assertTrue(all(outcome['status'] == 'halted' for outcome in outcomes))
+
+    def test_each_input_set_gets_fresh_state(self):
+        program = grin.Program(['INNUM A', 'ADD B A', 'PRINT B'])
+        outcomes = grin.run_forked(program, [['1'], ['2'], ['3']], workers = 1)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [['1'], ['2'], ['3']])
+
+    def test_failures_are_reported(self):
+        outcomes = grin.run_forked(DOUBLER, [[], ['X']], workers = 2)
+        self.assertEqual(outcomes[0]['status'], 'no input')
+        self.assertEqual(outcomes[1]['output'], ['ERROR AT LINE 2: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES'])
+
+    def test_no_inputs(self):
+        self.assertEqual(grin.run_forked(DOUBLER, []), [])
+
+    def test_output_heavy_workers(self):
+        program = grin.Program(['INNUM N', 'LET I 0', 'PRINT "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"',
+                                'ADD I 1', 'GOTO -2 IF I < N'])
+        outcomes = grin.run_forked(program, [['5000']] * 4, workers = 4)
+        self.assertEqual([len(outcome['output']) for outcome in outcomes], [5000] * 4)
+
+    def test_batch_spreads_distinct_programs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = []
+            for n in range(6):
+                path = os.path.join(directory, f'{n}.grin')
+                with open(path, 'w') as file:
+                    file.write(f'PRINT {n}\n')
+                jobs.append(grin.Job(path))
+            forks = []
+            original = os.fork
+            os.fork = lambda: forks.append(None) or original()
+            try:
+                outcomes = grin.run_batch_forked(jobs, workers = 3)
+            finally:
+                os.fork = original
+        self.assertEqual(len(forks), 3)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [[str(n)] for n in range(6)])
+
+    def test_batch_jobs_grouped_by_program(self):
+        with tempfile.TemporaryDirectory() as directory:
+            def path(name: str, lines: list) -> str:
+                full = os.path.join(directory, name)
+                with open(full, 'w') as file:
+                    file.write('\n'.join(lines) + '\n')
+                return full
+            doubler = path('doubler.grin', ['INNUM A', 'MULT A 2', 'PRINT A'])
+            broken = path('broken.grin', ['PRINT'])
+            jobs = [grin.Job(doubler, path('1.in', ['1'])), grin.Job(broken),
+                    grin.Job(doubler, path('2.in', ['2']))]
+            outcomes = grin.run_batch_forked(jobs, workers = 2)
+        self.assertEqual([outcome['output'] for outcome in outcomes],
+                         [['2'], ['ERROR AT LINE 1: FAILED TO PARSE INPUT'], ['4']])
+        self.assertEqual(outcomes[2]['program'], doubler)
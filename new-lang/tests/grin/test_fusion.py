@@ -0,0 +1,107 @@
+#test_fusion.py
+#conducts tests for superinstruction fusion
+
+import unittest
+import io
+import grin
+import grin.differential
+import grin.fusion
+
+LOOP = ['LET I 0', 'LET S 0', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'GOTO "L" IF I < 5', 'PRINT S']
+
+def fused(lines: list, fusions = None) -> grin.FusedMachine:
+    program = grin.Program(lines)
+    if fusions is None:
+        fusions = grin.differential.every_fusion(program)
+    return grin.FusedMachine(program, fusions)
+
+def finish(machine: grin.Machine, entries: list = []) -> dict:
+    return grin.batch.complete(machine, entries, [])
+
+class HistogramTests(unittest.TestCase):
+    def test_opcodes(self):
+        statements = grin.Program(['GOTO 1 IF A < 1', 'GOSUB 1', 'PRINT A']).statements()
+        self.assertEqual([grin.fusion.opcode(statement) for statement in statements],
+                         ['GOTO IF', 'GOSUB', 'PRINT'])
+
+    def test_shares_of_adjacent_sequences(self):
+        shares = grin.fusion.histogram([(grin.Program(['LET A 1', 'PRINT A', 'GOTO 2', 'END']), [])])
+        self.assertEqual(shares, {('LET', 'PRINT'): 1 / 3})
+
+    def test_print_led_sequences_are_not_chosen(self):
+        lines = ['LET I 0', 'L: PRINT I', 'ADD I 1', 'GOTO "L" IF I < 5']
+        shares = grin.fusion.histogram([(grin.Program(lines), [])])
+        self.assertIn(('ADD', 'GOTO IF'), shares)
+        self.assertEqual([sequence for sequence in shares if sequence[0] == 'PRINT'], [])
+        machine = fused(lines, {('PRINT', 'ADD'), ('PRINT', 'ADD', 'GOTO IF'), ('ADD', 'GOTO IF')})
+        self.assertEqual(finish(machine)['output'], ['1', '2', '3', '4'])
+        self.assertEqual(machine.fired(), [{'line': 3, 'fusion': ['ADD', 'GOTO IF'], 'count': 5}])
+
+    def test_shares_are_averaged_over_programs(self):
+        shares = grin.fusion.histogram([(grin.Program(['LET A 1', 'PRINT A']), []),
+                                        (grin.Program(LOOP), [])], [2])
+        self.assertAlmostEqual(shares[('LET', 'PRINT')], 0.5 * 1 / 2)
+        self.assertAlmostEqual(shares[('ADD', 'ADD')], 0.5 * 5 / 19)
+
+    def test_choose(self):
+        shares = {('A', 'B'): 0.5, ('C', 'D'): 0.2, ('E', 'F'): 0.2, ('G', 'H'): 0.01}
+        self.assertEqual(grin.fusion.choose(shares, 2, 0.1), (('A', 'B'), ('C', 'D')))
+        self.assertEqual(grin.fusion.choose(shares, 10, 0.1), (('A', 'B'), ('C', 'D'), ('E', 'F')))
+
+class FusedMachineTests(unittest.TestCase):
+    def test_same_behavior(self):
+        for lines, entries in [(LOOP, []), (['INNUM A', 'INSTR B', 'PRINT B', 'PRINT A'], ['1', 'x']),
+                               (['LET A "x"', 'ADD A 1', 'GOTO 1 IF A < 3'], []),
+                               (['LET A 1', 'ADD A 1', 'GOTO 1 IF A < "x"'], []),
+                               (['ADD A B', 'GOTO 2 IF C < 1', 'PRINT A', 'PRINT C'], []),
+                               (['GOSUB "F"', 'PRINT 2', 'END', 'F: PRINT 1', 'RETURN', 'PRINT 3'], []),
+                               (['LET A 2', 'MULT A 2.5', 'SUB A 1', 'GOTO 2 IF A <= 50', 'PRINT A'], [])]:
+            with self.subTest(lines = lines):
+                expected = finish(grin.Machine(grin.Program(lines)), entries)
+                self.assertEqual(finish(fused(lines), entries), expected)
+
+    def test_default_fusions_fire(self):
+        machine = fused(LOOP, grin.fusion.FUSIONS)
+        self.assertEqual(finish(machine)['output'], ['15'])
+        self.assertEqual(machine.fired(), [{'line': 4, 'fusion': ['ADD', 'ADD', 'GOTO IF'], 'count': 5}])
+
+    def test_labeled_statements_are_not_fused_into(self):
+        machine = fused(['LET A 1', 'L: PRINT A'], {('LET', 'PRINT')})
+        self.assertEqual(finish(machine)['output'], [])
+        self.assertEqual(machine.fired(), [])
+
+    def test_units_stay_within_budget(self):
+        machine = fused(LOOP)
+        counts = []
+        while machine.run(2) == grin.Status.PAUSED:
+            counts.append(machine.count())
+        self.assertEqual(counts, list(range(2, 2 * len(counts) + 1, 2)))
+        self.assertEqual(machine.output(), '15')
+
+    def test_traced_machine_reports_every_statement(self):
+        machine = fused(LOOP)
+        lines = []
+        machine.set_trace(lambda kind, statement, argument:
+                          lines.append(statement.line) if kind == grin.TraceKind.STATEMENT else None)
+        finish(machine)
+        self.assertEqual(len(lines), finish(grin.Machine(grin.Program(LOOP)))['statements'])
+
+    def test_longer_fusions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            fused(['LET A 1', 'LET A 1', 'LET A 1', 'LET A 1'], {('LET',) * 4})
+
+class RunFusedTests(unittest.TestCase):
+    def test_report(self):
+        output = io.StringIO()
+        report = io.StringIO()
+        self.assertEqual(grin.run_fused(LOOP, io.StringIO(), output, report), grin.batch.EXIT_HALTED)
+        self.assertEqual(output.getvalue(), '15\n')
+        self.assertIn('ADD ; ADD ; GOTO IF', report.getvalue())
+
+    def test_parse_error(self):
+        output = io.StringIO()
+        self.assertEqual(grin.run_fused(['LET'], io.StringIO(), output), grin.batch.EXIT_ERROR)
+        self.assertEqual(output.getvalue(), 'ERROR AT LINE 1: FAILED TO PARSE INPUT\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#test_gen.py
+#conducts tests for the program generator
+
+import unittest
+import io
+import os
+import tempfile
+import grin
+import grin.__main__
+
+def run(lines: list, entries: list = ()) -> tuple:
+    output = io.StringIO()
+    code = grin.run_context(lines, io.StringIO(''.join(entry + '\n' for entry in entries)), output)
+    return code, output.getvalue()
+
+class GenerateTests(unittest.TestCase):
+    def test_programs_halt_without_errors(self):
+        shapes = [{}, {'lines': 500, 'loop_depth': 3, 'gosub_depth': 3, 'fan_out': 3, 'labels': 0.3,
+                       'computed': 0.5, 'inputs': 0.1},
+                  {'lines': 50, 'loop_depth': 0, 'gosub_depth': 0}, {'lines': 1},
+                  {'variables': 1, 'strings': 0.0}, {'strings': 1.0, 'floats': 1.0}]
+        for shape in shapes:
+            for seed in range(20):
+                with self.subTest(shape = shape, seed = seed):
+                    lines = grin.generate(seed = seed, **shape)
+                    code, output = run(lines, grin.generate_input(lines, seed))
+                    self.assertEqual(code, grin.batch.EXIT_HALTED)
+                    self.assertNotIn('ERROR', output)
+
+    def test_deterministic(self):
+        self.assertEqual(grin.generate(seed = 7), grin.generate(seed = 7))
+        self.assertNotEqual(grin.generate(seed = 7), grin.generate(seed = 8))
+
+    def test_size(self):
+        for size in [100, 1000, 10000]:
+            with self.subTest(size = size):
+                self.assertLess(abs(len(grin.generate(size)) - size), size // 10)
+
+    def test_shape(self):
+        lines = grin.generate(1000, computed = 1.0, inputs = 0.2, gosub_depth = 3, fan_out = 2)
+        statements = grin.Program(lines).statements()
+        kinds = [statement.kind for statement in statements]
+        self.assertEqual(kinds.count(grin.GrinTokenKind.RETURN), 2 + 4 + 8)
+        self.assertIn(grin.GrinTokenKind.INNUM, kinds)
+        self.assertTrue(all(statement.target is not None for statement in statements
+                            if statement.kind == grin.GrinTokenKind.GOSUB))
+        self.assertNotIn(grin.GrinTokenKind.INNUM, [statement.kind for statement in
+                                                    grin.Program(grin.generate(1000)).statements()])
+
+    def test_input_matches_reads(self):
+        lines = grin.generate(300, inputs = 0.2, seed = 3)
+        entries = grin.generate_input(lines, 3)
+        self.assertGreater(len(entries), 0)
+        self.assertEqual(run(lines, entries), run(lines, entries + ['extra']))
+
+class GenCommandTests(unittest.TestCase):
+    def test_writes_program_and_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            program = os.path.join(directory, 'big.grin')
+            entries = os.path.join(directory, 'big.in')
+            code = grin.__main__.main(['gen', '-n', '400', '--inputs', '0.1', '--seed', '5',
+                                       '-o', program, '--input', entries])
+            self.assertEqual(code, 0)
+            lines = grin.batch.read_lines(program)
+            self.assertEqual(lines, grin.generate(400, inputs = 0.1, seed = 5))
+            with open(entries) as file:
+                self.assertEqual(file.read().splitlines(), grin.generate_input(lines, 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+#test_image.py
+#conducts tests for shared-memory program images
+
+import unittest
+import grin
+
+LINES = ['LET A 1.5', 'LOOP: ADD A 1', 'GOTO "LOOP" IF A < 3', 'GOSUB B', 'LET S "HI"',
+         'PRINT 12345678901234567890', 'PRINT A', 'END', 'B: PRINT S', 'RETURN']
+
+class ProgramImageTests(unittest.TestCase):
+    def test_statements_round_trip(self):
+        program = grin.Program(LINES)
+        with grin.ProgramImage.create(program) as image:
+            self.assertEqual(list(image.program().statements()), program.statements())
+
+    def test_labels_round_trip(self):
+        program = grin.Program(LINES)
+        with grin.ProgramImage.create(program) as image:
+            labels = image.program().labels()
+            self.assertEqual(dict(labels), program.labels())
+            self.assertNotIn('NOWHERE', labels)
+            self.assertNotIn(3, labels)
+
+    def test_attached_image_executes(self):
+        program = grin.Program(LINES)
+        with grin.ProgramImage.create(program) as image:
+            attached = grin.ProgramImage.attach(image.name())
+            outcome = grin.execute(attached.program(), [])
+            attached.close()
+        self.assertEqual(outcome['output'], ['0', '12345678901234567890', '3.5'])
+
+    def test_run_shared_across_workers(self):
+        program = grin.Program(['INNUM A', 'MULT A A', 'PRINT A'])
+        outcomes = grin.run_shared(program, [[str(n)] for n in range(40)], workers = 2)
+        self.assertEqual([outcome['output'] for outcome in outcomes], [[str(n * n)] for n in range(40)])
@@ -0,0 +1,158 @@
+#test_loops.py
+#conducts tests for counted-loop recognition and acceleration
+
+import unittest
+import io
+import random
+import tracemalloc
+import grin
+
+SUM = ['LET I 0', 'LET S 0', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'GOTO "L" IF I < 100', 'PRINT S']
+
+def loops(lines: list) -> list:
+    return grin.find_counted_loops(grin.Program(lines))
+
+def finish(machine: grin.Machine, budget: int = None) -> tuple:
+    """Runs a machine to the end with the given budget for each run, and
+       returns its printed lines, variables and statement count"""
+    printed = []
+    while True:
+        status = machine.run(budget)
+        if status == grin.Status.OUTPUT:
+            printed.append(machine.output())
+        elif status == grin.Status.ERROR:
+            printed.append(machine.error())
+            break
+        elif status != grin.Status.PAUSED:
+            break
+    return printed, machine.get_identifiers(), machine.count()
+
+def compare(test: unittest.TestCase, lines: list, budget: int = None) -> grin.CountedLoopMachine:
+    program = grin.Program(lines)
+    machine = grin.CountedLoopMachine(program)
+    test.assertEqual(finish(machine, budget), finish(grin.Machine(program), budget))
+    return machine
+
+def random_loop(chooser: random.Random) -> list:
+    """Returns a program with one counted loop whose start, step, bound and
+       accumulations are chosen at random. The counter steps towards the
+       bound, so the loop ends"""
+    kinds = {name: chooser.choice(['ADD', 'SUB', 'MULT']) for name in chooser.sample('XYZ', 3)}
+    lines = [f'LET I {chooser.randint(-5, 5)}', 'LET K 2', 'LET B 3.5']
+    for name, kind in kinds.items():
+        values = ['1', '-2', '0.5'] if kind == 'MULT' else ['0', '2.5', '-1', '""']
+        lines.append(f'LET {name} {chooser.choice(values)}')
+    operator = chooser.choice(['<', '<=', '>', '>='])
+    step = chooser.choice([1, 2, 3]) * (1 if '<' in operator else -1)
+    body = [chooser.choice([f'ADD I {step}', f'SUB I {-step}'])]
+    for name, kind in kinds.items():
+        operand = chooser.choice(['1', '-1', '0.5', 'I', 'K'] + (['"ab"'] if kind == 'ADD' else []))
+        body.insert(chooser.randrange(len(body) + 1), f'{kind} {name} {operand}')
+    bound = chooser.choice(['B', '12', '-12', '4.5'])
+    return lines + ['GOTO "L"', 'L: ' + body[0]] + body[1:] + \
+           [f'GOTO "L" IF I {operator} {bound}', 'PRINT I', 'PRINT X', 'PRINT Y', 'PRINT Z']
+
+class RecognitionTests(unittest.TestCase):
+    def test_counted_loop(self):
+        self.assertEqual(loops(SUM), [grin.CountedLoop(3, 5, 'I', 1, 3, grin.GrinTokenKind.LESS_THAN,
+                                                       grin.Operand(False, 100))])
+
+    def test_counter_on_the_right(self):
+        [loop] = loops(['LET N 9', 'L: SUB N 2', 'MULT P 3', 'GOTO "L" IF 0 < N'])
+        self.assertEqual((loop.counter, loop.step, loop.operator),
+                         ('N', -2, grin.GrinTokenKind.GREATER_THAN))
+
+    def test_other_shapes_are_not_counted_loops(self):
+        for lines in [['L: ADD I 1', 'PRINT I', 'GOTO "L" IF I < 5'],
+                      ['L: ADD I 1', 'INNUM A', 'GOTO "L" IF I < 5'],
+                      ['L: ADD I 1', 'GOSUB "L" IF I < 5'],
+                      ['LET T "L"', 'L: ADD I 1', 'GOTO T IF I < 5'],
+                      ['L: ADD I 1', 'GOTO "L" IF I = 5'],
+                      ['L: ADD I K', 'GOTO "L" IF I < 5'],
+                      ['L: ADD I 1', 'DIV S 2', 'GOTO "L" IF I < 5'],
+                      ['L: ADD I 1', 'ADD S I', 'ADD T S', 'GOTO "L" IF I < 5'],
+                      ['L: ADD I 1', 'ADD B 1', 'GOTO "L" IF I < B'],
+                      ['L: ADD I 1', 'ADD I 1', 'GOTO "L" IF I < 5'],
+                      ['GOTO "L" IF I < 5', 'L: ADD I 1']]:
+            with self.subTest(lines = lines):
+                self.assertEqual(loops(lines), [])
+
+class IterationTests(unittest.TestCase):
+    def test_iterations(self):
+        iterations = grin.loops.iterations
+        self.assertEqual(iterations(1, 1, grin.GrinTokenKind.LESS_THAN, 5), 4)
+        self.assertEqual(iterations(1, 2, grin.GrinTokenKind.LESS_THAN_OR_EQUAL, 5), 3)
+        self.assertEqual(iterations(1, 1, grin.GrinTokenKind.LESS_THAN_OR_EQUAL, 4.5), 4)
+        self.assertEqual(iterations(5, -1, grin.GrinTokenKind.GREATER_THAN, 0), 5)
+        self.assertEqual(iterations(5, -2, grin.GrinTokenKind.GREATER_THAN_OR_EQUAL, 0.5), 3)
+        self.assertEqual(iterations(5, 1, grin.GrinTokenKind.LESS_THAN, 5), 0)
+        self.assertIsNone(iterations(1, -1, grin.GrinTokenKind.LESS_THAN, 5))
+        self.assertIsNone(iterations(1, 1, grin.GrinTokenKind.LESS_THAN, float('inf')))
+        self.assertEqual(iterations(1, 1, grin.GrinTokenKind.LESS_THAN, float('nan')), 0)
+
+class AccelerationTests(unittest.TestCase):
+    def test_closed_form(self):
+        machine = compare(self, SUM)
+        self.assertEqual(machine.accelerated(), 99)
+        self.assertEqual(machine.get_identifiers()['S'], 5050)
+
+    def test_large_loop_runs_at_once(self):
+        lines = ['LET I 0', 'LET T ""', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'MULT P 1', 'ADD T "x"',
+                 'GOTO "L" IF I < 10000000', 'PRINT S']
+        printed, variables, count = finish(grin.CountedLoopMachine(grin.Program(lines)))
+        self.assertEqual(printed, ['50000005000000'])
+        self.assertEqual(len(variables['T']), 10000000)
+        self.assertEqual(count, 3 + 5 * 10000000 + 1)
+
+    def test_huge_loop_runs_in_closed_form(self):
+        lines = ['LET I 0', 'LET P 1', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'SUB D 3', 'MULT P 1',
+                 'GOTO "L" IF I < 1000000000000', 'PRINT S']
+        printed, variables, count = finish(grin.CountedLoopMachine(grin.Program(lines)))
+        self.assertEqual(printed, [str(10 ** 12 * (10 ** 12 + 1) // 2)])
+        self.assertEqual((variables['D'], variables['P']), (-3 * 10 ** 12, 1))
+        self.assertEqual(count, 3 + 5 * 10 ** 12 + 1)
+
+    def test_float_runs_take_constant_memory(self):
+        tracemalloc.start()
+        try:
+            value = grin.loops.accumulate(grin.GrinTokenKind.ADD, 0.0, 0.5, 0, 1, 50000)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(value, 25000.0)
+        self.assertLess(peak, 5000)
+
+    def test_floats_run_in_order(self):
+        machine = compare(self, ['LET I 0', 'LET F 0.0', 'GOTO "L"', 'L: ADD F 0.1', 'ADD I 1',
+                                 'MULT G 1.1', 'GOTO "L" IF I < 1000', 'PRINT F'])
+        self.assertEqual(machine.accelerated(), 999)
+
+    def test_failing_bodies_are_not_accelerated(self):
+        for lines in [['LET I 0', 'LET S "x"', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'GOTO "L" IF I < 9'],
+                      ['LET I 0', 'LET S "x"', 'GOTO "L"', 'L: ADD I 1', 'MULT S 2.5',
+                       'GOTO "L" IF I < 9'],
+                      ['LET I "a"', 'GOTO "L"', 'L: ADD I "b"', 'GOTO "L" IF I < "aaa"']]:
+            with self.subTest(lines = lines):
+                self.assertEqual(compare(self, lines).accelerated(), 0)
+
+    def test_budget_is_kept(self):
+        for budget in [1, 3, 7, 50]:
+            with self.subTest(budget = budget):
+                compare(self, SUM, budget)
+
+    def test_random_loops(self):
+        chooser = random.Random(33)
+        accelerated = 0
+        for _ in range(300):
+            lines = random_loop(chooser)
+            with self.subTest(lines = lines):
+                accelerated += compare(self, lines, chooser.choice([None, 5])).accelerated() > 0
+        self.assertGreater(accelerated, 25)
+
+    def test_run_accelerated(self):
+        output = io.StringIO()
+        self.assertEqual(grin.run_accelerated(SUM, io.StringIO(), output), grin.batch.EXIT_HALTED)
+        self.assertEqual(output.getvalue(), '5050\n')
+
+if __name__ == '__main__':
+    unittest.main()
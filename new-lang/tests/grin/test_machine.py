@@ -0,0 +1,102 @@
+#test_machine.py
+#conducts tests for the grin.Machine class and its streaming execution
+
+import unittest
+import grin
+
+def run(lines: list, entries: list = ()) -> list:
+    """Streams a program and returns the text of every event it produced"""
+    entries = iter(entries)
+    texts = []
+    for event in grin.stream(lines):
+        if event.kind() == grin.EventKind.INPUT:
+            event.reply(next(entries))
+        else:
+            texts.append(event.text())
+    return texts
+
+class StreamTests(unittest.TestCase):
+    def test_output_is_yielded_as_printed(self):
+        events = grin.stream(['PRINT 1', 'PRINT "HI"'])
+        event = next(events)
+        self.assertEqual(event.kind(), grin.EventKind.OUTPUT)
+        self.assertEqual(event.text(), '1')
+        self.assertEqual(next(events).text(), 'HI')
+        with self.assertRaises(StopIteration):
+            next(events)
+
+    def test_input_is_sent_into_generator(self):
+        events = grin.stream(['INNUM A', 'INSTR B', 'PRINT A', 'PRINT B'])
+        event = next(events)
+        self.assertEqual(event.kind(), grin.EventKind.INPUT)
+        self.assertEqual(event.text(), 'INNUM')
+        event = events.send('4')
+        self.assertEqual(event.text(), 'INSTR')
+        self.assertEqual(events.send('abc').text(), '4')
+        self.assertEqual(next(events).text(), 'abc')
+
+    def test_input_by_reply(self):
+        self.assertEqual(run(['INNUM A', 'MULT A 2', 'PRINT A'], ['1.5']), ['3.0'])
+
+    def test_missing_input_raises_eof(self):
+        events = grin.stream(['INSTR A'])
+        next(events)
+        with self.assertRaises(EOFError):
+            next(events)
+
+    def test_parse_error_event(self):
+        events = list(grin.stream(['PRINT 1', 'PRINT']))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].kind(), grin.EventKind.ERROR)
+        self.assertEqual(events[0].text(), 'ERROR AT LINE 2: FAILED TO PARSE INPUT')
+
+    def test_runtime_error_ends_stream(self):
+        self.assertEqual(run(['PRINT 1', 'LET A 1', 'DIV A 0', 'PRINT 2']),
+                         ['1', 'ERROR AT LINE 3: CANNOT DIVIDE BY ZERO'])
+
+class MachineTests(unittest.TestCase):
+    def test_run_with_budget_pauses(self):
+        machine = grin.Machine(grin.Program(['LET A 1', 'ADD A 1', 'ADD A 1', 'END']))
+        self.assertEqual(machine.run(2), grin.Status.PAUSED)
+        self.assertEqual(machine.get_identifiers(), {'A': 2})
+        self.assertEqual(machine.run(), grin.Status.HALTED)
+        self.assertEqual(machine.count(), 4)
+
+    def test_loops_are_not_limited_by_recursion(self):
+        lines = ['LET I 0', 'TOP: ADD I 1', 'GOTO "TOP" IF I < 5000', 'PRINT I']
+        self.assertEqual(run(lines), ['5000'])
+
+    def test_gosub_depth_is_limited(self):
+        self.assertEqual(run(['GOSUB 0']), ['ERROR AT LINE 1: MAXIMUM RECURSION REACHED'])
+
+class StateCompatibilityTests(unittest.TestCase):
+    def test_main_program_steps_over_labels(self):
+        self.assertEqual(run(['LABEL: PRINT "HI"', 'PRINT "X"']), ['X'])
+
+    def test_labels_run_after_jump(self):
+        self.assertEqual(run(['GOTO 1', 'L: PRINT "HI"']), ['HI'])
+
+    def test_labels_stepped_over_after_gosub_returns(self):
+        lines = ['GOSUB "S"', 'L: PRINT "A"', 'END', 'S: PRINT "B"', 'M: PRINT "C"']
+        self.assertEqual(run(lines), ['B', 'C'])
+
+    def test_end_inside_gosub_returns(self):
+        self.assertEqual(run(['GOSUB 2', 'END', 'PRINT 1', 'END', 'PRINT 2']), ['1'])
+
+    def test_unresolved_goto_ends_program(self):
+        self.assertEqual(run(['GOTO "NOWHERE"', 'PRINT 1']), [])
+
+    def test_unresolved_gosub_continues(self):
+        self.assertEqual(run(['GOSUB X', 'PRINT 1']), ['1'])
+
+    def test_identifier_target_out_of_bounds(self):
+        self.assertEqual(run(['LET A 5', 'GOTO A']), ['ERROR AT LINE 2: TARGET LINE IS OUT OF BOUNDS'])
+
+    def test_identifier_target_holding_label(self):
+        self.assertEqual(run(['LET A "L"', 'GOTO A', 'PRINT 1', 'L: PRINT 2']), ['2'])
+
+    def test_matches_state_output(self):
+        lines = ['LET A 3', 'GOSUB "PRINTABC"', 'LET B 4', 'GOSUB "PRINTABC"', 'LET C 5',
+                 'GOSUB "PRINTABC"', 'LET A 1', 'GOSUB "PRINTABC"', 'END', 'PRINTABC: PRINT A',
+                 'PRINT B', 'PRINT C', 'RETURN']
+        self.assertEqual(run(lines), '3 0 0 3 4 0 3 4 5 1 4 5'.split())
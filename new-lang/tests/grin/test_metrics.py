@@ -0,0 +1,71 @@
+#test_metrics.py
+#conducts tests for run metrics
+
+import unittest
+import io
+import grin
+
+def metered(lines: list, entries: str = '') -> tuple:
+    output = io.StringIO()
+    code, metrics = grin.run_metered(lines, io.StringIO(entries), output)
+    return code, output.getvalue(), metrics
+
+class MetricsTests(unittest.TestCase):
+    def test_counters(self):
+        lines = ['LET N 0', 'GOSUB "F"', 'END', 'F: GOSUB "G"', 'RETURN', 'G: ADD N 1',
+                 'GOTO "G" IF N < 3', 'INSTR S', 'RETURN']
+        code, output, metrics = metered(lines, 'hello\n')
+        self.assertEqual(code, grin.batch.EXIT_HALTED)
+        self.assertEqual(metrics['jumps'], {'GOTO': 2, 'GOSUB': 2, 'RETURN': 2})
+        self.assertEqual(metrics['max_gosub_depth'], 2)
+        self.assertEqual(metrics['variables'], 2)
+        self.assertEqual(metrics['largest_string'], 5)
+        self.assertEqual(metrics['statements'],
+                         grin.batch.execute(grin.Program(lines), ['hello'])['statements'])
+
+    def test_refused_gosub_is_not_counted(self):
+        code, output, metrics = metered(['GOTO "L"', 'L: GOSUB "L"'])
+        self.assertEqual((code, output), (grin.batch.EXIT_ERROR, 'ERROR AT LINE 2: MAXIMUM RECURSION REACHED\n'))
+        self.assertEqual(metrics['jumps']['GOSUB'], grin.machine.MAX_GOSUB_DEPTH)
+        self.assertEqual(metrics['max_gosub_depth'], grin.machine.MAX_GOSUB_DEPTH)
+
+    def test_largest_string_over_the_run(self):
+        _, _, metrics = metered(['LET A "abcdef"', 'ADD A "g"', 'LET A "x"'])
+        self.assertEqual(metrics['largest_string'], 7)
+
+    def test_phases(self):
+        _, _, metrics = metered(['PRINT 1'])
+        self.assertEqual(list(metrics['phases']), ['parse', 'link', 'execute'])
+        for times in metrics['phases'].values():
+            self.assertGreaterEqual(times['wall'], 0)
+            self.assertGreaterEqual(times['cpu'], 0)
+
+    def test_same_output(self):
+        for lines in [['LET A 1', 'DIV A 0'], ['GOTO 5'], ['PRINT "x"', 'GOTO "Y"']]:
+            with self.subTest(lines = lines):
+                plain = io.StringIO()
+                code = grin.run_context(lines, io.StringIO(), plain)
+                self.assertEqual(metered(lines)[:2], (code, plain.getvalue()))
+
+    def test_parse_error(self):
+        code, output, metrics = metered(['LET'])
+        self.assertEqual((code, output), (grin.batch.EXIT_ERROR, 'ERROR AT LINE 1: FAILED TO PARSE INPUT\n'))
+        self.assertEqual(list(metrics['phases']), ['parse'])
+        self.assertIn('parse:', grin.format_metrics(metrics))
+
+    def test_summary(self):
+        summary = grin.format_metrics(metered(['LET A "ab"', 'GOSUB 1', 'PRINT A'])[2])
+        self.assertIn('max GOSUB depth: 1', summary)
+        self.assertIn('largest string: 2', summary)
+        self.assertIn('execute:', summary)
+
+class FromStatementsTests(unittest.TestCase):
+    def test_same_as_parsing(self):
+        lines = ['A: GOTO "B"', 'B: GOTO -1', 'GOSUB X']
+        statements = [grin.program.to_statement(tokens) for tokens in grin.parsing.parse(lines)]
+        program = grin.Program.from_statements(statements)
+        self.assertEqual(program.statements(), grin.Program(lines).statements())
+        self.assertEqual(program.labels(), {'A': 0, 'B': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#test_optimize.py
+#conducts tests for the optimizing passes
+
+import unittest
+import grin
+import grin.differential
+
+def folded(lines: list) -> grin.Program:
+    return grin.fold_constants(grin.Program(lines))
+
+def kinds(program: grin.Program) -> list:
+    return [statement.kind.name for statement in program.statements()]
+
+def run(program: grin.Program, entries: list = []) -> list:
+    return grin.execute(program, entries)['output']
+
+class FoldTests(unittest.TestCase):
+    def test_arithmetic_is_folded(self):
+        program = folded(['LET A 3', 'ADD A 4', 'MULT A 2', 'DIV A 4', 'PRINT A'])
+        self.assertEqual(kinds(program), ['LET', 'LET', 'LET', 'LET', 'PRINT'])
+        self.assertEqual(program.statements()[3].value, grin.Operand(False, 3))
+        self.assertEqual(program.statements()[4].value, grin.Operand(False, 3))
+        self.assertEqual(run(program), ['3'])
+
+    def test_division_follows_types(self):
+        program = folded(['LET A 7', 'DIV A 2.0', 'LET S "ab"', 'MULT S 2', 'PRINT A', 'PRINT S'])
+        self.assertEqual(program.statements()[1].value, grin.Operand(False, 3.5))
+        self.assertEqual(run(program), ['3.5', 'abab'])
+
+    def test_failing_statements_are_kept(self):
+        for lines, error in [(['LET A 1', 'DIV A 0'], 'ERROR AT LINE 2: CANNOT DIVIDE BY ZERO'),
+                             (['LET A "x"', 'SUB A 1'],
+                              'ERROR AT LINE 2: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES')]:
+            with self.subTest(lines = lines):
+                program = folded(lines)
+                self.assertIn(program.statements()[1].kind.name, ['DIV', 'SUB'])
+                self.assertEqual(run(program), [error])
+
+    def test_large_values_are_not_built(self):
+        for count in ['100000000000000', '10000000000000000000000']:
+            with self.subTest(count = count):
+                program = folded(['LET S "abc"', 'LET N 0', 'GOTO 2 IF N = 0', f'MULT S {count}', 'PRINT S'])
+                self.assertEqual(run(program), ['abc'])
+                self.assertEqual(kinds(folded(['LET S "abc"', f'MULT S {count}'])), ['LET', 'MULT'])
+        program = folded(['LET A 4294967296', 'MULT A A', 'LET B A', 'MULT B A', 'PRINT B'])
+        self.assertEqual(kinds(program), ['LET', 'LET', 'LET', 'MULT', 'PRINT'])
+        self.assertEqual(run(program), [str(2 ** 128)])
+
+    def test_input_is_not_known(self):
+        program = folded(['LET A 1', 'INNUM A', 'ADD A 1', 'PRINT A'])
+        self.assertEqual(kinds(program), ['LET', 'INNUM', 'ADD', 'PRINT'])
+        self.assertEqual(run(program, ['5']), ['6'])
+
+    def test_values_do_not_cross_join_points(self):
+        program = folded(['GOTO "S"', 'S: LET N 0', 'L: ADD N 1', 'PRINT N', 'GOTO "L" IF N < 3'])
+        self.assertEqual(kinds(program), ['GOTO', 'LET', 'ADD', 'PRINT', 'GOTO'])
+        self.assertEqual(run(program), ['1', '2', '3'])
+
+    def test_values_do_not_cross_gosub(self):
+        program = folded(['LET A 1', 'GOSUB "F"', 'PRINT A', 'END', 'F: LET A 2', 'RETURN'])
+        self.assertEqual(program.statements()[2].value, grin.Operand(True, 'A'))
+        self.assertEqual(run(program), ['2'])
+
+class BranchTests(unittest.TestCase):
+    def test_known_conditions_are_resolved(self):
+        program = folded(['LET A 1', 'GOTO "B" IF A > 0', 'PRINT "no"', 'B: PRINT "yes"',
+                          'GOTO "B" IF A > 5', 'PRINT A'])
+        self.assertEqual(kinds(program), ['LET', 'GOTO', 'PRINT', 'GOTO', 'PRINT'])
+        self.assertIsNone(program.statements()[1].condition)
+        self.assertEqual([statement.line for statement in program.statements()], [1, 2, 4, 5, 6])
+        self.assertEqual(program.labels(), {'B': 2})
+        self.assertEqual(run(program), ['yes', '1'])
+
+    def test_failing_comparison_is_kept(self):
+        program = folded(['LET A "x"', 'GOTO 2 IF A < 1', 'PRINT A'])
+        self.assertEqual(run(program), ['ERROR AT LINE 2: CANNOT COMPARE TYPES'])
+
+    def test_known_identifier_target_is_linked(self):
+        for value in ['"B"', '2']:
+            with self.subTest(value = value):
+                program = folded([f'LET T {value}', 'GOTO T', 'PRINT 1', 'B: PRINT 2'])
+                self.assertEqual(kinds(program), ['LET', 'GOTO', 'PRINT'])
+                self.assertEqual(program.statements()[1].destination, 2)
+                self.assertEqual(program.statements()[1].target, 'T' if value == '2' else 'B')
+                self.assertEqual(run(program), ['2'])
+
+    def test_offset_target_keeps_statements(self):
+        # GOTO T counts lines from itself while T may hold 1 or 2, so
+        # nothing is removed
+        program = folded(['LET T 2', 'GOTO "A" IF T < 1', 'LET T 1', 'A: GOTO T', 'PRINT 1',
+                          'END', 'PRINT 3'])
+        self.assertEqual(len(program.statements()), 7)
+        self.assertEqual(program.statements()[1].kind.name, 'GOTO')
+        self.assertEqual(run(program), ['1'])
+
+    def test_unknown_targets_leave_program_unchanged(self):
+        program = grin.Program(['INSTR T', 'LET A 1', 'ADD A 1', 'GOTO T', 'A: PRINT A'])
+        self.assertIs(grin.fold_constants(program), program)
+
+def pruned(lines: list) -> grin.Program:
+    return grin.eliminate_dead_code(grin.Program(lines))
+
+class DeadCodeTests(unittest.TestCase):
+    def test_overwritten_store_is_removed(self):
+        program = pruned(['LET A 1', 'LET A 2', 'PRINT A', 'LET B 3'])
+        self.assertEqual(kinds(program), ['LET', 'PRINT'])
+        self.assertEqual([statement.line for statement in program.statements()], [2, 3])
+        self.assertEqual(run(program), ['2'])
+
+    def test_chains_of_dead_stores_are_removed(self):
+        self.assertEqual(kinds(pruned(['LET A 1', 'LET B A', 'LET C B', 'PRINT 1'])), ['PRINT'])
+
+    def test_stores_that_may_be_read_are_kept(self):
+        for lines in [['LET A 1', 'GOTO "B" IF A > 0', 'B: PRINT 1'],
+                      ['LET A 1', 'ADD A 1', 'PRINT 1'],
+                      ['LET A 1', 'GOSUB "F"', 'END', 'F: PRINT A', 'RETURN'],
+                      ['GOSUB "F"', 'PRINT A', 'END', 'F: LET A 2', 'RETURN'],
+                      ['LET T "B"', 'GOTO T', 'B: PRINT 1'],
+                      ['GOTO "S"', 'S: LET N 0', 'L: ADD N 1', 'GOTO "L" IF N < 3'],
+                      ['LET A T', 'LET A 1', 'GOTO T', 'PRINT A']]:
+            with self.subTest(lines = lines):
+                self.assertEqual(len(pruned(lines).statements()), len(lines))
+
+    def test_stores_read_after_raw_return_are_kept(self):
+        # The subroutine returns in raw mode, stepping over the labeled LET
+        lines = ['GOSUB "S"', 'L: LET X 7', 'PRINT X', 'END', 'S: PRINT "in"', 'LET X 5', 'RETURN']
+        program = pruned(lines)
+        self.assertEqual(kinds(program), ['GOSUB', 'LET', 'PRINT', 'END', 'PRINT', 'LET', 'RETURN'])
+        self.assertEqual(run(program), ['in', '5'])
+
+    def test_unreachable_code_is_removed(self):
+        program = pruned(['GOTO "B"', 'PRINT 1', 'B: PRINT 2', 'END', 'LET A 1', 'PRINT A'])
+        self.assertEqual(kinds(program), ['GOTO', 'PRINT', 'END'])
+        self.assertEqual(program.labels(), {'B': 1})
+        self.assertEqual(run(program), ['2'])
+
+    def test_computed_jumps_leave_program_unchanged(self):
+        for lines in [['INSTR T', 'LET A 1', 'GOTO T', 'END', 'PRINT 1'],
+                      ['LET T 2', 'LET A 1', 'GOTO T', 'END', 'PRINT 1']]:
+            with self.subTest(lines = lines):
+                program = grin.Program(lines)
+                self.assertIs(grin.eliminate_dead_code(program), program)
+
+    def test_errors_keep_their_lines(self):
+        self.assertEqual(run(pruned(['LET A 1', 'LET B "x"', 'SUB B 1'])),
+                         ['ERROR AT LINE 3: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES'])
+
+class EquivalenceTests(unittest.TestCase):
+    def test_folded_programs_print_the_same(self):
+        engines = {'folded': grin.differential.run_folded}
+        self.assertIsNone(grin.check(150, 500, engines)['divergence'])
+
+    def test_pruned_programs_print_the_same(self):
+        engines = {'pruned': grin.differential.run_pruned}
+        self.assertIsNone(grin.check(150, 700, engines)['divergence'])
+
+if __name__ == '__main__':
+    unittest.main()
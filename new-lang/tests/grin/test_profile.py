@@ -0,0 +1,99 @@
+#test_profile.py
+#conducts tests for the per-line profiler
+
+import unittest
+import io
+import json
+import os
+import tempfile
+import time
+import grin
+
+PROGRAM = ['LET N 3', 'GOSUB "F"', 'GOSUB "F"', 'END', 'F: PRINT N', 'SUB N 1',
+           'GOTO "F" IF N > 0', 'RETURN']
+
+def profile(lines: list, entries: str = '') -> tuple:
+    output = io.StringIO()
+    machine = grin.Context(grin.Program(lines), io.StringIO(entries), output,
+                           grin.ProfiledMachine)
+    code = machine.run()
+    return code, output.getvalue(), {row['line']: row for row in machine.machine().profile()}
+
+class ProfiledMachineTests(unittest.TestCase):
+    def test_same_behavior(self):
+        for lines, entries in [(PROGRAM, ''), (['INNUM A', 'INSTR B', 'PRINT B', 'PRINT A'], '1\nx\n'),
+                               (['LET A "x"', 'ADD A 1'], '')]:
+            with self.subTest(lines = lines):
+                plain = io.StringIO()
+                code = grin.run_context(lines, io.StringIO(entries), plain)
+                self.assertEqual(profile(lines, entries)[:2], (code, plain.getvalue()))
+
+    def test_counts(self):
+        rows = profile(PROGRAM)[2]
+        self.assertEqual({line: row['count'] for line, row in rows.items()},
+                         {1: 1, 2: 1, 3: 1, 4: 1, 5: 4, 6: 4, 7: 4, 8: 2})
+
+    def test_input_wait_not_counted(self):
+        rows = profile(['INNUM A', 'PRINT A'], '5\n')[2]
+        self.assertEqual(rows[1]['count'], 1)
+
+    def test_callee_time(self):
+        class SlowMachine(grin.ProfiledMachine):
+            def execute_print(self, statement):
+                time.sleep(0.01)
+                return super().execute_print(statement)
+        machine = SlowMachine(grin.Program(['GOSUB 2', 'END', 'PRINT 1', 'RETURN']))
+        while machine.run() not in (grin.Status.HALTED, grin.Status.ERROR):
+            pass
+        rows = {row['line']: row for row in machine.profile()}
+        self.assertGreaterEqual(rows[1]['callee_seconds'], 0.01)
+        self.assertLess(rows[1]['seconds'], 0.01)
+        self.assertGreaterEqual(rows[3]['seconds'], 0.01)
+
+    def test_callee_time_when_falling_off_end(self):
+        machine = grin.ProfiledMachine(grin.Program(['GOSUB 1', 'PRINT 1']))
+        while machine.run() not in (grin.Status.HALTED, grin.Status.ERROR):
+            pass
+        self.assertEqual(machine._calls, [])
+        self.assertGreater(machine.profile()[0]['callee_seconds'], 0)
+
+    def test_input_wait_not_charged(self):
+        machine = grin.ProfiledMachine(grin.Program(['GOSUB 2', 'END', 'INNUM A', 'RETURN']))
+        self.assertEqual(machine.run(), grin.Status.INPUT)
+        time.sleep(0.05)
+        machine.provide('1')
+        self.assertEqual(machine.run(), grin.Status.HALTED)
+        rows = {row['line']: row for row in machine.profile()}
+        self.assertGreater(rows[1]['callee_seconds'], 0)
+        self.assertLess(rows[1]['callee_seconds'], 0.05)
+        self.assertLess(rows[3]['seconds'], 0.05)
+
+class ReportTests(unittest.TestCase):
+    def test_sorted_by_total_time(self):
+        rows = [{'line': 1, 'count': 1, 'seconds': 0.001, 'callee_seconds': 0.0},
+                {'line': 2, 'count': 4, 'seconds': 0.001, 'callee_seconds': 0.002}]
+        table = grin.format_profile(rows, ['PRINT 1', 'GOSUB 2']).splitlines()
+        self.assertEqual(len(table), 3)
+        self.assertTrue(table[1].endswith('GOSUB 2'))
+        self.assertTrue(table[2].endswith('PRINT 1'))
+
+    def test_run_profiled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            output, report = io.StringIO(), io.StringIO()
+            code = grin.run_profiled(PROGRAM, io.StringIO(), output, report, path)
+            with open(path) as file:
+                rows = json.load(file)
+        self.assertEqual(code, grin.batch.EXIT_HALTED)
+        self.assertEqual(output.getvalue(), '3\n2\n1\n0\n')
+        self.assertIn('GOTO "F" IF N > 0', report.getvalue())
+        self.assertEqual(sum(row['count'] for row in rows), 18)
+
+    def test_run_profiled_parse_error(self):
+        output, report = io.StringIO(), io.StringIO()
+        self.assertEqual(grin.run_profiled(['PRINT'], io.StringIO(), output, report),
+                         grin.batch.EXIT_ERROR)
+        self.assertEqual(output.getvalue(), 'ERROR AT LINE 1: FAILED TO PARSE INPUT\n')
+
+if __name__ == '__main__':
+    unittest.main()
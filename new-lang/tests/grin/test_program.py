@@ -0,0 +1,53 @@
+#test_program.py
+#conducts tests for the grin.Program class
+
+import unittest
+import grin
+
+class ProgramTests(unittest.TestCase):
+    def test_cannot_link_invalid_input_lines(self):
+        with self.assertRaises(grin.GrinParseError):
+            grin.Program(['ABCDEF'])
+
+    def test_parse_error_message(self):
+        with self.assertRaises(grin.GrinParseError) as context:
+            grin.Program(['PRINT 1', 'ABCDEF'])
+        self.assertEqual(grin.parse_error_message(context.exception),
+                         'ERROR AT LINE 2: FAILED TO PARSE INPUT')
+
+    def test_one_statement_per_line(self):
+        program = grin.Program(['LET A 1', 'PRINT A', 'END', '.', 'PRINT B'])
+        self.assertEqual(len(program.statements()), 3)
+        self.assertEqual([s.line for s in program.statements()], [1, 2, 3])
+
+    def test_labels_are_removed_from_statements(self):
+        program = grin.Program(['PRINT 1', 'HERE: ADD A 2'])
+        statement = program.statements()[1]
+        self.assertEqual(statement.label, 'HERE')
+        self.assertEqual(statement.kind, grin.GrinTokenKind.ADD)
+        self.assertEqual(statement.variable, 'A')
+        self.assertEqual(statement.value, grin.Operand(False, 2))
+        self.assertEqual(program.labels(), {'HERE': 1})
+
+    def test_last_duplicate_label_is_kept(self):
+        program = grin.Program(['A: PRINT 1', 'A: PRINT 2'])
+        self.assertEqual(program.labels(), {'A': 1})
+
+    def test_integer_targets_are_linked(self):
+        program = grin.Program(['GOTO 2', 'PRINT 1', 'GOTO -2', 'GOTO 2'])
+        self.assertEqual([s.destination for s in program.statements()], [2, None, 0, -1])
+
+    def test_target_of_line_zero_is_last_line(self):
+        program = grin.Program(['PRINT 1', 'GOTO -2'])
+        self.assertEqual(program.statements()[1].destination, 1)
+
+    def test_label_targets_are_linked(self):
+        program = grin.Program(['GOSUB "X" IF A < 3', 'END', 'X: RETURN'])
+        statement = program.statements()[0]
+        self.assertEqual(statement.destination, 2)
+        self.assertEqual(statement.condition, grin.Condition(
+            grin.Operand(True, 'A'), grin.GrinTokenKind.LESS_THAN, grin.Operand(False, 3)))
+
+    def test_identifier_targets_are_left_unlinked(self):
+        program = grin.Program(['GOTO B', 'GOTO "C"'])
+        self.assertEqual([s.destination for s in program.statements()], [None, None])
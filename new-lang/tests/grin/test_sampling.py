@@ -0,0 +1,53 @@
+#test_sampling.py
+#conducts tests for the sampling profiler
+
+import unittest
+import io
+import grin
+
+PROGRAM = ['LET N 0', 'GOSUB "F"', 'END', 'F: GOSUB "G"', 'RETURN', 'G: ADD N 1',
+           'GOTO "G" IF N < 300000', 'RETURN']
+
+class SamplingProfilerTests(unittest.TestCase):
+    def test_sample_names_gosub_call_sites(self):
+        machine = grin.Machine(grin.Program(PROGRAM))
+        machine.load(5, False, [(2, True), (4, False)], {}, 0)
+        profiler = grin.SamplingProfiler(machine, PROGRAM)
+        profiler.sample()
+        profiler.sample()
+        self.assertEqual(profiler.collapsed(),
+                         'main;2: GOSUB "F";4: F: GOSUB "G";6: G: ADD N 1 2\n')
+
+    def test_frames_without_source(self):
+        machine = grin.Machine(grin.Program(PROGRAM))
+        profiler = grin.SamplingProfiler(machine)
+        profiler.sample()
+        self.assertEqual(profiler.samples(), {('main', 'line 1'): 1})
+
+    def test_semicolons_in_source(self):
+        lines = ['PRINT "a;b"']
+        profiler = grin.SamplingProfiler(grin.Machine(grin.Program(lines)), lines)
+        profiler.sample()
+        self.assertEqual(profiler.collapsed(), 'main;1: PRINT "a,b" 1\n')
+
+    def test_skips_past_the_end(self):
+        machine = grin.Machine(grin.Program(['PRINT 1']))
+        machine.load(1, True, [], {}, 1)
+        profiler = grin.SamplingProfiler(machine)
+        profiler.sample()
+        self.assertEqual(profiler.samples(), {})
+
+    def test_run_sampled(self):
+        output, report = io.StringIO(), io.StringIO()
+        code = grin.run_sampled(PROGRAM + ['PRINT N'], io.StringIO(), output, report, 0.0005)
+        self.assertEqual(code, grin.batch.EXIT_HALTED)
+        stacks = report.getvalue().splitlines()
+        self.assertTrue(stacks)
+        for stack in stacks:
+            frames, count = stack.rsplit(' ', 1)
+            self.assertTrue(frames.startswith('main'))
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any(stack.startswith('main;2: GOSUB "F";4: F: GOSUB "G";') for stack in stacks))
+
+if __name__ == '__main__':
+    unittest.main()
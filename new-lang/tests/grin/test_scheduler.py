@@ -0,0 +1,72 @@
+#test_scheduler.py
+#conducts tests for the grin.Scheduler class
+
+import unittest
+import grin
+
+COUNTER = grin.Program(['LET I 0', 'TOP: ADD I 1', 'GOTO "TOP" IF I < 100', 'PRINT I'])
+
+class SchedulerTests(unittest.TestCase):
+    def test_programs_run_to_completion(self):
+        scheduler = grin.Scheduler()
+        pids = [scheduler.spawn(COUNTER) for _ in range(50)]
+        scheduler.run()
+        for pid in pids:
+            self.assertEqual(scheduler.task(pid).output(), ['100'])
+            self.assertEqual(scheduler.task(pid).state(), grin.TaskState.FINISHED)
+
+    def test_slices_are_round_robin(self):
+        scheduler = grin.Scheduler(quantum = 10)
+        first = scheduler.spawn(COUNTER)
+        second = scheduler.spawn(COUNTER)
+        scheduler.run(slices = 4)
+        self.assertEqual(scheduler.task(first).slices(), 2)
+        self.assertEqual(scheduler.task(second).slices(), 2)
+        self.assertEqual(scheduler.task(first).statements(), 20)
+        self.assertEqual(scheduler.fairness(), 1.0)
+
+    def test_fairness_drops_when_uneven(self):
+        scheduler = grin.Scheduler(quantum = 10)
+        scheduler.spawn(COUNTER)
+        scheduler.spawn(COUNTER)
+        scheduler.run(slices = 1)
+        self.assertEqual(scheduler.fairness(), 0.5)
+
+    def test_waiting_program_is_parked_and_woken(self):
+        scheduler = grin.Scheduler()
+        waiting = scheduler.spawn(grin.Program(['INNUM A', 'ADD A 1', 'PRINT A']))
+        other = scheduler.spawn(COUNTER)
+        scheduler.run()
+        self.assertEqual(scheduler.task(waiting).state(), grin.TaskState.PARKED)
+        self.assertEqual(scheduler.tasks(grin.TaskState.FINISHED), [scheduler.task(other)])
+        scheduler.feed(waiting, '41')
+        scheduler.run()
+        self.assertEqual(scheduler.task(waiting).output(), ['42'])
+        self.assertEqual(scheduler.task(waiting).waits(), 1)
+
+    def test_queued_input_does_not_park(self):
+        scheduler = grin.Scheduler()
+        pid = scheduler.spawn(grin.Program(['INSTR A', 'PRINT A']))
+        scheduler.feed(pid, 'HELLO')
+        scheduler.run()
+        self.assertEqual(scheduler.task(pid).output(), ['HELLO'])
+        self.assertEqual(scheduler.task(pid).waits(), 0)
+
+    def test_output_callback_and_errors(self):
+        lines = []
+        scheduler = grin.Scheduler(on_output = lambda pid, text: lines.append((pid, text)))
+        pid = scheduler.spawn(grin.Program(['PRINT 1', 'ADD A "X"']))
+        scheduler.run()
+        self.assertEqual(lines, [(pid, '1'), (pid, 'ERROR AT LINE 2: FAILED TO COMPUTE DUE TO INCOMPATIBLE TYPES')])
+
+    def test_quantum_must_be_positive(self):
+        for quantum in [0, -1]:
+            with self.subTest(quantum = quantum):
+                with self.assertRaises(ValueError):
+                    grin.Scheduler(quantum = quantum)
+
+    def test_remove_stops_task(self):
+        scheduler = grin.Scheduler(quantum = 1)
+        pid = scheduler.spawn(COUNTER)
+        scheduler.remove(pid)
+        self.assertFalse(scheduler.step())
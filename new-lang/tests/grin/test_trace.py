@@ -0,0 +1,127 @@
+#test_trace.py
+#conducts tests for execution tracing
+
+import unittest
+import grin
+
+def trace(lines: list, entries: list = ()) -> tuple:
+    events = []
+    machine = grin.Machine(grin.Program(lines))
+    machine.set_trace(lambda kind, statement, argument:
+                      events.append((kind, None if statement is None else statement.line, argument)))
+    output = grin.batch.complete(machine, entries, [])['output']
+    return events, output
+
+class TraceTests(unittest.TestCase):
+    def test_statements_and_writes(self):
+        events, output = trace(['LET A 1', 'ADD A 2', 'PRINT A'])
+        self.assertEqual(output, ['3'])
+        self.assertEqual(events, [
+            (grin.TraceKind.STATEMENT, 1, 0), (grin.TraceKind.WRITE, 1, ('A', 1)),
+            (grin.TraceKind.STATEMENT, 2, 1), (grin.TraceKind.WRITE, 2, ('A', 3)),
+            (grin.TraceKind.STATEMENT, 3, 2)])
+
+    def test_reads_of_unset_variables_are_writes(self):
+        events, _ = trace(['PRINT A'])
+        self.assertIn((grin.TraceKind.WRITE, 1, ('A', 0)), events)
+
+    def test_jumps_calls_and_returns(self):
+        events, output = trace(['GOSUB 2', 'GOTO 3', 'PRINT 1', 'RETURN', 'PRINT 2'])
+        self.assertEqual(output, ['1', '2'])
+        control = [event for event in events if event[0] != grin.TraceKind.STATEMENT]
+        self.assertEqual(control, [(grin.TraceKind.CALL, 1, 2), (grin.TraceKind.RETURN, 4, 1),
+                                   (grin.TraceKind.JUMP, 2, 4)])
+
+    def test_untaken_jump(self):
+        events, _ = trace(['GOTO 2 IF 1 > 2', 'PRINT 1'])
+        self.assertEqual([kind for kind, _, _ in events],
+                         [grin.TraceKind.STATEMENT, grin.TraceKind.STATEMENT])
+
+    def test_falling_off_the_end_returns(self):
+        events, _ = trace(['GOSUB 1', 'LET A 1'])
+        self.assertIn((grin.TraceKind.RETURN, None, 1), events)
+
+    def test_input_statement_reported_once(self):
+        events, output = trace(['INNUM A', 'PRINT A'], ['4'])
+        self.assertEqual(output, ['4'])
+        self.assertEqual(events[:2], [(grin.TraceKind.STATEMENT, 1, 0), (grin.TraceKind.WRITE, 1, ('A', 4))])
+        self.assertEqual(len(events), 3)
+
+    def test_remove_trace(self):
+        machine = grin.Machine(grin.Program(['LET A 1', 'PRINT A', 'LET B 2']))
+        events = []
+        machine.set_trace(lambda *event: events.append(event))
+        self.assertEqual(machine.run(), grin.Status.OUTPUT)
+        machine.set_trace(None)
+        self.assertEqual(machine._handlers[grin.GrinTokenKind.LET], machine.execute_let)
+        self.assertFalse(any(hasattr(handler, 'untraced') for handler in machine._handlers.values()))
+        self.assertNotIn('leave', machine.__dict__)
+        self.assertNotIn('resolve', machine.__dict__)
+        self.assertIs(type(machine.get_identifiers()), dict)
+        self.assertEqual(machine.run(), grin.Status.HALTED)
+        self.assertEqual(machine.get_identifiers(), {'A': 1, 'B': 2})
+        self.assertEqual(len(events), 3)
+
+    def test_matches_untraced_run(self):
+        lines = ['INNUM N', 'GOTO "L"', 'L: PRINT N', 'SUB N 1', 'GOTO "L" IF N > 0', 'DIV N 0']
+        plain = grin.batch.execute(grin.Program(lines), ['3'])
+        events, output = trace(lines, ['3'])
+        self.assertEqual(output, plain['output'])
+
+LOOP = ['LET I 0', 'LET S 0', 'GOTO "L"', 'L: ADD I 1', 'ADD S I', 'GOTO "L" IF I < 50', 'PRINT S']
+
+def trace_machine(machine: grin.Machine, entries: list = ()) -> tuple:
+    events = []
+    machine.set_trace(lambda *event: events.append(event))
+    output = grin.batch.complete(machine, entries, [])['output']
+    return events, output
+
+class SubclassTraceTests(unittest.TestCase):
+    def test_counted_loops_run_one_statement_at_a_time(self):
+        machine = grin.CountedLoopMachine(grin.Program(LOOP))
+        events, output = trace_machine(machine)
+        self.assertEqual(output, ['1275'])
+        self.assertEqual(machine.accelerated(), 0)
+        statements = [event for event in events if event[0] == grin.TraceKind.STATEMENT]
+        self.assertEqual(len(statements), machine.count())
+        machine = grin.CountedLoopMachine(grin.Program(LOOP))
+        machine.set_trace(lambda *event: None)
+        machine.set_trace(None)
+        self.assertEqual(grin.batch.complete(machine, [], [])['output'], ['1275'])
+        self.assertEqual(machine.accelerated(), 49)
+
+    def test_fusions_fire(self):
+        machine = grin.FusedMachine(grin.Program(LOOP), [('ADD', 'ADD', 'GOTO IF'), ('LET', 'LET')])
+        events, output = trace_machine(machine)
+        self.assertEqual(output, ['1275'])
+        self.assertEqual([row['count'] for row in machine.fired()], [1, 50])
+        statements = [event for event in events if event[0] == grin.TraceKind.STATEMENT]
+        self.assertEqual(len(statements), machine.count())
+
+    def test_profile_is_kept(self):
+        machine = grin.ProfiledMachine(grin.Program(LOOP))
+        events, _ = trace_machine(machine)
+        self.assertEqual([row['count'] for row in machine.profile()], [1, 1, 1, 50, 50, 50, 1])
+        self.assertEqual(len([event for event in events if event[0] == grin.TraceKind.JUMP]), 50)
+
+    def test_metered_jumps_are_reported(self):
+        machine = grin.MeteredMachine(grin.Program(['GOSUB 2', 'GOTO 3', 'PRINT 1', 'RETURN', 'PRINT 2']))
+        events, output = trace_machine(machine)
+        self.assertEqual(output, ['1', '2'])
+        self.assertEqual(machine.metrics()['jumps'], {'GOTO': 1, 'GOSUB': 1, 'RETURN': 1})
+        control = [(kind, argument) for kind, _, argument in events if kind != grin.TraceKind.STATEMENT]
+        self.assertEqual(control, [(grin.TraceKind.CALL, 2), (grin.TraceKind.RETURN, 1),
+                                   (grin.TraceKind.JUMP, 4)])
+
+    def test_writes_are_reported_after_load(self):
+        machine = grin.Machine(grin.Program(['LET A 1', 'ADD A 2']))
+        events = []
+        machine.set_trace(lambda *event: events.append(event))
+        machine.load(1, False, [], {'A': 5}, 1)
+        self.assertEqual(machine.run(), grin.Status.HALTED)
+        self.assertEqual(events[-1][0::2], (grin.TraceKind.WRITE, ('A', 7)))
+        machine.set_trace(None)
+        self.assertEqual(machine.get_identifiers(), {'A': 7})
+
+if __name__ == '__main__':
+    unittest.main()
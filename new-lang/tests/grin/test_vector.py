@@ -0,0 +1,62 @@
+#test_vector.py
+#conducts tests for the lockstep engine, which needs NumPy
+
+import unittest
+import grin
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def outputs(outcomes: list) -> list:
+    return [outcome['output'] for outcome in outcomes]
+
+@unittest.skipIf(numpy is None, 'requires NumPy')
+class VectorTests(unittest.TestCase):
+    def assertMatchesRunMany(self, lines: list, inputs: list):
+        self.assertEqual(grin.run_vectorized(lines, inputs), grin.run_many(lines, inputs))
+
+    def test_uniform_loop(self):
+        lines = ['INNUM N', 'LET I 0', 'LET S 0', 'TOP: ADD I 1', 'ADD S I',
+                 'GOTO "TOP" IF I < N', 'PRINT S']
+        inputs = [[str(n)] for n in range(1, 50)]
+        self.assertEqual(outputs(grin.run_vectorized(lines, inputs)),
+                         [[str(n * (n + 1) // 2)] for n in range(1, 50)])
+        self.assertMatchesRunMany(lines, inputs)
+
+    def test_integer_and_float_division(self):
+        lines = ['INNUM A', 'INNUM B', 'DIV A B', 'PRINT A']
+        self.assertMatchesRunMany(lines, [['7', '2'], ['7.0', '2'], ['-7', '2'], ['7', '2.0'], ['1', '3']])
+
+    def test_division_by_zero_in_some_lanes(self):
+        lines = ['INNUM A', 'LET B 10', 'DIV B A', 'PRINT B']
+        inputs = [['0'], ['5'], ['0.0'], ['-3']]
+        self.assertEqual(outputs(grin.run_vectorized(lines, inputs)),
+                         [['ERROR AT LINE 3: CANNOT DIVIDE BY ZERO'], ['2'],
+                          ['ERROR AT LINE 3: CANNOT DIVIDE BY ZERO'], ['-4']])
+
+    def test_divergent_conditions_split_lanes(self):
+        lines = ['INNUM A', 'GOSUB "BIG" IF A > 10', 'PRINT A', 'END', 'BIG: PRINT "BIG"', 'RETURN']
+        self.assertMatchesRunMany(lines, [['5'], ['50'], ['11'], ['10']])
+
+    def test_strings_fall_back_to_machine(self):
+        lines = ['INNUM A', 'INSTR B', 'ADD B "!"', 'PRINT B', 'PRINT A']
+        self.assertMatchesRunMany(lines, [['1', 'HI'], ['x', 'THERE'], ['2.5']])
+
+    def test_large_integers_fall_back_to_machine(self):
+        lines = ['INNUM A', 'TOP: MULT A A', 'GOTO "TOP" IF A < 100000000000000000000000', 'PRINT A']
+        self.assertMatchesRunMany(lines, [['2'], ['3'], ['99999999999999999999']])
+
+    def test_statement_counts_and_missing_input(self):
+        lines = ['LET A 1', 'INNUM B', 'INNUM C', 'PRINT C']
+        self.assertMatchesRunMany(lines, [['1', '2'], ['1'], []])
+
+    def test_timeout(self):
+        lines = ['INNUM A', 'ADD B A', 'GOTO -1 IF A > 0']
+        outcomes = grin.run_vectorized(lines, [['1'], ['0'], ['2']], timeout = 0.05)
+        self.assertEqual([outcome['status'] for outcome in outcomes], ['timeout', 'halted', 'timeout'])
+
+    def test_timeout_after_falling_back(self):
+        outcomes = grin.run_vectorized(['LET A "x"', 'PRINT A', 'GOTO -1'], [[]], timeout = 0.05)
+        self.assertEqual(outcomes[0]['status'], 'timeout')